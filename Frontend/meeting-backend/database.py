@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -8,11 +8,47 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./database.db")
 
+# SQLite engine profile, applied to every new pooled connection. WAL lets
+# readers proceed while /transcribe commits; synchronous=NORMAL is durable
+# under WAL except on power loss; cache_size < 0 is in KiB.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False},
+    connect_args={"check_same_thread": False} if IS_SQLITE else {},
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_pre_ping=not IS_SQLITE,
 )
 
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+            cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+            cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+            cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+            cursor.execute(f"PRAGMA cache_size = {SQLITE_CACHE_SIZE}")
+            # Off by default in SQLite; needed for ON DELETE CASCADE on tasks/translations
+            cursor.execute("PRAGMA foreign_keys = ON")
+        finally:
+            cursor.close()
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -26,41 +62,15 @@ def get_db():
         db.close()
 
 
-def _sqlite_column_names(conn, table: str) -> set[str]:
-    r = conn.execute(text(f'PRAGMA table_info("{table}")'))
-    return {row[1] for row in r}
-
-
-def migrate_sqlite_schema():
-    """Add columns to existing SQLite DBs (create_all does not alter tables)."""
-    if not DATABASE_URL.startswith("sqlite"):
-        return
-    with engine.begin() as conn:
-        cols = _sqlite_column_names(conn, "tasks")
-        alters = []
-        if "priority" not in cols:
-            alters.append('ALTER TABLE tasks ADD COLUMN priority VARCHAR(20) DEFAULT "medium"')
-        if "assignee" not in cols:
-            alters.append("ALTER TABLE tasks ADD COLUMN assignee VARCHAR(120)")
-        if "board_column" not in cols:
-            alters.append('ALTER TABLE tasks ADD COLUMN board_column VARCHAR(32) DEFAULT "todo"')
-        if "position_x" not in cols:
-            alters.append("ALTER TABLE tasks ADD COLUMN position_x FLOAT")
-        if "position_y" not in cols:
-            alters.append("ALTER TABLE tasks ADD COLUMN position_y FLOAT")
-        if "completed_at" not in cols:
-            alters.append("ALTER TABLE tasks ADD COLUMN completed_at DATETIME")
-        for stmt in alters:
-            conn.execute(text(stmt))
-        if "board_column" not in cols:
-            conn.execute(text("UPDATE tasks SET board_column = 'done' WHERE status = 'completed'"))
-
-
 def init_db():
-    from models import Note, Task, WhiteboardState
-
-    Base.metadata.create_all(bind=engine)
-    migrate_sqlite_schema()
+    import models  # noqa: F401 - registers every table on Base.metadata
+
+    if IS_SQLITE:
+        # Versioned steps; a current schema skips create_all and every step
+        from migrations import run_migrations
+        run_migrations()
+    else:
+        Base.metadata.create_all(bind=engine)
     print("✅ Database initialized successfully")
 
 
@@ -4,8 +4,11 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
-from database import init_db
-from routes import transcribe_router, notes_router, tasks_router, commands_router, whiteboard_router
+from database import init_db, SessionLocal
+from routes import transcribe_router, uploads_router, notes_router, tasks_router, commands_router, whiteboard_router, jobs_router, metrics_router
+from services import job_queue
+from services.whiteboard_hub import whiteboard_hub
+from services.upload_sessions import expire_sessions
 
 # Load environment variables
 load_dotenv()
@@ -25,6 +28,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 # Initialize database on startup
@@ -32,14 +36,29 @@ app.add_middleware(
 async def startup_event():
     """Initialize database tables on startup"""
     init_db()
+    db = SessionLocal()
+    try:
+        expire_sessions(db)
+    finally:
+        db.close()
+    await job_queue.start()
     print("🚀 EchoNotes AI Backend started successfully")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background job workers; unfinished jobs resume on next startup"""
+    await job_queue.stop()
+    await whiteboard_hub.stop()
+
 # Register routes
 app.include_router(transcribe_router, tags=["Transcription"])
+app.include_router(uploads_router, tags=["Transcription"])
 app.include_router(notes_router, tags=["Notes"])
 app.include_router(tasks_router, tags=["Tasks"])
 app.include_router(commands_router, tags=["Voice Commands"])
 app.include_router(whiteboard_router, tags=["Whiteboard"])
+app.include_router(jobs_router, tags=["Jobs"])
+app.include_router(metrics_router, tags=["Metrics"])
 
 # Health check endpoint
 @app.get("/")
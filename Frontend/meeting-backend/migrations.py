@@ -0,0 +1,374 @@
+# migrations.py - Versioned SQLite schema migrations
+"""
+Ordered schema steps tracked by PRAGMA user_version.
+
+Each step runs once: a database at user_version N only runs steps > N, and a
+current database skips create_all and every step. Append new steps with the
+next version number; never edit or reorder a step that has shipped.
+
+Run `python migrations.py --dry-run` to list pending steps without applying them.
+"""
+import os
+import argparse
+from contextlib import contextmanager
+from typing import Callable, List
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from database import engine, Base, IS_SQLITE
+from models.task_counters import TASK_DURATION_MS, TASK_HAS_DURATION, rebuild_task_counters
+from models.resource_version import VERSIONED_TABLES
+from models.whiteboard import compress_xml
+
+# Rows copied into the full-text index per transaction
+FTS_BACKFILL_BATCH = int(os.getenv("FTS_BACKFILL_BATCH", "500"))
+
+
+class Migration:
+    """
+    One schema step
+
+    A plain step is called as apply(conn) inside a transaction that also bumps
+    user_version. A batched step is called as apply() and opens its own short
+    transactions via transaction(), so a large backfill or index build never
+    holds the write lock for long; it must be safe to re-run if interrupted.
+    """
+
+    def __init__(self, version: int, name: str, apply: Callable, batched: bool = False):
+        self.version = version
+        self.name = name
+        self.apply = apply
+        self.batched = batched
+
+
+@contextmanager
+def transaction():
+    """
+    Explicit BEGIN IMMEDIATE transaction
+
+    pysqlite only opens transactions implicitly before DML, so without this an
+    ALTER TABLE or CREATE INDEX would autocommit on its own.
+    """
+    with engine.connect() as conn:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+
+def _sqlite_column_names(conn, table: str) -> set[str]:
+    r = conn.execute(text(f'PRAGMA table_info("{table}")'))
+    return {row[1] for row in r}
+
+
+def _task_planner_columns(conn) -> None:
+    cols = _sqlite_column_names(conn, "tasks")
+    alters = []
+    if "priority" not in cols:
+        alters.append('ALTER TABLE tasks ADD COLUMN priority VARCHAR(20) DEFAULT "medium"')
+    if "assignee" not in cols:
+        alters.append("ALTER TABLE tasks ADD COLUMN assignee VARCHAR(120)")
+    if "board_column" not in cols:
+        alters.append('ALTER TABLE tasks ADD COLUMN board_column VARCHAR(32) DEFAULT "todo"')
+    if "position_x" not in cols:
+        alters.append("ALTER TABLE tasks ADD COLUMN position_x FLOAT")
+    if "position_y" not in cols:
+        alters.append("ALTER TABLE tasks ADD COLUMN position_y FLOAT")
+    if "completed_at" not in cols:
+        alters.append("ALTER TABLE tasks ADD COLUMN completed_at DATETIME")
+    for stmt in alters:
+        conn.execute(text(stmt))
+    if "board_column" not in cols:
+        conn.execute(text("UPDATE tasks SET board_column = 'done' WHERE status = 'completed'"))
+
+
+def _job_audio_hash(conn) -> None:
+    if "audio_hash" not in _sqlite_column_names(conn, "transcription_jobs"):
+        conn.execute(text("ALTER TABLE transcription_jobs ADD COLUMN audio_hash VARCHAR(64)"))
+
+
+def _drop_orphaned_tasks(conn) -> None:
+    # Notes deleted while foreign keys were off left their tasks behind
+    conn.execute(text("DELETE FROM tasks WHERE note_id NOT IN (SELECT id FROM notes)"))
+
+
+def _model_indexes() -> None:
+    # create_all skips indexes on tables that already exist; one index per
+    # transaction keeps each write lock to a single build
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            with transaction() as conn:
+                index.create(bind=conn, checkfirst=True)
+
+
+# External-content FTS5 index over notes; the triggers keep it in sync with
+# every insert/update/delete made through any connection
+NOTES_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(
+        transcript, summary, key_points,
+        content='notes', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS notes_fts_ai AFTER INSERT ON notes BEGIN
+        INSERT INTO notes_fts(rowid, transcript, summary, key_points)
+        VALUES (new.id, new.transcript, new.summary, new.key_points);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN
+        INSERT INTO notes_fts(notes_fts, rowid, transcript, summary, key_points)
+        VALUES ('delete', old.id, old.transcript, old.summary, old.key_points);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS notes_fts_au AFTER UPDATE OF transcript, summary, key_points ON notes BEGIN
+        INSERT INTO notes_fts(notes_fts, rowid, transcript, summary, key_points)
+        VALUES ('delete', old.id, old.transcript, old.summary, old.key_points);
+        INSERT INTO notes_fts(rowid, transcript, summary, key_points)
+        VALUES (new.id, new.transcript, new.summary, new.key_points);
+    END""",
+]
+
+
+def _notes_fts() -> None:
+    """
+    Create notes_fts and its triggers, then index existing notes in batches
+
+    Notes created after the triggers exist are indexed by them, so the
+    backfill stops at the highest id seen when they were installed. Starts
+    from an empty index, which makes an interrupted backfill safe to repeat.
+    """
+    try:
+        with transaction() as conn:
+            for stmt in NOTES_FTS_DDL:
+                conn.execute(text(stmt))
+            conn.execute(text("INSERT INTO notes_fts(notes_fts) VALUES ('delete-all')"))
+            last_id = conn.execute(text("SELECT COALESCE(MAX(id), 0) FROM notes")).scalar()
+    except OperationalError as e:
+        print(f"⚠️ FTS5 unavailable, /search will use LIKE: {e}")
+        return
+
+    done, cursor = 0, 0
+    while cursor < last_id:
+        with transaction() as conn:
+            upper = conn.execute(text("""
+                SELECT MAX(id) FROM (
+                    SELECT id FROM notes WHERE id > :cursor AND id <= :last_id ORDER BY id LIMIT :batch
+                )
+            """), {"cursor": cursor, "last_id": last_id, "batch": FTS_BACKFILL_BATCH}).scalar()
+            if upper is None:
+                break
+            done += conn.execute(text("""
+                INSERT INTO notes_fts(rowid, transcript, summary, key_points)
+                SELECT id, transcript, summary, key_points FROM notes WHERE id > :cursor AND id <= :upper
+            """), {"cursor": cursor, "upper": upper}).rowcount
+        cursor = upper
+    if done:
+        print(f"🔎 Indexed {done} existing note(s) for full-text search")
+
+
+def _task_counter_triggers() -> List[str]:
+    group_key = "COALESCE({row}.assignee, ''), COALESCE({row}.priority, ''), COALESCE({row}.board_column, '')"
+    increment = """INSERT INTO task_group_counts (assignee, priority, board_column, tasks)
+        VALUES ({key}, 1)
+        ON CONFLICT (assignee, priority, board_column) DO UPDATE SET tasks = tasks + 1;"""
+    decrement = """UPDATE task_group_counts SET tasks = tasks - 1
+        WHERE (assignee, priority, board_column) = ({key});"""
+
+    def totals(sign_old: str, sign_new: str) -> str:
+        parts_ms, parts_n = [], []
+        if sign_old:
+            parts_ms.append(f"{sign_old} ({TASK_DURATION_MS.format(row='old')})")
+            parts_n.append(f"{sign_old} ({TASK_HAS_DURATION.format(row='old')})")
+        if sign_new:
+            parts_ms.append(f"{sign_new} ({TASK_DURATION_MS.format(row='new')})")
+            parts_n.append(f"{sign_new} ({TASK_HAS_DURATION.format(row='new')})")
+        return f"""UPDATE task_counter_totals SET
+            duration_ms = duration_ms {' '.join(parts_ms)},
+            durations = durations {' '.join(parts_n)},
+            version = version + 1
+        WHERE id = 1;"""
+
+    new_key = group_key.format(row="new")
+    old_key = group_key.format(row="old")
+    return [
+        f"""CREATE TRIGGER IF NOT EXISTS task_counters_ai AFTER INSERT ON tasks BEGIN
+            {increment.format(key=new_key)}
+            {totals("", "+")}
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS task_counters_ad AFTER DELETE ON tasks BEGIN
+            {decrement.format(key=old_key)}
+            {totals("-", "")}
+        END""",
+        # Only columns analytics reads; canvas drags (position_x/y) don't fire it
+        f"""CREATE TRIGGER IF NOT EXISTS task_counters_au
+            AFTER UPDATE OF assignee, priority, board_column, deadline, completed_at, created_at ON tasks BEGIN
+            {decrement.format(key=old_key)}
+            {increment.format(key=new_key)}
+            {totals("-", "+")}
+        END""",
+    ]
+
+
+def _task_counters(conn) -> None:
+    """Install the triggers maintaining task analytics counters and seed them from tasks."""
+    for stmt in _task_counter_triggers():
+        conn.execute(text(stmt))
+    rebuild_task_counters(conn)
+
+
+# Changes that can rewrite the past (backdated inserts, deletes, edits of
+# older tasks) invalidate cached closed series buckets
+TASK_HISTORY_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS task_history_ai AFTER INSERT ON tasks
+        WHEN new.created_at < date('now') BEGIN
+        UPDATE task_counter_totals SET history_version = history_version + 1 WHERE id = 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS task_history_ad AFTER DELETE ON tasks
+        WHEN old.created_at < date('now') BEGIN
+        UPDATE task_counter_totals SET history_version = history_version + 1 WHERE id = 1;
+    END""",
+    # Completing or reopening an older task today only rewrites history if
+    # the completion being removed or set lies before today
+    """CREATE TRIGGER IF NOT EXISTS task_history_au
+        AFTER UPDATE OF note_id, assignee, priority, board_column, created_at, completed_at ON tasks
+        WHEN (old.created_at < date('now') OR new.created_at < date('now')) AND (
+            old.created_at IS NOT new.created_at
+            OR old.note_id IS NOT new.note_id
+            OR old.assignee IS NOT new.assignee
+            OR old.priority IS NOT new.priority
+            OR (old.completed_at IS NOT new.completed_at
+                AND (old.completed_at < date('now') OR new.completed_at < date('now')))
+            OR (old.board_column IS NOT new.board_column AND old.completed_at < date('now'))
+        ) BEGIN
+        UPDATE task_counter_totals SET history_version = history_version + 1 WHERE id = 1;
+    END""",
+]
+
+
+def _task_history_version(conn) -> None:
+    if "history_version" not in _sqlite_column_names(conn, "task_counter_totals"):
+        conn.execute(text(
+            "ALTER TABLE task_counter_totals ADD COLUMN history_version INTEGER NOT NULL DEFAULT 0"
+        ))
+    for stmt in TASK_HISTORY_TRIGGERS:
+        conn.execute(text(stmt))
+
+
+def _resource_version_triggers() -> List[str]:
+    statements = []
+    for resource, table in VERSIONED_TABLES.items():
+        for event, suffix in (("INSERT", "ai"), ("UPDATE", "au"), ("DELETE", "ad")):
+            statements.append(f"""CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {event} ON {table} BEGIN
+                UPDATE resource_versions SET version = version + 1 WHERE name = '{resource}';
+            END""")
+    return statements
+
+
+def _resource_versions(conn) -> None:
+    """Seed a version row per resource and install the triggers bumping it."""
+    for resource in VERSIONED_TABLES:
+        conn.execute(
+            text("INSERT OR IGNORE INTO resource_versions (name, version) VALUES (:name, 0)"),
+            {"name": resource},
+        )
+    for stmt in _resource_version_triggers():
+        conn.execute(text(stmt))
+
+
+def _whiteboard_compression(conn) -> None:
+    """Add compressed storage and the revision counter, then move existing XML into it."""
+    columns = _sqlite_column_names(conn, "whiteboard_state")
+    if "diagram_gz" not in columns:
+        conn.execute(text("ALTER TABLE whiteboard_state ADD COLUMN diagram_gz BLOB"))
+    if "revision" not in columns:
+        conn.execute(text("ALTER TABLE whiteboard_state ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"))
+    rows = conn.execute(text("SELECT id, diagram_xml FROM whiteboard_state WHERE diagram_xml != ''")).all()
+    for board_id, xml in rows:
+        conn.execute(
+            text("UPDATE whiteboard_state SET diagram_gz = :gz, diagram_xml = '' WHERE id = :id"),
+            {"gz": compress_xml(xml), "id": board_id},
+        )
+
+
+def _new_tables(conn) -> None:
+    """The step's tables are new, so create_all has already made them; nothing to alter."""
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "tasks: planner columns (priority, assignee, board_column, position, completed_at)", _task_planner_columns),
+    Migration(2, "transcription_jobs: audio_hash", _job_audio_hash),
+    Migration(3, "tasks: drop rows orphaned before foreign keys were enabled", _drop_orphaned_tasks),
+    Migration(4, "indexes declared on models", _model_indexes, batched=True),
+    Migration(5, "notes_fts: full-text index, sync triggers and backfill", _notes_fts, batched=True),
+    Migration(6, "tasks: covering indexes for analytics", _model_indexes, batched=True),
+    Migration(7, "tasks: trigger-maintained analytics counters", _task_counters),
+    Migration(8, "tasks: history version for cached analytics series", _task_history_version),
+    Migration(9, "notes, tasks, whiteboard: version counters for ETags", _resource_versions),
+    Migration(10, "whiteboard_state: compressed XML and revision counter", _whiteboard_compression),
+    Migration(11, "live_analyses: rolling summary checkpoints for live meetings", _new_tables),
+    Migration(12, "upload_sessions, upload_chunks: resumable uploads", _new_tables),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def current_version() -> int:
+    with engine.connect() as conn:
+        return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def _set_version(conn, version: int) -> None:
+    conn.exec_driver_sql(f"PRAGMA user_version = {int(version)}")
+
+
+def run_migrations(dry_run: bool = False) -> List[Migration]:
+    """
+    Bring the SQLite schema up to LATEST_VERSION
+
+    Args:
+        dry_run: Only report the steps that would run
+
+    Returns:
+        The pending (or, with dry_run, would-be-applied) steps
+    """
+    version = current_version()
+    if version > LATEST_VERSION:
+        print(f"⚠️ Database schema v{version} is newer than this code (v{LATEST_VERSION})")
+        return []
+    pending = [m for m in MIGRATIONS if m.version > version]
+    if not pending:
+        return []
+
+    if dry_run:
+        print(f"📋 Schema v{version}, {len(pending)} pending migration(s):")
+        for m in pending:
+            print(f"   {m.version}: {m.name}")
+        return pending
+
+    # New tables (and every column, for a fresh database) come from the models
+    Base.metadata.create_all(bind=engine)
+    for m in pending:
+        print(f"🛠️ Migration {m.version}: {m.name}")
+        if m.batched:
+            m.apply()
+            with transaction() as conn:
+                _set_version(conn, m.version)
+        else:
+            with transaction() as conn:
+                m.apply(conn)
+                _set_version(conn, m.version)
+    print(f"✅ Schema migrated v{version} → v{LATEST_VERSION}")
+    return pending
+
+
+if __name__ == "__main__":
+    import models  # noqa: F401 - registers every table on Base.metadata
+
+    parser = argparse.ArgumentParser(description="Apply pending SQLite schema migrations")
+    parser.add_argument("--dry-run", action="store_true", help="list pending migrations without applying them")
+    args = parser.parse_args()
+    if not IS_SQLITE:
+        parser.exit(message="Versioned migrations only apply to SQLite databases\n")
+    if not run_migrations(dry_run=args.dry_run):
+        print(f"✅ Schema is current (v{current_version()})")
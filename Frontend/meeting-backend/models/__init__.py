@@ -1,6 +1,14 @@
 # models/__init__.py
 from .note import Note
 from .task import Task
-from .whiteboard import WhiteboardState
+from .whiteboard import WhiteboardState, WhiteboardRevision
+from .job import TranscriptionJob
+from .transcript_cache import TranscriptCacheEntry
+from .llm_cache import LLMCacheEntry
+from .translation import Translation
+from .task_counters import TaskGroupCount, TaskCounterTotals
+from .resource_version import ResourceVersion
+from .live_analysis import LiveAnalysis
+from .upload_session import UploadSession, UploadChunk
 
-__all__ = ["Note", "Task", "WhiteboardState"]
+__all__ = ["Note", "Task", "WhiteboardState", "WhiteboardRevision", "TranscriptionJob", "TranscriptCacheEntry", "LLMCacheEntry", "Translation", "TaskGroupCount", "TaskCounterTotals", "ResourceVersion", "LiveAnalysis", "UploadSession", "UploadChunk"]
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+
+from database import Base
+
+
+class TranscriptionJob(Base):
+    """
+    Background /transcribe job — persisted so queued work survives a restart.
+    stages holds a JSON object of pipeline stage -> pending/running/done/failed.
+    """
+
+    __tablename__ = "transcription_jobs"
+
+    id = Column(String(32), primary_key=True)
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, completed, failed
+    stages = Column(Text, nullable=False, default="{}")
+    filename = Column(String(255), nullable=False)
+    file_path = Column(String(512), nullable=False)
+    audio_hash = Column(String(64), nullable=True)  # SHA-256 of the upload, for the transcript cache
+    note_id = Column(Integer, nullable=True)
+    result = Column(Text, nullable=True)  # JSON /transcribe payload once completed
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<TranscriptionJob(id={self.id}, status={self.status})>"
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from database import Base
+
+
+class LiveAnalysis(Base):
+    """
+    Rolling summary and task list of a live meeting, checkpointed after
+    every update so the running state survives the connection. segments
+    counts the transcript segments folded in; the token columns add up
+    what the incremental analysis has spent so far.
+    """
+
+    __tablename__ = "live_analyses"
+
+    id = Column(String(32), primary_key=True)  # live session id
+    filename = Column(String(255), nullable=False)
+    segments = Column(Integer, nullable=False, default=0)
+    summary = Column(Text, nullable=False, default="")
+    key_points = Column(Text, nullable=False, default="[]")  # JSON array
+    tasks = Column(Text, nullable=False, default="[]")  # JSON array of {task, deadline}
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    note_id = Column(Integer, ForeignKey("notes.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<LiveAnalysis(id={self.id}, segments={self.segments})>"
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+
+from database import Base
+
+
+class LLMCacheEntry(Base):
+    """Persistent tier of the GPT response cache (see services/llm_cache.py)."""
+
+    __tablename__ = "llm_cache"
+
+    key = Column(String(64), primary_key=True)  # SHA-256 of model, template version, temperature, input
+    model = Column(String(64), nullable=False)
+    template = Column(String(64), nullable=False)
+    response = Column(Text, nullable=False)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    def __repr__(self):
+        return f"<LLMCacheEntry(key={self.key[:12]}, template={self.template})>"
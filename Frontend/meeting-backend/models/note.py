@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
 from sqlalchemy.sql import func
 from database import Base
 
@@ -8,6 +8,14 @@ class Note(Base):
     Note model - stores meeting recordings with transcripts and AI analysis
     """
     __tablename__ = "notes"
+    # Keyset pages walk (created_at, id) newest first; filtered lists seek the
+    # filter column first (SQLite appends the rowid to every index)
+    __table_args__ = (
+        Index("ix_notes_created_at", "created_at"),
+        Index("ix_notes_filename", "filename"),
+        Index("ix_notes_sentiment_created_at", "sentiment", "created_at"),
+        Index("ix_notes_language_created_at", "language", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     filename = Column(String(255), nullable=False)
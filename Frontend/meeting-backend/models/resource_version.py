@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String
+
+from database import Base
+
+# API resource -> table whose every insert/update/delete bumps its version
+VERSIONED_TABLES = {
+    "notes": "notes",
+    "tasks": "tasks",
+    "whiteboard": "whiteboard_state",
+}
+
+
+class ResourceVersion(Base):
+    """
+    Change counter per API resource, bumped by SQLite triggers (see
+    migrations.py) and used to build ETags for conditional GETs.
+    """
+
+    __tablename__ = "resource_versions"
+
+    name = Column(String(32), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
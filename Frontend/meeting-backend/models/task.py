@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Index
 from sqlalchemy.sql import func
 
 from database import Base
@@ -11,6 +11,18 @@ class Task(Base):
     """
 
     __tablename__ = "tasks"
+    # Backing indexes for the keyset-paginated, filterable GET /tasks
+    __table_args__ = (
+        Index("ix_tasks_created_at", "created_at"),
+        Index("ix_tasks_note_id_created_at", "note_id", "created_at"),
+        Index("ix_tasks_assignee_created_at", "assignee", "created_at"),
+        Index("ix_tasks_board_column_created_at", "board_column", "created_at"),
+        Index("ix_tasks_priority_created_at", "priority", "created_at"),
+        # Covering indexes for /tasks/analytics/summary
+        Index("ix_tasks_breakdown", "assignee", "priority", "board_column"),
+        Index("ix_tasks_deadline_board_column", "deadline", "board_column"),
+        Index("ix_tasks_board_column_completed_at", "board_column", "completed_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), nullable=False)
@@ -0,0 +1,78 @@
+from sqlalchemy import Column, Integer, String, CheckConstraint, text
+
+from database import Base
+
+# Completion time of a done task in whole milliseconds ({row} = new/old in
+# triggers, tasks in queries); integers keep the running sum free of float drift
+TASK_DURATION_MS = (
+    "CASE WHEN {row}.board_column = 'done' AND julianday({row}.completed_at) >= julianday({row}.created_at) "
+    "THEN CAST(ROUND((julianday({row}.completed_at) - julianday({row}.created_at)) * 86400000) AS INTEGER) "
+    "ELSE 0 END"
+)
+TASK_HAS_DURATION = (
+    "CASE WHEN {row}.board_column = 'done' AND julianday({row}.completed_at) >= julianday({row}.created_at) "
+    "THEN 1 ELSE 0 END"
+)
+
+
+class TaskGroupCount(Base):
+    """
+    Live task count per (assignee, priority, board_column), kept current by
+    SQLite triggers on tasks (see migrations.py). NULLs are stored as ''.
+    """
+
+    __tablename__ = "task_group_counts"
+
+    assignee = Column(String(120), primary_key=True, default="")
+    priority = Column(String(20), primary_key=True, default="")
+    board_column = Column(String(32), primary_key=True, default="")
+    tasks = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TaskGroupCount({self.assignee!r}, {self.priority!r}, {self.board_column!r}: {self.tasks})>"
+
+
+class TaskCounterTotals(Base):
+    """
+    Single-row completion-duration totals for done tasks, plus a version
+    bumped by every task change that can affect analytics.
+    """
+
+    __tablename__ = "task_counter_totals"
+    __table_args__ = (CheckConstraint("id = 1", name="ck_task_counter_totals_single_row"),)
+
+    id = Column(Integer, primary_key=True)
+    duration_ms = Column(Integer, nullable=False, default=0)  # sum of completed_at - created_at
+    durations = Column(Integer, nullable=False, default=0)  # done tasks contributing to duration_ms
+    version = Column(Integer, nullable=False, default=0)
+    # Bumped only by changes to tasks created before today (UTC), i.e. ones
+    # that can alter closed buckets of the analytics series
+    history_version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<TaskCounterTotals(durations={self.durations}, version={self.version})>"
+
+
+def rebuild_task_counters(conn) -> None:
+    """Replace the stored counters with values recomputed from tasks (run inside a transaction)."""
+    conn.execute(text("DELETE FROM task_group_counts"))
+    conn.execute(text("""
+        INSERT INTO task_group_counts (assignee, priority, board_column, tasks)
+        SELECT COALESCE(assignee, ''), COALESCE(priority, ''), COALESCE(board_column, ''), COUNT(*)
+        FROM tasks
+        GROUP BY 1, 2, 3
+    """))
+    conn.execute(text(f"""
+        INSERT INTO task_counter_totals (id, duration_ms, durations, version, history_version)
+        SELECT 1,
+               COALESCE(SUM({TASK_DURATION_MS.format(row="tasks")}), 0),
+               COALESCE(SUM({TASK_HAS_DURATION.format(row="tasks")}), 0),
+               0, 0
+        FROM tasks
+        WHERE true
+        ON CONFLICT (id) DO UPDATE SET
+            duration_ms = excluded.duration_ms,
+            durations = excluded.durations,
+            version = task_counter_totals.version + 1,
+            history_version = task_counter_totals.history_version + 1
+    """))
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+
+from database import Base
+
+
+class TranscriptCacheEntry(Base):
+    """Raw Whisper transcript keyed on the SHA-256 of the uploaded audio bytes."""
+
+    __tablename__ = "transcript_cache"
+
+    audio_hash = Column(String(64), primary_key=True)
+    raw_transcript = Column(Text, nullable=False)
+    byte_size = Column(Integer, nullable=True)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    def __repr__(self):
+        return f"<TranscriptCacheEntry(audio_hash={self.audio_hash[:12]}, hits={self.hit_count})>"
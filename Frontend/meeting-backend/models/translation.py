@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+
+from database import Base
+
+
+class Translation(Base):
+    """
+    Stored translation of a note field (summary or key_points).
+    source_hash ties it to the exact source text, so edited notes are re-translated.
+    """
+
+    __tablename__ = "translations"
+    __table_args__ = (
+        UniqueConstraint("note_id", "field", "target_language", "source_hash", name="uq_translation_source"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    note_id = Column(Integer, ForeignKey("notes.id", ondelete="CASCADE"), nullable=False)
+    field = Column(String(32), nullable=False)  # summary, key_points
+    target_language = Column(String(50), nullable=False)  # lower-cased language name
+    source_hash = Column(String(64), nullable=False)
+    content = Column(Text, nullable=False)  # plain text, or JSON array for key_points
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<Translation(note_id={self.note_id}, field={self.field}, target_language={self.target_language})>"
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, BigInteger, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from database import Base
+
+
+class UploadSession(Base):
+    """
+    Resumable upload of one recording. Chunks are written in place into a
+    preallocated file under UPLOAD_DIR/.incoming until the session is
+    finalized into the /transcribe pipeline or expires.
+    """
+
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(32), primary_key=True)
+    filename = Column(String(255), nullable=False)
+    size = Column(BigInteger, nullable=False)  # declared total bytes
+    sha256 = Column(String(64), nullable=True)  # declared digest, checked on finalize
+    status = Column(String(20), nullable=False, default="open")  # open, finalizing
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)  # pushed back by every chunk
+
+    def __repr__(self):
+        return f"<UploadSession(id={self.id}, size={self.size}, status={self.status})>"
+
+
+class UploadChunk(Base):
+    """A byte range [start, end) received for an upload session, with its SHA-256."""
+
+    __tablename__ = "upload_chunks"
+
+    session_id = Column(String(32), ForeignKey("upload_sessions.id", ondelete="CASCADE"), primary_key=True)
+    start = Column(BigInteger, primary_key=True)
+    end = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), nullable=False)
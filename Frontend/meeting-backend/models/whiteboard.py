@@ -1,14 +1,52 @@
-from sqlalchemy import Column, Integer, Text, DateTime
+import zlib
+
+from sqlalchemy import Column, Integer, Text, DateTime, LargeBinary, String, ForeignKey
 from sqlalchemy.sql import func
 
 from database import Base
 
 
+def compress_xml(xml: str) -> bytes:
+    return zlib.compress(xml.encode("utf-8"), 6)
+
+
+def decompress_xml(data: bytes) -> str:
+    return zlib.decompress(data).decode("utf-8") if data else ""
+
+
 class WhiteboardState(Base):
-    """Singleton-style storage for diagrams.net (draw.io) diagram XML."""
+    """
+    Singleton-style storage for diagrams.net (draw.io) diagram XML.
+    The XML is kept zlib-compressed in diagram_gz; revision is the ORM
+    version counter (assigned by the writer, since a debounced WebSocket
+    save can cover several revisions), so a write based on a stale
+    revision matches no row.
+    """
 
     __tablename__ = "whiteboard_state"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
+    # Uncompressed XML from before diagram_gz; migrated out and left empty
     diagram_xml = Column(Text, nullable=False, default="")
+    diagram_gz = Column(LargeBinary, nullable=True)
+    revision = Column(Integer, nullable=False, default=0)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __mapper_args__ = {"version_id_col": revision, "version_id_generator": False}
+
+
+class WhiteboardRevision(Base):
+    """
+    Bounded whiteboard history: a compressed full snapshot every few
+    revisions and, in between, the compressed JSON edit list that turned
+    the previous revision into this one.
+    """
+
+    __tablename__ = "whiteboard_revisions"
+
+    board_id = Column(Integer, ForeignKey("whiteboard_state.id", ondelete="CASCADE"), primary_key=True)
+    revision = Column(Integer, primary_key=True)
+    kind = Column(String(10), nullable=False)  # snapshot | delta
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)  # uncompressed XML length of this revision
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,14 +1,20 @@
 # routes/__init__.py
 from .transcribe import router as transcribe_router
+from .uploads import router as uploads_router
 from .notes import router as notes_router
 from .tasks import router as tasks_router
 from .commands import router as commands_router
 from .whiteboard import router as whiteboard_router
+from .jobs import router as jobs_router
+from .metrics import router as metrics_router
 
 __all__ = [
     "transcribe_router",
+    "uploads_router",
     "notes_router",
     "tasks_router",
     "commands_router",
     "whiteboard_router",
+    "jobs_router",
+    "metrics_router",
 ]
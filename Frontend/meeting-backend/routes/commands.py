@@ -1,10 +1,13 @@
+import json
+
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
 from database import get_db
 from models import Note
-from services import process_voice_command
+from services import process_voice_command, stream_voice_command, voice_command_excerpts
 
 router = APIRouter()
 
@@ -13,6 +16,7 @@ class VoiceCommandRequest(BaseModel):
     """Schema for voice command request"""
     command: str
     note_id: int
+    bypass_cache: bool = False
 
 
 @router.post("/voice-command")
@@ -23,7 +27,8 @@ async def handle_voice_command(
     """
     Process voice command using stored transcript (no re-transcription)
     
-    Optimization: Reuses stored transcript instead of re-transcribing audio
+    Optimization: Reuses stored transcript instead of re-transcribing audio, and for
+    long meetings sends only the BM25-selected passages relevant to the command
     """
     # Get the note with transcript
     note = db.query(Note).filter(Note.id == request.note_id).first()
@@ -31,10 +36,14 @@ async def handle_voice_command(
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
     
-    # Process command using GPT with stored transcript
+    # Process command using GPT with the stored transcript (or its relevant passages)
+    transcript = note.transcript or ""
     response = await process_voice_command(
         command=request.command,
-        transcript=note.transcript
+        transcript=transcript,
+        bypass_cache=request.bypass_cache,
+        excerpts=voice_command_excerpts(note.id, transcript, request.command),
+        summary=note.summary
     )
     
     return {
@@ -42,3 +51,53 @@ async def handle_voice_command(
         "command": request.command,
         "response": response
     }
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/voice-command/stream")
+async def stream_voice_command_response(
+    request: VoiceCommandRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Stream the answer to a voice command as Server-Sent Events
+
+    Emits a `delta` event per completion chunk, then `done` with the full
+    response (or `error`). If the client disconnects mid-answer the upstream
+    OpenAI request is closed rather than run to completion.
+    """
+    note = db.query(Note).filter(Note.id == request.note_id).first()
+
+    if not note:
+        raise HTTPException(status_code=404, detail="Note not found")
+
+    transcript = note.transcript or ""
+    deltas = stream_voice_command(
+        command=request.command,
+        transcript=transcript,
+        bypass_cache=request.bypass_cache,
+        excerpts=voice_command_excerpts(note.id, transcript, request.command),
+        summary=note.summary
+    )
+
+    async def event_stream():
+        parts = []
+        try:
+            async for delta in deltas:
+                parts.append(delta)
+                yield _sse("delta", {"delta": delta})
+            yield _sse("done", {"success": True, "command": request.command, "response": "".join(parts)})
+        except Exception as e:
+            print(f"❌ Voice command stream failed: {e}")
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            await deltas.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,66 @@
+import os
+import json
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import TranscriptionJob
+from schemas import JobResponse
+from services import job_queue, job_snapshot
+from services.job_queue import TERMINAL_STATUSES
+
+router = APIRouter()
+
+# Seconds between SSE keep-alive comments so proxies don't drop idle streams
+SSE_KEEPALIVE = float(os.getenv("SSE_KEEPALIVE", "15"))
+
+
+def _get_job_or_404(job_id: str, db: Session) -> TranscriptionJob:
+    job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, db: Session = Depends(get_db)):
+    """
+    Poll a background transcription job (stage-by-stage status, note_id when done)
+    """
+    return job_snapshot(_get_job_or_404(job_id, db))
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, db: Session = Depends(get_db)):
+    """
+    Server-Sent Events stream of job progress; closes once the job completes or fails
+    """
+    # Subscribe before reading the snapshot so no transition is missed in between
+    listener = job_queue.subscribe(job_id)
+    try:
+        snapshot = job_snapshot(_get_job_or_404(job_id, db))
+    except HTTPException:
+        job_queue.unsubscribe(job_id, listener)
+        raise
+
+    async def event_stream():
+        try:
+            event = snapshot
+            yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+            while event["status"] not in TERMINAL_STATUSES:
+                try:
+                    event = await asyncio.wait_for(listener.get(), SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+        finally:
+            job_queue.unsubscribe(job_id, listener)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+
+from database import get_db
+from services import metrics, transcript_cache_size
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(db: Session = Depends(get_db)):
+    """
+    Prometheus text-format counters (cache hit/miss, latencies) for scraping
+    """
+    metrics.set_gauge("transcript_cache_entries", transcript_cache_size(db))
+    return metrics.render()
@@ -1,29 +1,79 @@
 import json
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import String, type_coerce
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from database import get_db
 from models import Note
-from schemas import NoteResponse, NoteListResponse
+from services import invalidate_note_index, full_text_search
+from services.conditional import not_modified
+from services.pagination import keyset_page, MAX_PAGE_SIZE
+from schemas import NoteResponse, NoteListResponse, TranslationBatchRequest, TranslationBatchResponse
 
 router = APIRouter()
 
 
+def _sqlite_timestamp(value: datetime) -> str:
+    """Render a filter bound in the 'YYYY-MM-DD HH:MM:SS' UTC text SQLite stores."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
 @router.get("/notes", response_model=List[NoteListResponse])
-async def get_all_notes(db: Session = Depends(get_db)):
+async def get_all_notes(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    sentiment: Optional[str] = None,
+    language: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
     """
-    Get all notes (list view with summaries, without full transcripts)
+    Get notes newest first (list view with summaries, without full transcripts)
+
+    Without limit or cursor every note is returned. With them the list is
+    keyset-paginated on (created_at, id): when more notes exist the
+    X-Next-Cursor response header holds the `cursor` for the next page.
+    created_from is inclusive, created_to exclusive.
     """
-    notes = db.query(Note).order_by(Note.created_at.desc()).all()
+    if (cached := not_modified(request, response, db, "notes")) is not None:
+        return cached
+
+    query = db.query(Note.id, Note.filename, Note.summary, Note.created_at)
+    created = type_coerce(Note.created_at, String)
+    if created_from:
+        query = query.filter(created >= _sqlite_timestamp(created_from))
+    if created_to:
+        query = query.filter(created < _sqlite_timestamp(created_to))
+    if sentiment:
+        query = query.filter(Note.sentiment == sentiment)
+    if language:
+        query = query.filter(Note.language == language)
+
+    try:
+        notes, next_cursor = keyset_page(query, Note.created_at, Note.id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return notes
 
 
 @router.get("/notes/{note_id}", response_model=NoteResponse)
-async def get_note(note_id: int, db: Session = Depends(get_db)):
+async def get_note(note_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     """
     Get single note with full details including transcript
     """
+    if (cached := not_modified(request, response, db, "notes")) is not None:
+        return cached
+
     note = db.query(Note).filter(Note.id == note_id).first()
     
     if not note:
@@ -44,35 +94,33 @@ async def delete_note(note_id: int, db: Session = Depends(get_db)):
     
     db.delete(note)
     db.commit()
+    invalidate_note_index(note_id)
     
     return {"success": True, "message": f"Note {note_id} deleted"}
 
 
 @router.get("/search")
-async def search_notes(q: str, db: Session = Depends(get_db)):
+async def search_notes(
+    q: str,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
     """
-    Simple search across transcripts and summaries using SQLite LIKE
+    Full-text search across transcripts, summaries and key points
+
+    Results are BM25-ranked with highlighted snippets; the last word matches
+    as a prefix. Without limit or cursor every match is returned; with them
+    results come in pages, and next_cursor is passed back as `cursor` for
+    the following one. `count` is the number of results in the response.
     """
     if not q or len(q) < 2:
         raise HTTPException(status_code=400, detail="Query must be at least 2 characters")
     
-    search_pattern = f"%{q}%"
-    
-    notes = db.query(Note).filter(
-        (Note.transcript.like(search_pattern)) | 
-        (Note.summary.like(search_pattern))
-    ).order_by(Note.created_at.desc()).all()
-    
-    results = []
-    for note in notes:
-        results.append({
-            "id": note.id,
-            "filename": note.filename,
-            "summary": note.summary,
-            "created_at": note.created_at.isoformat()
-        })
-    
-    return {"results": results, "count": len(results)}
+    try:
+        return full_text_search(db, q, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/notes/{note_id}/translate")
@@ -82,9 +130,9 @@ async def translate_note_summary(
     db: Session = Depends(get_db)
 ):
     """
-    Translate the summary of a note into a target language
+    Translate the summary of a note into a target language (served from stored translations when available)
     """
-    from services import translate_text  # Import here to avoid circular dependencies if any
+    from services import translate_summary  # Import here to avoid circular dependencies if any
     
     target_language = payload.get("target_language")
     if not target_language:
@@ -97,11 +145,40 @@ async def translate_note_summary(
     if not note.summary:
          raise HTTPException(status_code=400, detail="No summary available to translate")
 
-    translated_summary = await translate_text(note.summary, target_language)
+    translation = await translate_summary(
+        db, note, target_language, bypass_cache=bool(payload.get("bypass_cache", False))
+    )
     
     return {
         "note_id": note.id,
         "original_language": note.language or "Unknown",
         "translated_to": target_language,
-        "translated_summary": translated_summary
+        "translated_summary": translation["translated_summary"],
+        "cached": translation["cached"]
     }
+
+
+@router.post("/notes/{note_id}/translations", response_model=TranslationBatchResponse)
+async def translate_note_batch(
+    note_id: int,
+    body: TranslationBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Translate summary and key points into several languages in one model call
+    """
+    from services import translate_note
+
+    note = db.query(Note).filter(Note.id == note_id).first()
+    if not note:
+        raise HTTPException(status_code=404, detail="Note not found")
+
+    if not note.summary:
+        raise HTTPException(status_code=400, detail="No summary available to translate")
+
+    result = await translate_note(db, note, body.target_languages)
+    return TranslationBatchResponse(
+        note_id=note.id,
+        original_language=note.language or "Unknown",
+        **result
+    )
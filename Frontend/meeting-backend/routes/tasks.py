@@ -1,16 +1,26 @@
-from datetime import datetime, timedelta, timezone
+import os
+from datetime import date, datetime, timedelta, timezone
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
 from database import get_db, ensure_manual_tasks_note, MANUAL_NOTE_FILENAME
 from models import Task, Note
-from schemas import TaskResponse, TaskUpdate, TaskCreate, TaskAnalyticsSummary
+from schemas import (
+    TaskResponse, TaskUpdate, TaskCreate, TaskAnalyticsSummary, TaskSeriesResponse,
+    TaskBulkRequest, TaskBulkResponse, TaskBulkError,
+)
+from schemas.task import BoardColumn, Priority, SeriesBucket
+from services.conditional import not_modified
+from services.pagination import keyset_page, MAX_PAGE_SIZE
+from services.task_analytics import task_analytics_snapshot, task_series, verify_task_counters
 
 router = APIRouter()
 
+# Most updates + creates + deletes accepted by one PATCH /tasks/bulk
+TASK_BULK_MAX_ITEMS = int(os.getenv("TASK_BULK_MAX_ITEMS", "500"))
+
 
 def _derive_status(board_column: str) -> str:
     return "completed" if board_column == "done" else "pending"
@@ -26,6 +36,53 @@ def _sync_completion_fields(task: Task) -> None:
         task.completed_at = None
 
 
+def _new_task(body: TaskCreate, note_id: int) -> Task:
+    task = Task(
+        note_id=note_id,
+        task=body.task.strip(),
+        deadline=body.deadline,
+        priority=body.priority,
+        assignee=body.assignee.strip() if body.assignee else None,
+        board_column=body.board_column,
+        status="pending",
+    )
+    _sync_completion_fields(task)
+    return task
+
+
+def _apply_update(task: Task, body: TaskUpdate) -> None:
+    if body.task is not None:
+        task.task = body.task.strip()
+    if body.deadline is not None:
+        task.deadline = body.deadline or None
+    if body.priority is not None:
+        task.priority = body.priority
+    if body.assignee is not None:
+        task.assignee = body.assignee.strip() if body.assignee else None
+    if body.position_x is not None:
+        task.position_x = body.position_x
+    if body.position_y is not None:
+        task.position_y = body.position_y
+
+    if body.board_column is not None:
+        task.board_column = body.board_column
+    if body.status is not None:
+        if body.status == "completed":
+            task.board_column = "done"
+        elif body.status == "pending":
+            task.board_column = "todo"
+
+    if body.board_column is not None or body.status is not None:
+        _sync_completion_fields(task)
+
+
+# Columns _task_to_response reads; status is derived from board_column
+_TASK_LIST_COLUMNS = (
+    Task.id, Task.note_id, Task.task, Task.deadline, Task.priority, Task.assignee,
+    Task.board_column, Task.position_x, Task.position_y, Task.completed_at, Task.created_at,
+)
+
+
 def _task_to_response(task: Task, note_filename: Optional[str] = None) -> TaskResponse:
     fn = note_filename
     if fn == MANUAL_NOTE_FILENAME:
@@ -48,18 +105,52 @@ def _task_to_response(task: Task, note_filename: Optional[str] = None) -> TaskRe
 
 
 @router.get("/tasks", response_model=List[TaskResponse])
-async def get_all_tasks(db: Session = Depends(get_db)):
-    results = (
-        db.query(Task, Note.filename)
-        .join(Note, Task.note_id == Note.id)
-        .order_by(Task.created_at.desc())
-        .all()
-    )
-    return [_task_to_response(t, fn) for t, fn in results]
+async def get_all_tasks(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    note_id: Optional[int] = None,
+    assignee: Optional[str] = None,
+    board_column: Optional[BoardColumn] = None,
+    priority: Optional[Priority] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Tasks newest first; every task unless limit or cursor is given
+
+    Paged requests are keyset-paginated on (created_at, id): when more
+    tasks exist the X-Next-Cursor response header holds the `cursor` for
+    the next page.
+    """
+    # Rows carry their note's filename, so note changes count too
+    if (cached := not_modified(request, response, db, "tasks", "notes")) is not None:
+        return cached
+
+    query = db.query(*_TASK_LIST_COLUMNS, Note.filename).join(Note, Task.note_id == Note.id)
+    if note_id is not None:
+        query = query.filter(Task.note_id == note_id)
+    if assignee:
+        query = query.filter(Task.assignee == assignee)
+    if board_column:
+        query = query.filter(Task.board_column == board_column)
+    if priority:
+        query = query.filter(Task.priority == priority)
+
+    try:
+        rows, next_cursor = keyset_page(query, Task.created_at, Task.id, cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return [_task_to_response(row, row.filename) for row in rows]
 
 
 @router.get("/tasks/note/{note_id}", response_model=List[TaskResponse])
-async def get_tasks_by_note(note_id: int, db: Session = Depends(get_db)):
+async def get_tasks_by_note(note_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    if (cached := not_modified(request, response, db, "tasks", "notes")) is not None:
+        return cached
     tasks = db.query(Task).filter(Task.note_id == note_id).all()
     note = db.query(Note).filter(Note.id == note_id).first()
     fn = note.filename if note else None
@@ -76,16 +167,7 @@ async def create_task(body: TaskCreate, db: Session = Depends(get_db)):
     else:
         note_id = ensure_manual_tasks_note()
 
-    task = Task(
-        note_id=note_id,
-        task=body.task.strip(),
-        deadline=body.deadline,
-        priority=body.priority,
-        assignee=body.assignee.strip() if body.assignee else None,
-        board_column=body.board_column,
-        status="pending",
-    )
-    _sync_completion_fields(task)
+    task = _new_task(body, note_id)
     db.add(task)
     db.commit()
     db.refresh(task)
@@ -93,35 +175,94 @@ async def create_task(body: TaskCreate, db: Session = Depends(get_db)):
     return _task_to_response(task, note.filename if note else None)
 
 
+@router.patch("/tasks/bulk", response_model=TaskBulkResponse)
+async def bulk_update_tasks(body: TaskBulkRequest, db: Session = Depends(get_db)):
+    """
+    Apply many task updates, creates and deletes in one transaction
+
+    Items that can't be applied (unknown task or note) are reported in
+    `errors` and skipped; the rest are committed together. Updated and
+    created tasks come back with their note filenames.
+    """
+    total = len(body.update) + len(body.create) + len(body.delete)
+    if total > TASK_BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {TASK_BULK_MAX_ITEMS} items per request")
+
+    errors: List[TaskBulkError] = []
+    deleting = set(body.delete)
+    task_ids = {item.id for item in body.update} | deleting
+    tasks = {t.id: t for t in db.query(Task).filter(Task.id.in_(task_ids))} if task_ids else {}
+
+    # Resolve notes before any change is flushed: ensure_manual_tasks_note
+    # commits on its own connection and would wait on this session's write lock
+    note_ids = {item.note_id for item in body.create if item.note_id is not None}
+    known_notes = {row.id for row in db.query(Note.id).filter(Note.id.in_(note_ids))} if note_ids else set()
+    manual_note_id = None
+    if any(item.note_id is None for item in body.create):
+        manual_note_id = ensure_manual_tasks_note()
+        known_notes.add(manual_note_id)
+
+    updated_ids: List[int] = []
+    for index, item in enumerate(body.update):
+        task = tasks.get(item.id)
+        if task is None:
+            errors.append(TaskBulkError(op="update", index=index, id=item.id, detail="Task not found"))
+            continue
+        if item.id in deleting:
+            errors.append(TaskBulkError(op="update", index=index, id=item.id, detail="Task is deleted in the same request"))
+            continue
+        _apply_update(task, item)
+        if item.id not in updated_ids:
+            updated_ids.append(item.id)
+
+    created: List[Task] = []
+    for index, item in enumerate(body.create):
+        note_id = item.note_id if item.note_id is not None else manual_note_id
+        if note_id not in known_notes:
+            errors.append(TaskBulkError(op="create", index=index, detail="Note not found"))
+            continue
+        task = _new_task(item, note_id)
+        db.add(task)
+        created.append(task)
+
+    deleted: List[int] = []
+    for index, task_id in enumerate(body.delete):
+        task = tasks.pop(task_id, None)
+        if task is None:
+            if task_id not in deleted:
+                errors.append(TaskBulkError(op="delete", index=index, id=task_id, detail="Task not found"))
+            continue
+        db.delete(task)
+        deleted.append(task_id)
+
+    # Flush for the new ids before commit expires the objects
+    db.flush()
+    created_ids = [task.id for task in created]
+    db.commit()
+
+    rows = {}
+    if updated_ids or created_ids:
+        rows = {
+            row.id: row
+            for row in db.query(*_TASK_LIST_COLUMNS, Note.filename)
+            .join(Note, Task.note_id == Note.id)
+            .filter(Task.id.in_(updated_ids + created_ids))
+        }
+    return TaskBulkResponse(
+        updated=[_task_to_response(rows[i], rows[i].filename) for i in updated_ids],
+        created=[_task_to_response(rows[i], rows[i].filename) for i in created_ids],
+        deleted=deleted,
+        errors=errors,
+    )
+
+
 @router.patch("/tasks/{task_id}", response_model=TaskResponse)
 async def update_task(task_id: int, body: TaskUpdate, db: Session = Depends(get_db)):
     task = db.query(Task).filter(Task.id == task_id).first()
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    if body.task is not None:
-        task.task = body.task.strip()
-    if body.deadline is not None:
-        task.deadline = body.deadline or None
-    if body.priority is not None:
-        task.priority = body.priority
-    if body.assignee is not None:
-        task.assignee = body.assignee.strip() if body.assignee else None
-    if body.position_x is not None:
-        task.position_x = body.position_x
-    if body.position_y is not None:
-        task.position_y = body.position_y
-
-    if body.board_column is not None:
-        task.board_column = body.board_column
-    if body.status is not None:
-        if body.status == "completed":
-            task.board_column = "done"
-        elif body.status == "pending":
-            task.board_column = "todo"
-
-    if body.board_column is not None or body.status is not None:
-        _sync_completion_fields(task)
+    _apply_update(task, body)
 
     db.commit()
     db.refresh(task)
@@ -141,85 +282,36 @@ async def delete_task(task_id: int, db: Session = Depends(get_db)):
 
 @router.get("/tasks/analytics/summary", response_model=TaskAnalyticsSummary)
 async def task_analytics_summary(db: Session = Depends(get_db)):
-    now = datetime.now(timezone.utc)
-    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    seven_ago = day_start - timedelta(days=7)
-
-    tasks = db.query(Task).all()
-    total = len(tasks)
-    done = [t for t in tasks if (t.board_column or "todo") == "done"]
-    completed_count = len(done)
-    active = total - completed_count
-    completion_rate = (completed_count / total * 100.0) if total else 0.0
-
-    def is_overdue(t: Task) -> bool:
-        if (t.board_column or "") == "done" or not t.deadline:
-            return False
-        try:
-            d = datetime.strptime(t.deadline, "%Y-%m-%d").replace(tzinfo=timezone.utc)
-            return d < day_start
-        except ValueError:
-            return False
-
-    overdue_count = sum(1 for t in tasks if is_overdue(t))
-
-    by_assignee: dict[str, dict[str, int]] = {}
-    for t in tasks:
-        key = (t.assignee or "").strip() or "Unassigned"
-        if key not in by_assignee:
-            by_assignee[key] = {"total": 0, "completed": 0}
-        by_assignee[key]["total"] += 1
-        if (t.board_column or "todo") == "done":
-            by_assignee[key]["completed"] += 1
-
-    by_priority: dict[str, int] = {}
-    for t in tasks:
-        p = t.priority or "medium"
-        by_priority[p] = by_priority.get(p, 0) + 1
-
-    by_column: dict[str, int] = {}
-    for t in tasks:
-        c = t.board_column or "todo"
-        by_column[c] = by_column.get(c, 0) + 1
-
-    completed_last_7 = 0
-    created_last_7 = 0
-    def aware(dt: datetime) -> datetime:
-        if dt.tzinfo is None:
-            return dt.replace(tzinfo=timezone.utc)
-        return dt
-
-    for t in tasks:
-        if t.created_at and aware(t.created_at) >= seven_ago:
-            created_last_7 += 1
-        if (
-            (t.board_column or "") == "done"
-            and t.completed_at
-            and aware(t.completed_at) >= seven_ago
-        ):
-            completed_last_7 += 1
-
-    durations: list[float] = []
-    for t in done:
-        if t.completed_at and t.created_at:
-            ca = aware(t.completed_at)
-            cr = aware(t.created_at)
-            delta = (ca - cr).total_seconds() / 86400.0
-            if delta >= 0:
-                durations.append(delta)
-
-    avg_days = sum(durations) / len(durations) if durations else None
-
-    return TaskAnalyticsSummary(
-        total_tasks=total,
-        completed_tasks=completed_count,
-        completion_rate=round(completion_rate, 1),
-        active_tasks=active,
-        overdue_count=overdue_count,
-        by_assignee=by_assignee,
-        by_priority=by_priority,
-        by_column=by_column,
-        completed_last_7_days=completed_last_7,
-        created_last_7_days=created_last_7,
-        avg_days_to_complete=round(avg_days, 2) if avg_days is not None else None,
-    )
+    return TaskAnalyticsSummary(**task_analytics_snapshot(db))
+
+
+@router.get("/tasks/analytics/series", response_model=TaskSeriesResponse)
+async def task_analytics_series(
+    bucket: SeriesBucket = "day",
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    assignee: Optional[str] = None,
+    priority: Optional[Priority] = None,
+    note_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Tasks created / completed, open backlog and average cycle time per day,
+    week or month. end is exclusive; the default range is the last 30 days.
+    """
+    end = end or datetime.now(timezone.utc).date() + timedelta(days=1)
+    start = start or end - timedelta(days=30)
+    try:
+        series = task_series(db, bucket, start, end, assignee=assignee, priority=priority, note_id=note_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return TaskSeriesResponse(**series)
+
+
+@router.post("/tasks/analytics/verify")
+async def verify_task_analytics(repair: bool = False, db: Session = Depends(get_db)):
+    """
+    Recount task analytics from scratch and report drift in the maintained counters
+    (rebuilding them when repair=true)
+    """
+    return verify_task_counters(db, repair=repair)
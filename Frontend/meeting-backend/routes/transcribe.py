@@ -1,110 +1,173 @@
-import os
 import json
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+import uuid
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
-from pathlib import Path
-import shutil
 
 from database import get_db
-from models import Note, Task
-from services import transcribe_audio, generate_summary, extract_tasks, detect_sentiment, detect_language
+from models import LiveAnalysis
+from schemas import LiveAnalysisResponse
+from services import process_recording, job_queue
+from services.live_analysis import live_analysis_snapshot
+from services.live_transcription import LiveTranscription, LiveSizeExceeded
+from services.uploads import UPLOAD_DIR, UploadRejected, StoredUpload, receive_upload
 
 router = APIRouter()
 
-# Ensure upload directory exists
-UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "uploads"))
-UPLOAD_DIR.mkdir(exist_ok=True)
+# The body is streamed by receive_upload rather than declared as an
+# UploadFile parameter (which would spool it first), so describe it here
+_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
 
 
-@router.post("/transcribe")
+@router.post("/transcribe", openapi_extra=_UPLOAD_BODY)
 async def transcribe_meeting(
-    file: UploadFile = File(...),
+    request: Request,
+    background: bool = False,
     db: Session = Depends(get_db)
 ):
     """
     Main endpoint: Upload audio → Whisper transcribe → GPT summarize → Extract tasks → Detect Sentiment + Language → Store in DB
     
     This is the core pipeline that processes meeting recordings.
+    With ?background=true the audio is stored and 202 is returned with a job id
+    right away; poll GET /jobs/{job_id} or stream GET /jobs/{job_id}/events.
+    Recordings are stored under their SHA-256, and anything over
+    UPLOAD_MAX_BYTES is refused with 413.
     """
-    file_path = None
+    # 1. Stream the uploaded audio to disk, hashing it on the way
     try:
-        # 1. Save uploaded audio file
-        file_path = UPLOAD_DIR / file.filename
-        with file_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # 2. Transcribe audio using Whisper API
-        raw_transcript = await transcribe_audio(str(file_path))
-        
-        # 3. Clean transcript (for now, just use raw - can add cleaning later)
-        transcript = raw_transcript.strip()
-        
-        # 4. Generate summary and key points using GPT
-        summary_data = await generate_summary(transcript)
-        summary = summary_data.get("summary", "")
-        key_points = json.dumps(summary_data.get("key_points", []))
-        
-        # 5. Extract tasks using GPT
-        tasks_data = await extract_tasks(transcript)
-        
-        # 6. Detect Sentiment
-        sentiment = await detect_sentiment(transcript)
-
-        # 7. Detect Language
-        language = await detect_language(transcript)
-        
-        # 8. Store note in database
-        note = Note(
-            filename=file.filename,
-            raw_transcript=raw_transcript,
-            transcript=transcript,
-            summary=summary,
-            key_points=key_points,
-            sentiment=sentiment,
-            language=language
-        )
-        db.add(note)
-        db.commit()
-        db.refresh(note)
-        
-        # 7. Store tasks in database
-        created_tasks = []
-        for task_data in tasks_data:
-            task = Task(
-                note_id=note.id,
-                task=task_data.get("task", ""),
-                deadline=task_data.get("deadline"),
-                status="pending",
-                priority="medium",
-                board_column="todo",
-            )
-            db.add(task)
-            created_tasks.append({
-                "task": task.task,
-                "deadline": task.deadline
-            })
-        
-        db.commit()
-        
-        # 8. Optional: Delete audio file after processing (uncomment if needed)
-        # file_path.unlink()
-        
-        # 9. Return complete results
-        return {
+        upload = await receive_upload(request)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    return await process_upload(db, upload, background)
+
+
+async def process_upload(db: Session, upload: StoredUpload, background: bool):
+    """Run a stored recording through the pipeline, or queue it as a job (shared with finalized upload sessions)."""
+    if background:
+        job_id = uuid.uuid4().hex
+        job_queue.submit(job_id, upload.path, upload.filename, audio_hash=upload.audio_hash)
+        return JSONResponse(status_code=202, content={
             "success": True,
-            "note_id": note.id,
-            "filename": note.filename,
-            "transcript": note.transcript,
-            "summary": note.summary,
-            "key_points": json.loads(note.key_points),
-            "tasks": created_tasks,
-            "sentiment": note.sentiment,
-            "language": note.language,
-            "created_at": note.created_at.isoformat()
-        }
-    
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/jobs/{job_id}",
+            "events_url": f"/jobs/{job_id}/events",
+        })
+
+    try:
+        # 2-5. Transcribe (or reuse a cached transcript), analyze and store the note
+        return await process_recording(db, upload.path, upload.filename, audio_hash=upload.audio_hash)
     except Exception as e:
-        # Cleanup file on error
-        if file_path.exists():
-            file_path.unlink()
+        # The stored file is left in place: it is shared with any other
+        # upload of the same bytes, and a retry reuses it
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+
+
+@router.websocket("/transcribe/live")
+async def transcribe_live(websocket: WebSocket):
+    """
+    Live meeting transcription
+
+    Optionally send {"type": "start", "filename", "mime"} first, then the
+    recorder's audio as binary frames. {"type": "segment"} marks the end of
+    a self-contained recording (the client restarts its recorder there);
+    it is transcribed while the meeting goes on and the server sends
+    {"type": "partial", "segment", "text", "transcript"} in segment order,
+    followed (LIVE_ANALYSIS=incremental) by {"type": "analysis", "segments",
+    "summary", "key_points", "tasks"} as the running analysis catches up.
+    {"type": "stop"} ends the meeting: the server reports
+    {"type": "stage", "stage", "status"} for the remaining stages, sends
+    {"type": "note", ...} with the /transcribe payload and closes. A
+    connection dropped without "stop" still becomes a note.
+
+    The first message is {"type": "session", "id"}; GET /transcribe/live/{id}
+    returns the checkpointed running analysis.
+    """
+    await websocket.accept()
+    send_lock = asyncio.Lock()
+    connected = True
+
+    async def send(message: dict) -> None:
+        nonlocal connected
+        if not connected:
+            return
+        async with send_lock:
+            try:
+                await websocket.send_text(json.dumps(message))
+            except Exception:
+                connected = False
+
+    stage_updates = []
+
+    def on_stage(stage: str, status: str) -> None:
+        stage_updates.append(asyncio.create_task(send({"type": "stage", "stage": stage, "status": status})))
+
+    session_id = uuid.uuid4().hex
+    live = LiveTranscription(session_id, UPLOAD_DIR / f"live-{session_id}", send)
+    await send({"type": "session", "id": session_id})
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                connected = False
+                break
+            if message.get("bytes"):
+                await live.append(message["bytes"])
+                continue
+            try:
+                command = json.loads(message.get("text") or "")
+            except ValueError:
+                continue
+            if not isinstance(command, dict):
+                continue
+            if command.get("type") == "start":
+                live.configure(command.get("filename"), command.get("mime"))
+            elif command.get("type") == "segment":
+                await live.end_segment()
+            elif command.get("type") == "stop":
+                break
+    except LiveSizeExceeded as e:
+        await send({"type": "error", "detail": str(e)})
+    except WebSocketDisconnect:
+        connected = False
+
+    try:
+        result = await live.finish(on_stage if connected else None)
+    except Exception as e:
+        print(f"❌ Live transcription failed, audio kept in {live.work_dir}: {e}")
+        result = {"type": "error", "detail": f"Processing failed: {str(e)}"}
+    else:
+        result = {"type": "note", **result} if result else {"type": "error", "detail": "No audio received"}
+    await asyncio.gather(*stage_updates)
+    await send(result)
+    if connected:
+        await websocket.close()
+
+
+@router.get("/transcribe/live/{session_id}", response_model=LiveAnalysisResponse)
+async def get_live_analysis(session_id: str, db: Session = Depends(get_db)):
+    """
+    Running summary, key points and tasks of a live meeting as last checkpointed
+
+    note_id is set once the meeting has ended and its note is stored.
+    """
+    row = db.get(LiveAnalysis, session_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Live session not found")
+    return live_analysis_snapshot(row)
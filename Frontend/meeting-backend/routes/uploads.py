@@ -0,0 +1,97 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from sqlalchemy.orm import Session
+from starlette.requests import ClientDisconnect
+
+from database import get_db
+from schemas import UploadSessionCreate, UploadSessionResponse
+from services.uploads import UploadRejected
+from services.upload_sessions import (
+    create_session, get_session, session_status, write_chunk, finalize_session, discard_session,
+)
+from .transcribe import process_upload
+
+router = APIRouter()
+
+# Chunk bodies are raw bytes streamed straight to disk
+_CHUNK_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}},
+    }
+}
+
+
+@router.post("/uploads", response_model=UploadSessionResponse, status_code=201)
+async def create_upload(payload: UploadSessionCreate, db: Session = Depends(get_db)):
+    """
+    Start a resumable upload of a recording
+
+    Then PUT /uploads/{id} byte ranges (in any order, several at once),
+    GET /uploads/{id} after an interruption to see what is still missing,
+    and POST /uploads/{id}/finalize to run it through /transcribe. Sessions
+    without a chunk for UPLOAD_SESSION_TTL_HOURS expire.
+    """
+    try:
+        session = create_session(db, payload.filename, payload.size, payload.sha256)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return session_status(db, session)
+
+
+@router.put("/uploads/{upload_id}", response_model=UploadSessionResponse, openapi_extra=_CHUNK_BODY)
+async def upload_chunk(
+    upload_id: str,
+    request: Request,
+    content_range: Optional[str] = Header(None),
+    x_chunk_sha256: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Write one chunk, given as "Content-Range: bytes <first>-<last>/<total>"
+
+    The bytes are written in place at their offset. With X-Chunk-SHA256 the
+    chunk is refused (400, send it again) unless it arrived intact.
+    """
+    try:
+        session = get_session(db, upload_id)
+        return await write_chunk(db, session, content_range, request.stream(), x_chunk_sha256)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except ClientDisconnect:
+        raise HTTPException(status_code=400, detail="Chunk interrupted")
+
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload(upload_id: str, db: Session = Depends(get_db)):
+    """Where to resume: offset (the unbroken prefix received) and the missing ranges."""
+    try:
+        return session_status(db, get_session(db, upload_id))
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+
+@router.post("/uploads/{upload_id}/finalize")
+async def finalize_upload(upload_id: str, background: bool = False, db: Session = Depends(get_db)):
+    """
+    Verify a complete upload and process it exactly like POST /transcribe
+    (with ?background=true, 202 and a job id)
+
+    409 while ranges are missing; 422 if the assembled file fails its
+    integrity check.
+    """
+    try:
+        upload = await finalize_session(db, get_session(db, upload_id))
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return await process_upload(db, upload, background)
+
+
+@router.delete("/uploads/{upload_id}")
+async def delete_upload(upload_id: str, db: Session = Depends(get_db)):
+    """Abandon an upload and free its space."""
+    try:
+        await discard_session(db, get_session(db, upload_id))
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return {"success": True, "message": "Upload discarded"}
@@ -1,31 +1,127 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
 
 from database import get_db
-from models import WhiteboardState
-from schemas import WhiteboardResponse, WhiteboardSave
+from models.whiteboard import decompress_xml
+from schemas import WhiteboardResponse, WhiteboardSave, WhiteboardPatch, WhiteboardSaved, WhiteboardRevisionInfo
+from services.conditional import not_modified
+from services.whiteboard import (
+    WHITEBOARD_ROW_ID, RevisionConflict, load_whiteboard, save_whiteboard_xml, whiteboard_revisions,
+    whiteboard_at_revision,
+)
+from services.whiteboard_hub import whiteboard_hub
 
 router = APIRouter()
 
-WHITEBOARD_ROW_ID = 1
+
+def _if_match_revision(request: Request) -> Optional[int]:
+    """Revision named by If-Match ("12", 12 or W/"12"); None when absent or '*'."""
+    value = request.headers.get("if-match")
+    if not value or value.strip() == "*":
+        return None
+    try:
+        return int(value.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be a whiteboard revision number")
+
+
+async def _save(db: Session, **kwargs) -> WhiteboardSaved:
+    # Live WebSocket edits are written first so If-Match sees the latest
+    # revision, and connected clients are resynced with the result
+    try:
+        saved = await whiteboard_hub.save_over(WHITEBOARD_ROW_ID, lambda: save_whiteboard_xml(db, **kwargs))
+    except RevisionConflict as e:
+        raise HTTPException(status_code=412, detail={"message": str(e), "revision": e.current})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return WhiteboardSaved(**saved)
 
 
 @router.get("/whiteboard", response_model=WhiteboardResponse)
-async def get_whiteboard(db: Session = Depends(get_db)):
-    row = db.query(WhiteboardState).filter(WhiteboardState.id == WHITEBOARD_ROW_ID).first()
+async def get_whiteboard(request: Request, response: Response, db: Session = Depends(get_db)):
+    await whiteboard_hub.flush(WHITEBOARD_ROW_ID)
+    if (cached := not_modified(request, response, db, "whiteboard")) is not None:
+        return cached
+    row = load_whiteboard(db)
     if not row:
-        return WhiteboardResponse(diagram_xml="", updated_at=None)
-    return WhiteboardResponse(diagram_xml=row.diagram_xml or "", updated_at=row.updated_at)
+        return WhiteboardResponse(diagram_xml="", revision=0, updated_at=None)
+    return WhiteboardResponse(diagram_xml=decompress_xml(row.diagram_gz), revision=row.revision, updated_at=row.updated_at)
 
 
-@router.put("/whiteboard", response_model=WhiteboardResponse)
-async def save_whiteboard(body: WhiteboardSave, db: Session = Depends(get_db)):
-    row = db.query(WhiteboardState).filter(WhiteboardState.id == WHITEBOARD_ROW_ID).first()
-    if not row:
-        row = WhiteboardState(id=WHITEBOARD_ROW_ID, diagram_xml=body.diagram_xml)
-        db.add(row)
-    else:
-        row.diagram_xml = body.diagram_xml
-    db.commit()
-    db.refresh(row)
-    return WhiteboardResponse(diagram_xml=row.diagram_xml, updated_at=row.updated_at)
+@router.put("/whiteboard", response_model=WhiteboardSaved)
+async def save_whiteboard(body: WhiteboardSave, request: Request, db: Session = Depends(get_db)):
+    """
+    Replace the whole diagram
+
+    With `If-Match: "<revision>"` the save is refused with 412 unless that
+    is still the current revision.
+    """
+    return await _save(db, xml=body.diagram_xml, base_revision=_if_match_revision(request))
+
+
+@router.patch("/whiteboard", response_model=WhiteboardSaved)
+async def patch_whiteboard(body: WhiteboardPatch, request: Request, db: Session = Depends(get_db)):
+    """
+    Apply splice edits to the current diagram
+
+    Edits are positional, so `If-Match: "<revision>"` naming the revision
+    they were computed against is required (428 without it, 412 if stale).
+    """
+    base_revision = _if_match_revision(request)
+    if base_revision is None:
+        raise HTTPException(status_code=428, detail="If-Match with the base revision is required")
+    return await _save(db, edits=[e.model_dump() for e in body.edits], base_revision=base_revision)
+
+
+@router.get("/whiteboard/revisions", response_model=List[WhiteboardRevisionInfo])
+async def list_whiteboard_revisions(db: Session = Depends(get_db)):
+    return [WhiteboardRevisionInfo(**r._mapping) for r in whiteboard_revisions(db)]
+
+
+@router.get("/whiteboard/revisions/{revision}", response_model=WhiteboardResponse)
+async def get_whiteboard_revision(revision: int, db: Session = Depends(get_db)):
+    xml = whiteboard_at_revision(db, revision)
+    if xml is None:
+        raise HTTPException(status_code=404, detail="Revision not in history")
+    return WhiteboardResponse(diagram_xml=xml, revision=revision)
+
+
+@router.post("/whiteboard/revisions/{revision}/restore", response_model=WhiteboardSaved)
+async def restore_whiteboard_revision(revision: int, request: Request, db: Session = Depends(get_db)):
+    """Save a past revision's diagram as a new revision (If-Match honoured as for PUT)."""
+    xml = whiteboard_at_revision(db, revision)
+    if xml is None:
+        raise HTTPException(status_code=404, detail="Revision not in history")
+    return await _save(db, xml=xml, base_revision=_if_match_revision(request))
+
+
+@router.websocket("/whiteboard/ws")
+async def whiteboard_socket(websocket: WebSocket):
+    """
+    Live collaborative editing
+
+    The server first sends {"type": "snapshot", "revision", "xml", "deltas"}:
+    the saved diagram plus the edits made since, to be applied in order.
+    Clients send {"type": "edit", "base": <revision>, "edits": [...], "id"};
+    every client, the sender included, then receives
+    {"type": "edit", "revision", "edits", "client", "id"}. An edit based on
+    a stale revision gets {"type": "reject", "id", "revision"}.
+    """
+    await websocket.accept()
+    client = await whiteboard_hub.join(WHITEBOARD_ROW_ID, websocket)
+    try:
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+            except ValueError:
+                continue
+            if isinstance(message, dict) and message.get("type") == "edit":
+                await whiteboard_hub.edit(WHITEBOARD_ROW_ID, client, message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await whiteboard_hub.leave(WHITEBOARD_ROW_ID, client)
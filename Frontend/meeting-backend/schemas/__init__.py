@@ -1,7 +1,14 @@
 # schemas/__init__.py
 from .note import NoteCreate, NoteResponse, NoteListResponse
-from .task import TaskCreate, TaskResponse, TaskUpdate, TaskAnalyticsSummary
-from .whiteboard import WhiteboardResponse, WhiteboardSave
+from .task import (
+    TaskCreate, TaskResponse, TaskUpdate, TaskAnalyticsSummary,
+    TaskBulkUpdateItem, TaskBulkRequest, TaskBulkError, TaskBulkResponse,
+    TaskSeriesPoint, TaskSeriesResponse,
+)
+from .whiteboard import WhiteboardResponse, WhiteboardSave, WhiteboardEdit, WhiteboardPatch, WhiteboardSaved, WhiteboardRevisionInfo
+from .job import JobResponse, LiveAnalysisResponse
+from .upload import UploadSessionCreate, UploadSessionResponse
+from .translation import TranslationBatchRequest, TranslationBatchResponse, NoteTranslation
 
 __all__ = [
     "NoteCreate",
@@ -11,6 +18,23 @@ __all__ = [
     "TaskResponse",
     "TaskUpdate",
     "TaskAnalyticsSummary",
+    "TaskBulkUpdateItem",
+    "TaskBulkRequest",
+    "TaskBulkError",
+    "TaskBulkResponse",
+    "TaskSeriesPoint",
+    "TaskSeriesResponse",
     "WhiteboardResponse",
     "WhiteboardSave",
+    "WhiteboardEdit",
+    "WhiteboardPatch",
+    "WhiteboardSaved",
+    "WhiteboardRevisionInfo",
+    "JobResponse",
+    "LiveAnalysisResponse",
+    "UploadSessionCreate",
+    "UploadSessionResponse",
+    "TranslationBatchRequest",
+    "TranslationBatchResponse",
+    "NoteTranslation",
 ]
@@ -0,0 +1,34 @@
+from typing import Any, Optional
+
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class JobResponse(BaseModel):
+    """Status of a background /transcribe job, stage by stage."""
+
+    id: str
+    status: str
+    stages: dict[str, str]
+    filename: str
+    note_id: Optional[int] = None
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class LiveAnalysisResponse(BaseModel):
+    """Checkpointed running analysis of a live meeting."""
+
+    id: str
+    filename: str
+    segments: int
+    summary: str
+    key_points: list[str]
+    tasks: list[dict[str, Any]]
+    prompt_tokens: int
+    completion_tokens: int
+    note_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
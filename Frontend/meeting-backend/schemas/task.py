@@ -1,9 +1,10 @@
 from pydantic import BaseModel, Field
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, Literal
 
 BoardColumn = Literal["backlog", "todo", "in_progress", "done"]
 Priority = Literal["low", "medium", "high", "urgent"]
+SeriesBucket = Literal["day", "week", "month"]
 
 
 class TaskCreate(BaseModel):
@@ -47,6 +48,32 @@ class TaskUpdate(BaseModel):
     position_y: Optional[float] = None
 
 
+class TaskBulkUpdateItem(TaskUpdate):
+    id: int
+
+
+class TaskBulkRequest(BaseModel):
+    """Updates, creates and deletes applied together in one transaction."""
+
+    update: list[TaskBulkUpdateItem] = []
+    create: list[TaskCreate] = []
+    delete: list[int] = []
+
+
+class TaskBulkError(BaseModel):
+    op: Literal["update", "create", "delete"]
+    index: int  # position in the request's list for that op
+    id: Optional[int] = None
+    detail: str
+
+
+class TaskBulkResponse(BaseModel):
+    updated: list[TaskResponse]
+    created: list[TaskResponse]
+    deleted: list[int]
+    errors: list[TaskBulkError]
+
+
 class TaskAnalyticsSummary(BaseModel):
     total_tasks: int
     completed_tasks: int
@@ -59,3 +86,20 @@ class TaskAnalyticsSummary(BaseModel):
     completed_last_7_days: int
     created_last_7_days: int
     avg_days_to_complete: Optional[float]
+
+
+class TaskSeriesPoint(BaseModel):
+    bucket_start: date
+    created: int
+    completed: int
+    backlog: int  # open tasks at the end of the bucket
+    avg_cycle_days: Optional[float] = None  # created -> completed, for tasks completed in the bucket
+
+
+class TaskSeriesResponse(BaseModel):
+    """Throughput / burndown series; weeks start on Monday, all dates UTC."""
+
+    bucket: SeriesBucket
+    start: date
+    end: date  # exclusive
+    points: list[TaskSeriesPoint]
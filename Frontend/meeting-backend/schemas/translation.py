@@ -0,0 +1,22 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class TranslationBatchRequest(BaseModel):
+    """Languages to translate a note's summary and key points into."""
+
+    target_languages: List[str] = Field(..., min_length=1, max_length=10)
+
+
+class NoteTranslation(BaseModel):
+    summary: str
+    key_points: List[str]
+
+
+class TranslationBatchResponse(BaseModel):
+    note_id: int
+    original_language: str
+    translations: dict[str, NoteTranslation]
+    cached_languages: List[str]
+    translated_languages: List[str]
@@ -0,0 +1,26 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class UploadSessionCreate(BaseModel):
+    """Start a resumable upload; sha256 of the whole recording is optional but checked when given."""
+
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: int = Field(..., gt=0)
+    sha256: Optional[str] = None
+
+
+class UploadSessionResponse(BaseModel):
+    """Progress of a resumable upload; missing holds [start, end) byte ranges still needed."""
+
+    id: str
+    filename: str
+    size: int
+    offset: int
+    received: int
+    missing: list[list[int]]
+    status: str
+    chunk_size: int
+    expires_at: Optional[datetime] = None
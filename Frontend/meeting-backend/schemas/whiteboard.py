@@ -1,13 +1,41 @@
-from typing import Optional
+from typing import List, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 
 class WhiteboardResponse(BaseModel):
     diagram_xml: str
+    revision: int = 0
     updated_at: Optional[datetime] = None
 
 
 class WhiteboardSave(BaseModel):
     diagram_xml: str
+
+
+class WhiteboardEdit(BaseModel):
+    """Replace `delete` characters at `at` with `insert`; offsets are UTF-16 code units, as in JavaScript strings."""
+
+    at: int = Field(..., ge=0)
+    delete: int = Field(0, ge=0)
+    insert: str = ""
+
+
+class WhiteboardPatch(BaseModel):
+    """Edits applied in order, each to the result of the previous one."""
+
+    edits: List[WhiteboardEdit]
+
+
+class WhiteboardSaved(BaseModel):
+    revision: int
+    size: int  # characters of XML stored
+    updated_at: Optional[datetime] = None
+
+
+class WhiteboardRevisionInfo(BaseModel):
+    revision: int
+    kind: Literal["snapshot", "delta"]
+    size: int
+    created_at: Optional[datetime] = None
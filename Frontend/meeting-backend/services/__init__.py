@@ -1,13 +1,38 @@
 # services/__init__.py
+from . import metrics
 from .whisper_service import transcribe_audio
-from .gpt_service import generate_summary, extract_tasks, process_voice_command, detect_sentiment, detect_language, translate_text
+from .gpt_service import generate_summary, extract_tasks, process_voice_command, stream_voice_command, detect_sentiment, detect_language, translate_text, translate_note_batch, analyze_transcript, analyze_transcript_combined
+from .pipeline import process_recording, analyze_and_store
+from .job_queue import job_queue, job_snapshot
+from .transcript_cache import get_cached_transcript, store_transcript, transcript_cache_size
+from .translations import translate_summary, translate_note, schedule_pretranslation
+from .retrieval import voice_command_excerpts, invalidate_note_index
+from .search import full_text_search
 
 __all__ = [
+    "metrics",
     "transcribe_audio",
     "generate_summary",
     "extract_tasks",
     "process_voice_command",
+    "stream_voice_command",
     "detect_sentiment",
     "detect_language",
     "translate_text",
+    "translate_note_batch",
+    "analyze_transcript",
+    "analyze_transcript_combined",
+    "process_recording",
+    "analyze_and_store",
+    "job_queue",
+    "job_snapshot",
+    "get_cached_transcript",
+    "store_transcript",
+    "transcript_cache_size",
+    "translate_summary",
+    "translate_note",
+    "schedule_pretranslation",
+    "voice_command_excerpts",
+    "invalidate_note_index",
+    "full_text_search",
 ]
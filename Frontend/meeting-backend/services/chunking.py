@@ -0,0 +1,61 @@
+import math
+import re
+from typing import List
+
+# Rough tokens-per-character ratio for GPT tokenizers on English-like text;
+# good enough to decide between single-pass and map-reduce
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?।])\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (no tokenizer dependency)."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_END.split(text) if s.strip()]
+
+
+def _split_long_sentence(sentence: str, max_tokens: int) -> List[str]:
+    """Break a single over-long sentence on word boundaries."""
+    pieces, current = [], []
+    for word in sentence.split():
+        if current and estimate_tokens(" ".join(current + [word])) > max_tokens:
+            pieces.append(" ".join(current))
+            current = []
+        current.append(word)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def chunk_transcript(text: str, max_tokens: int) -> List[str]:
+    """
+    Split a transcript into chunks of at most ~max_tokens on sentence boundaries
+
+    Args:
+        text: The transcript text
+        max_tokens: Estimated token budget per chunk
+
+    Returns:
+        Chunks in transcript order
+    """
+    chunks, current, current_tokens = [], [], 0
+    for sentence in split_sentences(text):
+        tokens = estimate_tokens(sentence) + 1
+        if tokens > max_tokens:
+            if current:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            chunks.extend(_split_long_sentence(sentence, max_tokens))
+            continue
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append(" ".join(current))
+            current, current_tokens = [], 0
+        current.append(sentence)
+        current_tokens += tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
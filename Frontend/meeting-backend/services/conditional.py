@@ -0,0 +1,72 @@
+import hashlib
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from database import IS_SQLITE
+from models import ResourceVersion
+from . import metrics
+
+metrics.describe("http_not_modified_total", "Conditional GETs answered 304 from resource versions")
+
+
+def resource_etag(db: Session, *resources: str, variant: str = "") -> Optional[str]:
+    """
+    Strong ETag for the current versions of one or more resources
+
+    Args:
+        db: Database session
+        resources: resource_versions names the response is built from
+        variant: Anything else the representation depends on (path, query string)
+
+    Returns:
+        Quoted ETag, or None when versions aren't tracked (non-SQLite
+        database, or migrations not yet applied)
+    """
+    if not IS_SQLITE:
+        return None
+    versions = dict(
+        db.query(ResourceVersion.name, ResourceVersion.version).filter(ResourceVersion.name.in_(resources)).all()
+    )
+    if len(versions) != len(resources):
+        return None
+    tag = "-".join(f"{name}.{versions[name]}" for name in resources)
+    if variant:
+        tag += "-" + hashlib.sha1(variant.encode("utf-8")).hexdigest()[:12]
+    return f'"{tag}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison, so a W/ prefix still matches
+    candidates = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def not_modified(request: Request, response: Response, db: Session, *resources: str) -> Optional[Response]:
+    """
+    Tag a GET response with an ETag and answer If-None-Match
+
+    Versions are read before the route runs its query, so a write landing
+    in between only ever makes the tag older than the body, never newer.
+
+    Args:
+        request: Incoming request (path and query string vary the tag)
+        response: The route's response, which receives ETag / Cache-Control
+        db: Database session
+        resources: resource_versions names the response is built from
+
+    Returns:
+        A 304 response to return as-is, or None to build the full response
+    """
+    etag = resource_etag(db, *resources, variant=f"{request.url.path}?{request.url.query}")
+    if etag is None:
+        return None
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _matches(request.headers.get("if-none-match"), etag):
+        metrics.inc("http_not_modified_total")
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,25 +1,141 @@
 import os
+import re
 import json
-from openai import OpenAI
+import asyncio
+import copy
+import time
+from datetime import datetime
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
-from typing import Dict, List
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from . import llm_cache, metrics
+from .chunking import CHARS_PER_TOKEN, estimate_tokens, chunk_transcript
 
 load_dotenv()
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Initialize OpenAI client (async, so completions never block the event loop)
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+GPT_MODEL = "gpt-4o-mini"
+
+# Upper bound for a single post-transcription analysis stage, in seconds
+GPT_STAGE_TIMEOUT = float(os.getenv("GPT_STAGE_TIMEOUT", "60"))
+
+SENTIMENTS = ["Positive", "Neutral", "Tense", "Urgent"]
+
+# Transcripts estimated above this many tokens use map-reduce summary/task extraction
+MAP_REDUCE_THRESHOLD_TOKENS = int(os.getenv("MAP_REDUCE_THRESHOLD_TOKENS", "12000"))
+# Estimated token budget of each map-step chunk
+MAP_REDUCE_CHUNK_TOKENS = int(os.getenv("MAP_REDUCE_CHUNK_TOKENS", "4000"))
+# Map-step completions in flight at once, per map-reduce pass (each long
+# transcript's summary and task extraction run one pass apiece)
+MAP_REDUCE_CONCURRENCY = max(1, int(os.getenv("MAP_REDUCE_CONCURRENCY", "4")))
+
+# Bounds on the running state of incremental (live) analysis, so each update
+# prompt stays the same size however long the meeting runs
+LIVE_SUMMARY_WORDS = int(os.getenv("LIVE_SUMMARY_WORDS", "150"))
+LIVE_MAX_KEY_POINTS = int(os.getenv("LIVE_MAX_KEY_POINTS", "12"))
+# Most recent action items shown to the model; older ones are still de-duplicated locally
+LIVE_PROMPT_TASKS = int(os.getenv("LIVE_PROMPT_TASKS", "40"))
+# Transcript excerpt (start and end) the final pass reads for tone and language
+LIVE_RECONCILE_EXCERPT_TOKENS = int(os.getenv("LIVE_RECONCILE_EXCERPT_TOKENS", "1000"))
+
+metrics.describe("voice_command_ttft_seconds", "Time from request to first streamed voice command token")
+metrics.describe("voice_command_stream_cancelled_total", "Streamed voice commands abandoned before completion")
+
+# Bump a template's version whenever its prompt changes so cached answers
+# produced by the old wording are no longer served
+PROMPT_VERSIONS = {
+    "summary": "v1",
+    "tasks": "v1",
+    "sentiment": "v1",
+    "language": "v1",
+    "voice_command": "v1",
+    "translate": "v1",
+    "translate_batch": "v1",
+    "combined": "v1",
+    "summary_reduce": "v1",
+    "rolling_update": "v1",
+    "rolling_reconcile": "v1",
+}
+
+
+def _log_usage(label: str, response, totals: Optional[Dict[str, int]] = None) -> None:
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        print(f"📊 {label}: {usage.prompt_tokens} prompt + {usage.completion_tokens} completion tokens")
+        if totals is not None:
+            totals["prompt_tokens"] = totals.get("prompt_tokens", 0) + usage.prompt_tokens
+            totals["completion_tokens"] = totals.get("completion_tokens", 0) + usage.completion_tokens
+
+
+async def _complete(
+    template: str,
+    messages: List[Dict[str, str]],
+    label: str,
+    temperature: Optional[float] = None,
+    response_format: Optional[dict] = None,
+    cacheable: bool = False,
+    bypass_cache: bool = False,
+    parse: Optional[Callable[[str], Any]] = None,
+    usage: Optional[Dict[str, int]] = None,
+) -> Any:
+    """
+    Run a chat completion through the response cache
+
+    Only deterministic requests (temperature 0, or cacheable=True) are cached.
+    When parse is given, its result is returned and the raw completion is
+    cached only if parsing succeeded. Tokens spent are added to usage
+    ('prompt_tokens' / 'completion_tokens') when it is given.
+    """
+    key = None
+    if llm_cache.LLM_CACHE_ENABLED and not bypass_cache and (temperature == 0 or cacheable):
+        version = f"{template}.{PROMPT_VERSIONS[template]}"
+        key = llm_cache.make_key(GPT_MODEL, version, temperature, messages, response_format)
+        cached = await llm_cache.lookup(key)
+        if cached is not None:
+            try:
+                return parse(cached) if parse else cached
+            except Exception:
+                pass
+
+    options = {}
+    if temperature is not None:
+        options["temperature"] = temperature
+    if response_format is not None:
+        options["response_format"] = response_format
+    response = await client.chat.completions.create(model=GPT_MODEL, messages=messages, **options)
+    _log_usage(label, response, usage)
+
+    content = response.choices[0].message.content
+    result = parse(content) if parse else content
+    if key:
+        await llm_cache.store(key, GPT_MODEL, f"{template}.{PROMPT_VERSIONS[template]}", content)
+    return result
 
 
-async def generate_summary(transcript: str) -> Dict[str, any]:
+async def generate_summary(transcript: str, bypass_cache: bool = False) -> Dict[str, any]:
     """
     Generate summary and key points from transcript using GPT
     
+    Transcripts estimated above MAP_REDUCE_THRESHOLD_TOKENS are summarized
+    chunk by chunk and the partial summaries merged (map-reduce).
+    
     Args:
         transcript: The meeting transcript text
+        bypass_cache: Skip the response cache for this call
         
     Returns:
         Dictionary with 'summary' and 'key_points' (list)
     """
+    if estimate_tokens(transcript) > MAP_REDUCE_THRESHOLD_TOKENS:
+        return await _map_reduce_summary(transcript, bypass_cache)
+    return await _summarize_single(transcript, bypass_cache)
+
+
+async def _summarize_single(transcript: str, bypass_cache: bool = False) -> Dict[str, any]:
+    """Single-pass summary of a transcript that fits in one prompt."""
     try:
         prompt = f"""You are an AI assistant that analyzes meeting transcripts.
 
@@ -37,32 +153,45 @@ Respond in JSON format:
 }}
 """
         
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        result = await _complete(
+            "summary",
+            [
                 {"role": "system", "content": "You are a helpful assistant that analyzes meeting transcripts and returns structured JSON."},
                 {"role": "user", "content": prompt}
             ],
-            response_format={"type": "json_object"}
+            "Summary",
+            response_format={"type": "json_object"},
+            cacheable=True,
+            bypass_cache=bypass_cache,
+            parse=json.loads,
         )
-        
-        result = json.loads(response.choices[0].message.content)
         return result
     
     except Exception as e:
         raise Exception(f"GPT summarization failed: {str(e)}")
 
 
-async def extract_tasks(transcript: str) -> List[Dict[str, str]]:
+async def extract_tasks(transcript: str, bypass_cache: bool = False) -> List[Dict[str, str]]:
     """
     Extract action items and tasks from transcript using GPT
     
+    Transcripts estimated above MAP_REDUCE_THRESHOLD_TOKENS are processed
+    chunk by chunk and the resulting tasks de-duplicated (map-reduce).
+    
     Args:
         transcript: The meeting transcript text
+        bypass_cache: Skip the response cache for this call
         
     Returns:
         List of tasks with deadlines in ISO format (YYYY-MM-DD)
     """
+    if estimate_tokens(transcript) > MAP_REDUCE_THRESHOLD_TOKENS:
+        return await _map_reduce_tasks(transcript, bypass_cache)
+    return await _extract_tasks_single(transcript, bypass_cache)
+
+
+async def _extract_tasks_single(transcript: str, bypass_cache: bool = False) -> List[Dict[str, str]]:
+    """Single-pass task extraction for a transcript that fits in one prompt."""
     try:
         prompt = f"""You are an AI assistant that extracts action items from meeting transcripts.
 
@@ -86,28 +215,144 @@ Respond in JSON format:
 If no tasks are found, return an empty tasks array.
 """
         
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        result = await _complete(
+            "tasks",
+            [
                 {"role": "system", "content": "You are a helpful assistant that extracts tasks from meeting transcripts and returns structured JSON with ISO date format."},
                 {"role": "user", "content": prompt}
             ],
-            response_format={"type": "json_object"}
+            "Task extraction",
+            response_format={"type": "json_object"},
+            cacheable=True,
+            bypass_cache=bypass_cache,
+            parse=json.loads,
         )
-        
-        result = json.loads(response.choices[0].message.content)
         return result.get("tasks", [])
     
     except Exception as e:
         raise Exception(f"GPT task extraction failed: {str(e)}")
 
 
-async def detect_sentiment(transcript: str) -> str:
+async def _map_chunks(transcript: str, worker) -> List[any]:
+    """
+    Run worker over each transcript chunk concurrently, bounded by MAP_REDUCE_CONCURRENCY
+
+    Each chunk gets GPT_STAGE_TIMEOUT once it holds a slot. Chunks that fail
+    or time out are left out of the result; only if every chunk fails is
+    the first error raised.
+    """
+    chunks = chunk_transcript(transcript, MAP_REDUCE_CHUNK_TOKENS)
+    print(f"🧩 Map-reduce over {len(chunks)} chunks (~{estimate_tokens(transcript)} tokens)")
+    semaphore = asyncio.Semaphore(MAP_REDUCE_CONCURRENCY)
+
+    async def run(chunk: str):
+        async with semaphore:
+            return await asyncio.wait_for(worker(chunk), GPT_STAGE_TIMEOUT)
+
+    results = await asyncio.gather(*(run(chunk) for chunk in chunks), return_exceptions=True)
+    failures = [r for r in results if isinstance(r, BaseException)]
+    if len(failures) == len(results):
+        raise failures[0]
+    if failures:
+        print(f"⚠️ Map-reduce dropped {len(failures)} of {len(results)} chunks: {failures[0]!r}")
+    return [r for r in results if not isinstance(r, BaseException)]
+
+
+def _stage_timeout(name: str, transcript: str, timeout: float) -> float:
+    """Overall bound for a stage; map-reduce stages get one timeout per wave of chunks plus the reduce."""
+    if name not in ("summary", "tasks") or estimate_tokens(transcript) <= MAP_REDUCE_THRESHOLD_TOKENS:
+        return timeout
+    chunks = len(chunk_transcript(transcript, MAP_REDUCE_CHUNK_TOKENS))
+    waves = -(-chunks // MAP_REDUCE_CONCURRENCY)
+    return timeout * (waves + 1)
+
+
+async def _map_reduce_summary(transcript: str, bypass_cache: bool = False) -> Dict[str, any]:
+    partials = await _map_chunks(transcript, lambda chunk: _summarize_single(chunk, bypass_cache))
+    sections = "\n\n".join(
+        f"Part {i}:\nSummary: {p.get('summary', '')}\nKey points: {json.dumps(p.get('key_points', []), ensure_ascii=False)}"
+        for i, p in enumerate(partials, start=1)
+    )
+    prompt = f"""You are an AI assistant that analyzes meeting transcripts.
+
+The following are summaries of consecutive parts of one long meeting, in order.
+Combine them into:
+1. A concise summary of the whole meeting (2-3 sentences)
+2. The key points of the whole meeting (as a list, merging duplicates)
+
+{sections}
+
+Respond in JSON format:
+{{
+  "summary": "Brief summary here",
+  "key_points": ["Point 1", "Point 2", "Point 3"]
+}}
+"""
+
+    try:
+        return await _complete(
+            "summary_reduce",
+            [
+                {"role": "system", "content": "You are a helpful assistant that analyzes meeting transcripts and returns structured JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            "Summary reduce",
+            response_format={"type": "json_object"},
+            cacheable=True,
+            bypass_cache=bypass_cache,
+            parse=json.loads,
+        )
+    except Exception as e:
+        raise Exception(f"GPT summarization failed: {str(e)}")
+
+
+_TASK_WORD = re.compile(r"\w+")
+
+
+def _task_words(task: str) -> set:
+    return set(_TASK_WORD.findall(task.lower()))
+
+
+def merge_tasks(task_lists: List[List[Dict[str, str]]], similarity: float = 0.8) -> List[Dict[str, str]]:
+    """
+    Concatenate per-chunk task lists, dropping near-duplicates
+
+    Two tasks are duplicates when their word sets overlap by at least
+    `similarity` (Jaccard). The first occurrence is kept, picking up a
+    deadline from a later duplicate if it had none.
+    """
+    merged: List[Dict[str, str]] = []
+    seen: List[set] = []
+    for tasks in task_lists:
+        for task in tasks:
+            text = (task.get("task") or "").strip()
+            if not text:
+                continue
+            words = _task_words(text)
+            for i, other in enumerate(seen):
+                union = words | other
+                if union and len(words & other) / len(union) >= similarity:
+                    if not merged[i].get("deadline") and task.get("deadline"):
+                        merged[i]["deadline"] = task["deadline"]
+                    break
+            else:
+                merged.append({"task": text, "deadline": task.get("deadline")})
+                seen.append(words)
+    return merged
+
+
+async def _map_reduce_tasks(transcript: str, bypass_cache: bool = False) -> List[Dict[str, str]]:
+    task_lists = await _map_chunks(transcript, lambda chunk: _extract_tasks_single(chunk, bypass_cache))
+    return merge_tasks(task_lists)
+
+
+async def detect_sentiment(transcript: str, bypass_cache: bool = False) -> str:
     """
     Detect the overall tone of the meeting transcript
     
     Args:
         transcript: The meeting transcript text
+        bypass_cache: Skip the response cache for this call
         
     Returns:
         One of: Positive, Neutral, Tense, Urgent
@@ -139,15 +384,17 @@ Transcript:
 """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0
+        content = await _complete(
+            "sentiment",
+            [{"role": "user", "content": prompt}],
+            "Sentiment",
+            temperature=0,
+            bypass_cache=bypass_cache,
         )
 
-        sentiment = response.choices[0].message.content.strip()
+        sentiment = content.strip()
 
-        if sentiment not in ["Positive", "Neutral", "Tense", "Urgent"]:
+        if sentiment not in SENTIMENTS:
             return "Neutral"
 
         return sentiment
@@ -156,48 +403,137 @@ Transcript:
         return "Neutral"
 
 
-async def process_voice_command(command: str, transcript: str) -> str:
+def _voice_command_prompt(command: str, transcript: str, excerpts: Optional[List[str]] = None, summary: Optional[str] = None) -> str:
+    if excerpts is None:
+        return f"""You are an AI assistant helping a user interact with their meeting notes.
+
+Meeting Transcript:
+{transcript}
+
+User Command: {command}
+
+Provide a helpful, concise response to the user's command based on the meeting transcript.
+"""
+    passages = "\n...\n".join(excerpts)
+    return f"""You are an AI assistant helping a user interact with their meeting notes.
+
+Meeting Summary:
+{summary or "(no summary available)"}
+
+Relevant Transcript Excerpts (in meeting order):
+{passages}
+
+User Command: {command}
+
+Provide a helpful, concise response to the user's command based on the meeting summary and transcript excerpts.
+"""
+
+
+async def process_voice_command(
+    command: str,
+    transcript: str,
+    bypass_cache: bool = False,
+    excerpts: Optional[List[str]] = None,
+    summary: Optional[str] = None,
+) -> str:
     """
     Process voice command using stored transcript context
     
     Args:
         command: The user's voice command
         transcript: The stored meeting transcript for context
+        bypass_cache: Skip the response cache for this call
+        excerpts: Retrieved transcript passages; when given they (plus the
+            summary) are sent instead of the full transcript
+        summary: The note summary, used alongside excerpts
         
     Returns:
         AI-generated response to the command
     """
     try:
-        prompt = f"""You are an AI assistant helping a user interact with their meeting notes.
-
-Meeting Transcript:
-{transcript}
-
-User Command: {command}
-
-Provide a helpful, concise response to the user's command based on the meeting transcript.
-"""
+        prompt = _voice_command_prompt(command, transcript, excerpts, summary)
         
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        return await _complete(
+            "voice_command",
+            [
                 {"role": "system", "content": "You are a helpful assistant that answers questions about meeting transcripts."},
                 {"role": "user", "content": prompt}
-            ]
+            ],
+            "Voice command",
+            cacheable=True,
+            bypass_cache=bypass_cache,
         )
-        
-        return response.choices[0].message.content
     
     except Exception as e:
         raise Exception(f"GPT voice command processing failed: {str(e)}")
 
 
-async def detect_language(transcript: str) -> str:
+async def stream_voice_command(
+    command: str,
+    transcript: str,
+    bypass_cache: bool = False,
+    excerpts: Optional[List[str]] = None,
+    summary: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of process_voice_command that yields completion deltas
+
+    A cached answer is yielded in one piece. Closing the generator (e.g. on
+    client disconnect) closes the upstream HTTP stream, cancelling the request.
+    Time to first token is recorded as voice_command_ttft_seconds.
+    """
+    messages = [
+        {"role": "system", "content": "You are a helpful assistant that answers questions about meeting transcripts."},
+        {"role": "user", "content": _voice_command_prompt(command, transcript, excerpts, summary)}
+    ]
+    started = time.perf_counter()
+
+    key = None
+    if llm_cache.LLM_CACHE_ENABLED and not bypass_cache:
+        key = llm_cache.make_key(
+            GPT_MODEL, f"voice_command.{PROMPT_VERSIONS['voice_command']}", None, messages, None
+        )
+        cached = await llm_cache.lookup(key)
+        if cached is not None:
+            metrics.observe("voice_command_ttft_seconds", time.perf_counter() - started)
+            yield cached
+            return
+
+    try:
+        stream = await client.chat.completions.create(model=GPT_MODEL, messages=messages, stream=True)
+    except Exception as e:
+        raise Exception(f"GPT voice command processing failed: {str(e)}")
+
+    parts = []
+    completed = False
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if not parts:
+                metrics.observe("voice_command_ttft_seconds", time.perf_counter() - started)
+            parts.append(delta)
+            yield delta
+        completed = True
+    finally:
+        if not completed:
+            metrics.inc("voice_command_stream_cancelled_total")
+        await stream.close()
+
+    if key and parts:
+        await llm_cache.store(key, GPT_MODEL, f"voice_command.{PROMPT_VERSIONS['voice_command']}", "".join(parts))
+
+
+async def detect_language(transcript: str, bypass_cache: bool = False) -> str:
     """
     Detect the primary language of the meeting transcript
     
     Args:
         transcript: The meeting transcript text
+        bypass_cache: Skip the response cache for this call
         
     Returns:
         Detected language name (e.g., English, Hindi, Marathi, etc.) or 'Unknown'
@@ -213,25 +549,28 @@ Transcript:
 """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0
+        content = await _complete(
+            "language",
+            [{"role": "user", "content": prompt}],
+            "Language detection",
+            temperature=0,
+            bypass_cache=bypass_cache,
         )
 
-        return response.choices[0].message.content.strip()
+        return content.strip()
 
     except Exception:
         return "Unknown"
 
 
-async def translate_text(text: str, target_language: str) -> str:
+async def translate_text(text: str, target_language: str, bypass_cache: bool = False) -> str:
     """
     Translate text into a target language
     
     Args:
         text: The text to translate
         target_language: The target language
+        bypass_cache: Skip the response cache for this call
         
     Returns:
         Translated text
@@ -246,13 +585,506 @@ Text:
 """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0
+        content = await _complete(
+            "translate",
+            [{"role": "user", "content": prompt}],
+            "Translation",
+            temperature=0,
+            bypass_cache=bypass_cache,
         )
 
-        return response.choices[0].message.content.strip()
+        return content.strip()
 
     except Exception as e:
          raise Exception(f"Translation failed: {str(e)}")
+
+
+async def translate_note_batch(
+    summary: str,
+    key_points: List[str],
+    target_languages: List[str],
+    bypass_cache: bool = False,
+) -> Dict[str, Dict[str, any]]:
+    """
+    Translate a summary and its key points into several languages in one call
+
+    Args:
+        summary: The note summary
+        key_points: The note key points
+        target_languages: Languages to translate into
+        bypass_cache: Skip the response cache for this call
+
+    Returns:
+        Mapping of each requested language to {'summary': str, 'key_points': list}.
+        Languages missing from the reply, or whose key point count does not
+        match the source, are left out.
+    """
+    prompt = f"""
+Translate the following meeting summary and key points into each of these languages: {", ".join(target_languages)}.
+Keep meaning accurate and natural. Translate every key point, keeping their order.
+
+Summary:
+{summary}
+
+Key points (JSON array):
+{json.dumps(key_points, ensure_ascii=False)}
+
+Respond in JSON format, with one entry per language using the language name exactly as given above:
+{{
+  "translations": {{
+    "<language>": {{"summary": "Translated summary", "key_points": ["Translated point 1", "Translated point 2"]}}
+  }}
+}}
+"""
+
+    try:
+        result = await _complete(
+            "translate_batch",
+            [
+                {"role": "system", "content": "You are a professional translator that returns structured JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            "Batch translation",
+            temperature=0,
+            response_format={"type": "json_object"},
+            bypass_cache=bypass_cache,
+            parse=json.loads,
+        )
+    except Exception as e:
+        raise Exception(f"Translation failed: {str(e)}")
+
+    returned = result.get("translations") if isinstance(result, dict) else None
+    if not isinstance(returned, dict):
+        return {}
+    by_name = {str(name).strip().lower(): value for name, value in returned.items()}
+
+    translations = {}
+    for language in target_languages:
+        entry = by_name.get(language.strip().lower())
+        if not isinstance(entry, dict):
+            continue
+        translated_summary = entry.get("summary")
+        translated_points = entry.get("key_points")
+        if not isinstance(translated_summary, str) or not isinstance(translated_points, list):
+            continue
+        if len(translated_points) != len(key_points):
+            continue
+        translations[language] = {
+            "summary": translated_summary.strip(),
+            "key_points": [str(p).strip() for p in translated_points],
+        }
+    return translations
+
+
+# Value used for a stage that failed or timed out, so one slow call never sinks the note
+_STAGE_DEFAULTS = {
+    "summary": {"summary": "", "key_points": []},
+    "tasks": [],
+    "sentiment": "Neutral",
+    "language": "Unknown",
+}
+
+
+async def _run_stages(stages: Dict[str, any], timeout: float, transcript: str) -> Dict[str, any]:
+    """Await stage coroutines concurrently, substituting defaults for failures."""
+    results = await asyncio.gather(
+        *(asyncio.wait_for(coro, _stage_timeout(name, transcript, timeout)) for name, coro in stages.items()),
+        return_exceptions=True,
+    )
+
+    analysis = {"failed_stages": []}
+    for name, result in zip(stages, results):
+        if isinstance(result, BaseException):
+            reason = "timed out" if isinstance(result, asyncio.TimeoutError) else str(result)
+            print(f"⚠️ Analysis stage '{name}' failed: {reason}")
+            analysis["failed_stages"].append(name)
+            result = copy.deepcopy(_STAGE_DEFAULTS[name])
+        analysis[name] = result
+    return analysis
+
+
+def _stage_call(name: str, transcript: str, bypass_cache: bool = False):
+    if name == "summary":
+        return generate_summary(transcript, bypass_cache=bypass_cache)
+    if name == "tasks":
+        return extract_tasks(transcript, bypass_cache=bypass_cache)
+    if name == "sentiment":
+        return detect_sentiment(transcript, bypass_cache=bypass_cache)
+    return detect_language(transcript, bypass_cache=bypass_cache)
+
+
+async def analyze_transcript(transcript: str, timeout: float = None, bypass_cache: bool = False) -> Dict[str, any]:
+    """
+    Run summary, task, sentiment and language analysis concurrently
+
+    Args:
+        transcript: The meeting transcript text
+        timeout: Per-stage timeout in seconds (defaults to GPT_STAGE_TIMEOUT);
+            map-reduce stages get it once per wave of chunks plus the reduce
+        bypass_cache: Skip the response cache for every stage
+
+    Returns:
+        Dictionary with 'summary', 'tasks', 'sentiment', 'language' and
+        'failed_stages' (names of stages that fell back to their defaults)
+    """
+    timeout = GPT_STAGE_TIMEOUT if timeout is None else timeout
+    stages = {name: _stage_call(name, transcript, bypass_cache) for name in _STAGE_DEFAULTS}
+    return await _run_stages(stages, timeout, transcript)
+
+
+# Strict schema for the single-call analysis; every field is required
+COMBINED_ANALYSIS_SCHEMA = {
+    "name": "meeting_analysis",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "summary": {"type": "string"},
+            "key_points": {"type": "array", "items": {"type": "string"}},
+            "tasks": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "task": {"type": "string"},
+                        "deadline": {"type": ["string", "null"]},
+                    },
+                    "required": ["task", "deadline"],
+                    "additionalProperties": False,
+                },
+            },
+            "sentiment": {"type": "string", "enum": SENTIMENTS},
+            "language": {"type": "string"},
+        },
+        "required": ["summary", "key_points", "tasks", "sentiment", "language"],
+        "additionalProperties": False,
+    },
+}
+
+
+def _normalize_deadline(value) -> Optional[str]:
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.strptime(value.strip(), "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        return None
+
+
+def validate_combined_analysis(data) -> tuple[Dict[str, any], List[str]]:
+    """
+    Validate and normalize a combined analysis payload
+
+    Args:
+        data: Parsed JSON returned by the model
+
+    Returns:
+        Tuple of (normalized fields, names of stages that failed validation).
+        Fields that failed are left out of the normalized dictionary.
+    """
+    if not isinstance(data, dict):
+        return {}, list(_STAGE_DEFAULTS)
+
+    fields = {}
+    invalid = []
+
+    summary = data.get("summary")
+    key_points = data.get("key_points")
+    if isinstance(summary, str) and summary.strip() and isinstance(key_points, list):
+        fields["summary"] = {
+            "summary": summary.strip(),
+            "key_points": [str(p).strip() for p in key_points if str(p).strip()],
+        }
+    else:
+        invalid.append("summary")
+
+    tasks = data.get("tasks")
+    if isinstance(tasks, list):
+        fields["tasks"] = [
+            {"task": t["task"].strip(), "deadline": _normalize_deadline(t.get("deadline"))}
+            for t in tasks
+            if isinstance(t, dict) and isinstance(t.get("task"), str) and t["task"].strip()
+        ]
+    else:
+        invalid.append("tasks")
+
+    sentiment = data.get("sentiment")
+    if isinstance(sentiment, str):
+        sentiment = sentiment.strip()
+        fields["sentiment"] = sentiment if sentiment in SENTIMENTS else "Neutral"
+    else:
+        invalid.append("sentiment")
+
+    language = data.get("language")
+    if isinstance(language, str) and language.strip():
+        fields["language"] = language.strip()
+    else:
+        invalid.append("language")
+
+    return fields, invalid
+
+
+async def analyze_transcript_combined(transcript: str, timeout: float = None, bypass_cache: bool = False) -> Dict[str, any]:
+    """
+    Analyze a transcript with a single structured completion
+
+    Summary, key points, tasks, sentiment and language come back in one
+    response; only fields that fail validation are re-requested through
+    the per-field calls.
+
+    Args:
+        transcript: The meeting transcript text
+        timeout: Per-stage timeout in seconds (defaults to GPT_STAGE_TIMEOUT)
+        bypass_cache: Skip the response cache for this call and any fallbacks
+
+    Returns:
+        Same shape as analyze_transcript
+    """
+    timeout = GPT_STAGE_TIMEOUT if timeout is None else timeout
+    if estimate_tokens(transcript) > MAP_REDUCE_THRESHOLD_TOKENS:
+        # Too long for one prompt; the per-field path switches to map-reduce
+        return await analyze_transcript(transcript, timeout, bypass_cache)
+    prompt = f"""You are an AI assistant that analyzes meeting transcripts.
+
+Given the following meeting transcript, provide:
+1. summary: A concise summary (2-3 sentences)
+2. key_points: Key points discussed (as a list)
+3. tasks: All action items mentioned, each with a deadline in YYYY-MM-DD format (null if not mentioned)
+4. sentiment: The OVERALL tone, exactly one of Positive, Neutral, Tense, Urgent
+   - Positive → calm, productive, optimistic discussion
+   - Neutral → normal informational or balanced discussion
+   - Tense → disagreement, conflict, stress, pressure, frustration
+   - Urgent → deadlines, critical issues, time-sensitive actions
+5. language: The primary language of the transcript, named in English (e.g. English, Hindi, Marathi)
+
+Transcript:
+{transcript}
+"""
+
+    try:
+        fields, invalid = await asyncio.wait_for(
+            _complete(
+                "combined",
+                [
+                    {"role": "system", "content": "You are a helpful assistant that analyzes meeting transcripts and returns structured JSON."},
+                    {"role": "user", "content": prompt}
+                ],
+                "Combined analysis",
+                temperature=0,
+                response_format={"type": "json_schema", "json_schema": COMBINED_ANALYSIS_SCHEMA},
+                bypass_cache=bypass_cache,
+                parse=lambda content: validate_combined_analysis(json.loads(content)),
+            ),
+            timeout,
+        )
+    except Exception as e:
+        reason = "timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+        print(f"⚠️ Combined analysis failed, falling back to per-field calls: {reason}")
+        fields, invalid = {}, list(_STAGE_DEFAULTS)
+
+    analysis = {"failed_stages": []}
+    if invalid:
+        analysis = await _run_stages(
+            {name: _stage_call(name, transcript, bypass_cache) for name in invalid}, timeout, transcript
+        )
+    analysis.update(fields)
+    return analysis
+
+
+def _apply_rolling_update(state: Dict[str, any], data) -> Dict[str, any]:
+    """Fold a rolling update into the previous state, keeping old fields the model got wrong."""
+    if not isinstance(data, dict):
+        raise ValueError("Rolling update is not a JSON object")
+    summary = data.get("summary")
+    key_points = data.get("key_points")
+    new_tasks = data.get("new_tasks")
+    deadlines = data.get("deadlines")
+
+    tasks = [dict(t) for t in state["tasks"]]
+    if isinstance(deadlines, list):
+        by_text = {t["task"]: t for t in tasks}
+        for change in deadlines:
+            if isinstance(change, dict) and change.get("task") in by_text:
+                deadline = _normalize_deadline(change.get("deadline"))
+                if deadline:
+                    by_text[change["task"]]["deadline"] = deadline
+    if isinstance(new_tasks, list):
+        found = [
+            {"task": t["task"].strip(), "deadline": _normalize_deadline(t.get("deadline"))}
+            for t in new_tasks
+            if isinstance(t, dict) and isinstance(t.get("task"), str) and t["task"].strip()
+        ]
+        tasks = merge_tasks([tasks, found])
+
+    return {
+        "summary": summary.strip() if isinstance(summary, str) and summary.strip() else state["summary"],
+        "key_points": (
+            [str(p).strip() for p in key_points if str(p).strip()][:LIVE_MAX_KEY_POINTS]
+            if isinstance(key_points, list) else state["key_points"]
+        ),
+        "tasks": tasks,
+    }
+
+
+async def update_rolling_analysis(
+    state: Dict[str, any],
+    segment: str,
+    usage: Optional[Dict[str, int]] = None,
+    bypass_cache: bool = False,
+) -> Dict[str, any]:
+    """
+    Fold the next part of a live meeting's transcript into its running analysis
+
+    The model sees the bounded running state and the new text only, never
+    the transcript so far, so a meeting costs tokens in proportion to its
+    length.
+
+    Args:
+        state: Running analysis with 'summary', 'key_points' and 'tasks'
+        segment: Transcript text added since the last update
+        usage: Optional token totals to add this call's usage to
+        bypass_cache: Skip the response cache for this call
+
+    Returns:
+        The updated state (same keys)
+    """
+    recorded = "\n".join(
+        f"- {t['task']}" + (f" (due {t['deadline']})" if t.get("deadline") else "")
+        for t in state["tasks"][-LIVE_PROMPT_TASKS:]
+    ) or "(none yet)"
+    prompt = f"""You are an AI assistant that keeps a running analysis of a meeting while it is happening.
+
+Analysis of the meeting so far:
+Summary: {state["summary"] or "(the meeting has just started)"}
+Key points: {json.dumps(state["key_points"], ensure_ascii=False)}
+Action items already recorded:
+{recorded}
+
+Newest part of the transcript:
+{segment}
+
+Update the analysis with the newest part:
+1. summary: The whole meeting so far, in at most {LIVE_SUMMARY_WORDS} words
+2. key_points: Key points of the whole meeting so far, at most {LIVE_MAX_KEY_POINTS}, merging or dropping minor ones
+3. new_tasks: Action items first mentioned in the newest part (not already recorded), with a deadline in YYYY-MM-DD format (null if not mentioned)
+4. deadlines: Deadlines the newest part sets or changes for already recorded items, using the recorded wording
+
+Respond in JSON format:
+{{
+  "summary": "Summary so far",
+  "key_points": ["Point 1", "Point 2"],
+  "new_tasks": [{{"task": "Task description", "deadline": null}}],
+  "deadlines": [{{"task": "Recorded task", "deadline": "2026-02-14"}}]
+}}
+"""
+
+    try:
+        return await _complete(
+            "rolling_update",
+            [
+                {"role": "system", "content": "You are a helpful assistant that analyzes meeting transcripts and returns structured JSON."},
+                {"role": "user", "content": prompt}
+            ],
+            "Rolling update",
+            temperature=0,
+            response_format={"type": "json_object"},
+            bypass_cache=bypass_cache,
+            parse=lambda content: _apply_rolling_update(state, json.loads(content)),
+            usage=usage,
+        )
+    except Exception as e:
+        raise Exception(f"GPT rolling analysis failed: {str(e)}")
+
+
+def _transcript_excerpt(transcript: str, max_tokens: int) -> str:
+    """Start and end of a transcript within roughly max_tokens."""
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(transcript) <= limit:
+        return transcript
+    half = limit // 2
+    return f"{transcript[:half]} […] {transcript[-half:]}"
+
+
+async def reconcile_rolling_analysis(
+    state: Dict[str, any],
+    transcript: str,
+    usage: Optional[Dict[str, int]] = None,
+    timeout: float = None,
+    bypass_cache: bool = False,
+) -> Dict[str, any]:
+    """
+    Final pass over a live meeting's running analysis
+
+    Tightens the summary, merges key points and duplicate tasks, and adds
+    sentiment and language from a short transcript excerpt. Fields the
+    pass gets wrong fall back to the running state (summary, tasks) or to
+    the per-field calls on the excerpt (sentiment, language).
+
+    Args:
+        state: Running analysis with 'summary', 'key_points' and 'tasks'
+        transcript: The full meeting transcript (only an excerpt is sent)
+        usage: Optional token totals to add this call's usage to
+        timeout: Timeout in seconds (defaults to GPT_STAGE_TIMEOUT)
+        bypass_cache: Skip the response cache for this call and any fallbacks
+
+    Returns:
+        Same shape as analyze_transcript
+    """
+    timeout = GPT_STAGE_TIMEOUT if timeout is None else timeout
+    excerpt = _transcript_excerpt(transcript, LIVE_RECONCILE_EXCERPT_TOKENS)
+    tasks = "\n".join(
+        f"- {t['task']}" + (f" (due {t['deadline']})" if t.get("deadline") else "") for t in state["tasks"]
+    ) or "(none)"
+    prompt = f"""You are an AI assistant that analyzes meeting transcripts.
+
+The meeting below was analyzed part by part while it happened. Using that
+running analysis and the excerpt of its transcript, provide the final analysis:
+1. summary: A concise summary of the whole meeting (2-3 sentences)
+2. key_points: Key points discussed (as a list, merging duplicates)
+3. tasks: The recorded action items with duplicates merged, each with a deadline in YYYY-MM-DD format (null if none)
+4. sentiment: The OVERALL tone, exactly one of Positive, Neutral, Tense, Urgent
+5. language: The primary language of the transcript, named in English (e.g. English, Hindi, Marathi)
+
+Running summary: {state["summary"]}
+Running key points: {json.dumps(state["key_points"], ensure_ascii=False)}
+Recorded action items:
+{tasks}
+
+Transcript excerpt:
+{excerpt}
+"""
+
+    try:
+        fields, invalid = await asyncio.wait_for(
+            _complete(
+                "rolling_reconcile",
+                [
+                    {"role": "system", "content": "You are a helpful assistant that analyzes meeting transcripts and returns structured JSON."},
+                    {"role": "user", "content": prompt}
+                ],
+                "Rolling reconcile",
+                temperature=0,
+                response_format={"type": "json_schema", "json_schema": COMBINED_ANALYSIS_SCHEMA},
+                bypass_cache=bypass_cache,
+                parse=lambda content: validate_combined_analysis(json.loads(content)),
+                usage=usage,
+            ),
+            timeout,
+        )
+    except Exception as e:
+        reason = "timed out" if isinstance(e, asyncio.TimeoutError) else str(e)
+        print(f"⚠️ Rolling reconcile failed, keeping the running analysis: {reason}")
+        fields, invalid = {}, list(_STAGE_DEFAULTS)
+
+    analysis = {"failed_stages": []}
+    if "summary" in invalid:
+        fields["summary"] = {"summary": state["summary"], "key_points": state["key_points"]}
+    if "tasks" in invalid:
+        fields["tasks"] = state["tasks"]
+    per_field = [name for name in invalid if name in ("sentiment", "language")]
+    if per_field:
+        analysis = await _run_stages(
+            {name: _stage_call(name, excerpt, bypass_cache) for name in per_field}, timeout, excerpt
+        )
+    analysis.update(fields)
+    return analysis
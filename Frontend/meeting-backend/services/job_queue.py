@@ -0,0 +1,186 @@
+import os
+import json
+import asyncio
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from database import SessionLocal
+from models import TranscriptionJob
+from .pipeline import process_recording, PIPELINE_STAGES
+
+# Concurrent pipeline runs; size against the OpenAI rate limits of the deployment
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+TERMINAL_STATUSES = {"completed", "failed"}
+
+
+def job_snapshot(job: TranscriptionJob) -> Dict[str, any]:
+    """Serialize a job row into the JSON shape used by /jobs and its events."""
+    return {
+        "id": job.id,
+        "status": job.status,
+        "stages": json.loads(job.stages or "{}"),
+        "filename": job.filename,
+        "note_id": job.note_id,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+    }
+
+
+class JobQueue:
+    """
+    Bounded in-process worker pool for background /transcribe jobs
+
+    Job state lives in the transcription_jobs table; the asyncio queue only
+    carries job ids, so anything queued or interrupted mid-run is picked up
+    again by start() after a restart.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = max(1, workers)
+        self._queue: asyncio.Queue = None
+        self._tasks: List[asyncio.Task] = []
+        self._listeners: Dict[str, Set[asyncio.Queue]] = {}
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        for job_id in self._recover():
+            self._queue.put_nowait(job_id)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        print(f"🧵 Job queue started with {self.workers} worker(s)")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, job_id: str, file_path: Path, filename: str, audio_hash: Optional[str] = None) -> None:
+        """Persist a new queued job for an already-saved recording and enqueue it."""
+        db = SessionLocal()
+        try:
+            db.add(TranscriptionJob(
+                id=job_id,
+                status="queued",
+                stages=json.dumps({stage: "pending" for stage in PIPELINE_STAGES}),
+                filename=filename,
+                file_path=str(file_path),
+                audio_hash=audio_hash,
+            ))
+            db.commit()
+        finally:
+            db.close()
+        self._queue.put_nowait(job_id)
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        listener = asyncio.Queue()
+        self._listeners.setdefault(job_id, set()).add(listener)
+        return listener
+
+    def unsubscribe(self, job_id: str, listener: asyncio.Queue) -> None:
+        listeners = self._listeners.get(job_id)
+        if listeners is None:
+            return
+        listeners.discard(listener)
+        if not listeners:
+            del self._listeners[job_id]
+
+    def _publish(self, job: TranscriptionJob) -> None:
+        listeners = self._listeners.get(job.id)
+        if not listeners:
+            return
+        event = job_snapshot(job)
+        for listener in listeners:
+            listener.put_nowait(event)
+
+    def _recover(self) -> List[str]:
+        """
+        Return ids of jobs left queued or running by a previous process
+
+        A job whose note was already stored (note_id is committed with the
+        note) only missed being marked completed, so it isn't run again.
+        """
+        db = SessionLocal()
+        try:
+            jobs = (
+                db.query(TranscriptionJob)
+                .filter(TranscriptionJob.status.in_(["queued", "running"]))
+                .order_by(TranscriptionJob.created_at)
+                .all()
+            )
+            stored = [job for job in jobs if job.note_id is not None]
+            for job in stored:
+                job.status = "completed"
+                job.stages = json.dumps({stage: "done" for stage in PIPELINE_STAGES})
+            jobs = [job for job in jobs if job.note_id is None]
+            for job in jobs:
+                job.status = "queued"
+            db.commit()
+            if stored:
+                print(f"♻️ Marked {len(stored)} interrupted job(s) completed, their notes were already stored")
+            if jobs:
+                print(f"♻️ Resuming {len(jobs)} unfinished transcription job(s)")
+            return [job.id for job in jobs]
+        finally:
+            db.close()
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                print(f"❌ Job {job_id} crashed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        db = SessionLocal()
+        try:
+            job = db.query(TranscriptionJob).filter(TranscriptionJob.id == job_id).first()
+            if not job or job.status in TERMINAL_STATUSES or job.note_id is not None:
+                return
+
+            stages = json.loads(job.stages or "{}")
+            job.status = "running"
+            db.commit()
+            self._publish(job)
+
+            def on_stage(stage: str, status: str) -> None:
+                stages[stage] = status
+                job.stages = json.dumps(stages)
+                db.commit()
+                self._publish(job)
+
+            file_path = Path(job.file_path)
+            try:
+                if not file_path.exists():
+                    raise FileNotFoundError(f"Audio file missing: {file_path}")
+                result = await process_recording(
+                    db, file_path, job.filename, on_stage=on_stage, audio_hash=job.audio_hash,
+                    on_stored=lambda note: setattr(job, "note_id", note.id),
+                )
+            except Exception as e:
+                db.rollback()
+                for stage, status in stages.items():
+                    if status == "running":
+                        stages[stage] = "failed"
+                job.stages = json.dumps(stages)
+                job.status = "failed"
+                job.error = f"Processing failed: {str(e)}"
+                db.commit()
+                self._publish(job)
+                # The recording is kept: uploads of the same bytes share its path
+                return
+
+            job.status = "completed"
+            job.result = json.dumps(result)
+            db.commit()
+            self._publish(job)
+        finally:
+            db.close()
+
+
+job_queue = JobQueue()
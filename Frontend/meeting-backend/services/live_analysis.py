@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from database import SessionLocal
+from models import LiveAnalysis
+from . import metrics
+from .gpt_service import update_rolling_analysis, reconcile_rolling_analysis
+from .pipeline import analyze_full_transcript
+
+# "incremental" = rolling summary/tasks per segment plus a final pass,
+# "final" = analyze the whole transcript once the meeting ends
+LIVE_ANALYSIS = os.getenv("LIVE_ANALYSIS", "incremental").lower()
+
+metrics.describe("live_analysis_updates_total", "Rolling analysis updates of live meetings")
+metrics.describe("live_analysis_update_failures_total", "Rolling analysis updates that failed (text retried with the next one)")
+metrics.describe("live_analysis_update_seconds", "Duration of one rolling analysis update")
+metrics.describe("live_analysis_fallbacks_total", "Live meetings analyzed in full because the rolling state fell behind")
+
+Send = Callable[[Dict], Awaitable[None]]
+
+
+class RollingAnalysis:
+    """
+    Running summary, key points and tasks of a live meeting
+
+    Transcript text is folded in as it arrives by one update at a time,
+    each sending the model only the bounded running state and the new
+    text. Text arriving while an update is in flight is batched into the
+    next one, so the state is never more than one update behind the
+    transcript. The state is checkpointed to live_analyses after every
+    update, and finish() runs one reconciliation pass over it.
+    """
+
+    def __init__(self, session_id: str, filename: str, send: Send):
+        self.session_id = session_id
+        self.filename = filename
+        self.state: Dict[str, any] = {"summary": "", "key_points": [], "tasks": []}
+        self.segments = 0
+        self.usage: Dict[str, int] = {"prompt_tokens": 0, "completion_tokens": 0}
+        self._send = send
+        self._pending: List[str] = []
+        self._worker: Optional[asyncio.Task] = None
+
+    def add(self, text: str) -> None:
+        """Queue transcript text; an update starts right away unless one is running."""
+        self._pending.append(text)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._pending:
+            texts, self._pending = self._pending, []
+            started = time.perf_counter()
+            try:
+                self.state = await update_rolling_analysis(self.state, "\n".join(texts), self.usage)
+            except Exception as e:
+                # Put the text back in front; the next segment (or finish) retries it
+                metrics.inc("live_analysis_update_failures_total")
+                print(f"⚠️ Live analysis {self.session_id} update failed: {e}")
+                self._pending = texts + self._pending
+                return
+            metrics.inc("live_analysis_updates_total")
+            metrics.observe("live_analysis_update_seconds", time.perf_counter() - started)
+            self.segments += len(texts)
+            self._checkpoint()
+            await self._send({
+                "type": "analysis",
+                "segments": self.segments,
+                "summary": self.state["summary"],
+                "key_points": self.state["key_points"],
+                "tasks": self.state["tasks"],
+            })
+
+    def _checkpoint(self, note_id: Optional[int] = None) -> None:
+        db = SessionLocal()
+        try:
+            row = db.get(LiveAnalysis, self.session_id) or LiveAnalysis(id=self.session_id, filename=self.filename)
+            row.filename = self.filename
+            row.segments = self.segments
+            row.summary = self.state["summary"]
+            row.key_points = json.dumps(self.state["key_points"])
+            row.tasks = json.dumps(self.state["tasks"])
+            row.prompt_tokens = self.usage["prompt_tokens"]
+            row.completion_tokens = self.usage["completion_tokens"]
+            if note_id is not None:
+                row.note_id = note_id
+            db.merge(row)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠️ Live analysis {self.session_id} checkpoint failed: {e}")
+        finally:
+            db.close()
+
+    async def finish(self, transcript: str) -> Dict[str, any]:
+        """
+        Bring the state up to date and run the final reconciliation pass
+
+        Text that still can't be folded in (updates keep failing) means
+        the running state is incomplete, so the whole transcript is
+        analyzed instead.
+
+        Returns:
+            Same shape as analyze_transcript
+        """
+        if self._worker is not None:
+            await self._worker
+        if self._pending:
+            await self._run()
+        if self._pending:
+            metrics.inc("live_analysis_fallbacks_total")
+            return await analyze_full_transcript(transcript)
+        if not self.segments:
+            return await analyze_full_transcript(transcript)
+        analysis = await reconcile_rolling_analysis(self.state, transcript, self.usage)
+        self._checkpoint()
+        print(
+            f"📊 Live analysis {self.session_id}: {self.segments} segments, "
+            f"{self.usage['prompt_tokens']} prompt + {self.usage['completion_tokens']} completion tokens"
+        )
+        return analysis
+
+    def link_note(self, note_id: int) -> None:
+        self._checkpoint(note_id)
+
+    def cancel(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+
+
+def live_analysis_snapshot(row: LiveAnalysis) -> Dict[str, any]:
+    """Serialize a checkpoint for GET /transcribe/live/{id}."""
+    return {
+        "id": row.id,
+        "filename": row.filename,
+        "segments": row.segments,
+        "summary": row.summary,
+        "key_points": json.loads(row.key_points or "[]"),
+        "tasks": json.loads(row.tasks or "[]"),
+        "prompt_tokens": row.prompt_tokens,
+        "completion_tokens": row.completion_tokens,
+        "note_id": row.note_id,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+    }
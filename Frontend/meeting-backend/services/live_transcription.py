@@ -0,0 +1,205 @@
+import os
+import time
+import shutil
+import asyncio
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import aiofiles
+import aiofiles.os
+
+from database import SessionLocal
+from . import metrics
+from .whisper_service import transcribe_audio, WHISPER_CONCURRENCY
+from .segmenter import stitch_transcripts
+from .pipeline import analyze_and_store
+from .live_analysis import LIVE_ANALYSIS, RollingAnalysis
+
+# Audio accepted over one live connection before it is refused (default 500 MB)
+LIVE_MAX_BYTES = int(os.getenv("LIVE_MAX_BYTES", str(500 * 1024 * 1024)))
+
+metrics.describe("live_sessions", "Open live transcription WebSocket sessions")
+metrics.describe("live_segments_total", "Live audio segments transcribed")
+metrics.describe("live_segment_failures_total", "Live segment transcriptions that failed (retried at stop)")
+metrics.describe("live_segment_seconds", "Time from a live segment closing to its transcript being ready")
+metrics.describe("live_finalize_seconds", "Time from the end of a live stream to its note being stored")
+
+Send = Callable[[Dict], Awaitable[None]]
+
+_open_sessions = set()
+
+
+class LiveSizeExceeded(Exception):
+    """A live session went over LIVE_MAX_BYTES."""
+
+
+class LiveTranscription:
+    """
+    One live meeting being transcribed while it is recorded
+
+    Binary chunks are appended to the current segment file; each segment
+    is a self-contained recording (the client restarts its recorder at
+    every boundary) and is transcribed through transcribe_audio as soon as
+    it closes, concurrently with the meeting and with other segments.
+    Partial transcripts are sent in segment order, stitched so the few
+    words the client records twice across a boundary appear once. When the
+    stream ends only the analyze and store stages are left to run, and
+    with LIVE_ANALYSIS=incremental the analysis has mostly been done by
+    then too.
+    """
+
+    def __init__(self, session_id: str, work_dir: Path, send: Send, filename: str = "live_recording.webm"):
+        self.session_id = session_id
+        self.work_dir = work_dir
+        self.filename = filename
+        self.extension = ".webm"
+        self._send = send
+        self._file = None
+        self._segment_paths: List[Path] = []
+        self._tasks: List[asyncio.Task] = []
+        self._texts: Dict[int, Optional[str]] = {}
+        self._emitted = 0
+        self._last_text = ""
+        self.transcript = ""
+        self.total_bytes = 0
+        self._semaphore = asyncio.Semaphore(max(1, WHISPER_CONCURRENCY))
+        self._emit_lock = asyncio.Lock()
+        self.analysis = RollingAnalysis(session_id, filename, send) if LIVE_ANALYSIS == "incremental" else None
+        _open_sessions.add(self)
+        metrics.set_gauge("live_sessions", len(_open_sessions))
+
+    def configure(self, filename: Optional[str] = None, mime: Optional[str] = None) -> None:
+        """Apply a client's {"type": "start"} message (only before any audio arrives)."""
+        if self.total_bytes:
+            return
+        if filename:
+            self.filename = Path(filename).name
+            if self.analysis:
+                self.analysis.filename = self.filename
+        if mime and "/" in mime:
+            subtype = mime.split("/", 1)[1].split(";", 1)[0].strip()
+            if subtype.isalnum():
+                self.extension = f".{subtype}"
+
+    async def append(self, data: bytes) -> None:
+        """
+        Add recorded bytes to the current segment
+
+        Raises:
+            LiveSizeExceeded: if the session would go over LIVE_MAX_BYTES
+        """
+        if self.total_bytes + len(data) > LIVE_MAX_BYTES:
+            raise LiveSizeExceeded(f"Live recording exceeds {LIVE_MAX_BYTES} bytes")
+        if self._file is None:
+            await aiofiles.os.makedirs(self.work_dir, exist_ok=True)
+            path = self.work_dir / f"segment-{len(self._segment_paths):04d}{self.extension}"
+            self._segment_paths.append(path)
+            self._file = await aiofiles.open(path, "wb")
+        await self._file.write(data)
+        self.total_bytes += len(data)
+
+    async def end_segment(self) -> None:
+        """Close the current segment and start transcribing it in the background."""
+        if self._file is None:
+            return
+        await self._file.close()
+        self._file = None
+        index = len(self._segment_paths) - 1
+        self._tasks.append(asyncio.create_task(self._transcribe(index, time.perf_counter())))
+
+    async def _transcribe(self, index: int, closed_at: float) -> None:
+        async with self._semaphore:
+            try:
+                text = await transcribe_audio(str(self._segment_paths[index]))
+            except Exception as e:
+                # Left as None; finish() gives it one more attempt
+                metrics.inc("live_segment_failures_total")
+                print(f"⚠️ Live segment {index} transcription failed: {e}")
+                text = None
+        metrics.inc("live_segments_total")
+        metrics.observe("live_segment_seconds", time.perf_counter() - closed_at)
+        self._texts[index] = text
+        await self._emit_ready()
+
+    async def _emit_ready(self) -> None:
+        """Send every partial that is next in order (a failed segment holds later ones back)."""
+        async with self._emit_lock:
+            while self._texts.get(self._emitted) is not None:
+                text = self._texts[self._emitted].strip()
+                if text:
+                    # Stitching against just the previous segment keeps each step O(segment)
+                    joined = stitch_transcripts([self._last_text, text]) if self._last_text else text
+                    added = joined[len(self._last_text):].strip()
+                    self._last_text = text
+                    if added:
+                        self.transcript = f"{self.transcript} {added}" if self.transcript else added
+                        if self.analysis:
+                            self.analysis.add(added)
+                        await self._send({
+                            "type": "partial",
+                            "segment": self._emitted,
+                            "text": added,
+                            "transcript": self.transcript,
+                        })
+                self._emitted += 1
+
+    async def finish(self, on_stage: Optional[Callable[[str, str], None]] = None) -> Optional[Dict[str, any]]:
+        """
+        Close the stream, wait for outstanding segments and store the note
+
+        Returns:
+            The /transcribe response payload, or None when no audio arrived
+
+        Raises:
+            Exception: if a segment still can't be transcribed, or analysis fails;
+                the segment files are then kept in work_dir
+        """
+        started = time.perf_counter()
+        await self.end_segment()
+        if not self._segment_paths:
+            await self.discard()
+            return None
+
+        try:
+            if on_stage:
+                on_stage("transcribe", "running")
+            await asyncio.gather(*self._tasks)
+            for index in range(len(self._segment_paths)):
+                if self._texts.get(index) is None:
+                    self._texts[index] = await transcribe_audio(str(self._segment_paths[index]))
+            await self._emit_ready()
+            if on_stage:
+                on_stage("transcribe", "done")
+
+            db = SessionLocal()
+            try:
+                result = await analyze_and_store(
+                    db, self.transcript, self.filename, on_stage,
+                    analyze=self.analysis.finish if self.analysis else None,
+                )
+            finally:
+                db.close()
+            if self.analysis:
+                self.analysis.link_note(result["note_id"])
+        except Exception:
+            self._close()
+            raise
+        metrics.observe("live_finalize_seconds", time.perf_counter() - started)
+        await self.discard()
+        return result
+
+    async def discard(self) -> None:
+        """Remove the segment files (the transcript lives on in the note)."""
+        if self._file is not None:
+            await self._file.close()
+            self._file = None
+        for task in self._tasks:
+            task.cancel()
+        if self.analysis:
+            self.analysis.cancel()
+        await asyncio.to_thread(shutil.rmtree, self.work_dir, ignore_errors=True)
+        self._close()
+
+    def _close(self) -> None:
+        _open_sessions.discard(self)
+        metrics.set_gauge("live_sessions", len(_open_sessions))
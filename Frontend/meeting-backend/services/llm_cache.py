@@ -0,0 +1,231 @@
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from database import SessionLocal
+from models import LLMCacheEntry
+from . import metrics
+
+# Two-tier cache for deterministic GPT completions: a bounded in-memory LRU in
+# front of the llm_cache table. Both tiers share the same TTL.
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+LLM_CACHE_MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "168"))
+# The table is trimmed to LLM_CACHE_MAX_ENTRIES once every this many writes,
+# so it may briefly hold up to this many entries more
+LLM_CACHE_EVICT_EVERY = int(os.getenv("LLM_CACHE_EVICT_EVERY", "50"))
+
+metrics.describe("llm_cache_memory_hits_total", "GPT completions served from the in-memory LRU")
+metrics.describe("llm_cache_db_hits_total", "GPT completions served from the SQLite cache")
+metrics.describe("llm_cache_misses_total", "Cacheable GPT completions that went to the API")
+metrics.describe("llm_cache_evictions_total", "Persistent GPT cache entries removed by TTL or size")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class LRUCache:
+    """Thread-safe bounded mapping of key -> (value, expires_at) with TTL expiry."""
+
+    def __init__(self, capacity: int, ttl_seconds: float):
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self._items: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if time.monotonic() > expires_at:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: str, ttl_seconds: Optional[float] = None) -> None:
+        """Store a value for ttl_seconds (default: the cache's TTL)."""
+        if self.capacity <= 0:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + ttl)
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+_memory = LRUCache(LLM_CACHE_MEMORY_ENTRIES, LLM_CACHE_TTL_HOURS * 3600)
+_writes = 0
+_writes_lock = threading.Lock()
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def make_key(
+    model: str,
+    template: str,
+    temperature: Optional[float],
+    messages: List[dict],
+    response_format: Optional[dict] = None,
+) -> str:
+    """
+    Cache key for a completion request
+
+    Whitespace differences in the prompt do not change the key; the template
+    name carries a version so editing a prompt invalidates its old entries.
+    """
+    input_hash = hashlib.sha256(
+        json.dumps(
+            [[m["role"], _normalize(m["content"])] for m in messages],
+            ensure_ascii=False,
+        ).encode("utf-8")
+    ).hexdigest()
+    material = json.dumps(
+        [model, template, temperature, response_format, input_hash],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def _expiry_cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(hours=LLM_CACHE_TTL_HOURS)
+
+
+def _aware(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+async def lookup(key: str) -> Optional[str]:
+    """Return a cached completion from memory, then SQLite (off the event loop); None on a miss."""
+    value = _memory.get(key)
+    if value is not None:
+        metrics.inc("llm_cache_memory_hits_total")
+        return value
+
+    found = await asyncio.to_thread(_lookup_db, key)
+    if found is None:
+        metrics.inc("llm_cache_misses_total")
+        return None
+    value, remaining_seconds = found
+    metrics.inc("llm_cache_db_hits_total")
+    # Only for the row's remaining lifetime, so the memory copy expires with it
+    _memory.put(key, value, remaining_seconds)
+    return value
+
+
+def _lookup_db(key: str) -> Optional[tuple[str, float]]:
+    """(response, seconds until it expires) from the llm_cache table, or None."""
+    db = SessionLocal()
+    try:
+        entry = db.query(LLMCacheEntry).filter(LLMCacheEntry.key == key).first()
+        if entry is None:
+            return None
+        now = datetime.now(timezone.utc)
+        created_at = _aware(entry.created_at) if entry.created_at else now
+        remaining = (created_at + timedelta(hours=LLM_CACHE_TTL_HOURS) - now).total_seconds()
+        if remaining <= 0:
+            return None
+        entry.hit_count = (entry.hit_count or 0) + 1
+        entry.last_used_at = now
+        db.commit()
+        return entry.response, remaining
+    except Exception as e:
+        print(f"⚠️ LLM cache lookup failed: {e}")
+        return None
+    finally:
+        db.close()
+
+
+async def store(key: str, model: str, template: str, value: str) -> None:
+    """Write a completion to both tiers; persistence errors never fail the call."""
+    _memory.put(key, value)
+    await asyncio.to_thread(_store_db, key, model, template, value)
+
+
+def _store_db(key: str, model: str, template: str, value: str) -> None:
+    global _writes
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        entry = db.query(LLMCacheEntry).filter(LLMCacheEntry.key == key).first()
+        if entry is None:
+            db.add(LLMCacheEntry(
+                key=key,
+                model=model,
+                template=template,
+                response=value,
+                hit_count=0,
+                created_at=now,
+                last_used_at=now,
+            ))
+        else:
+            entry.response = value
+            entry.created_at = now
+            entry.last_used_at = now
+        db.commit()
+        with _writes_lock:
+            _writes += 1
+            due = _writes >= LLM_CACHE_EVICT_EVERY
+            if due:
+                _writes = 0
+        if due:
+            _evict(db)
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️ LLM cache store failed: {e}")
+    finally:
+        db.close()
+
+
+def _evict(db) -> int:
+    """Drop expired entries, then the least recently used beyond LLM_CACHE_MAX_ENTRIES."""
+    removed = (
+        db.query(LLMCacheEntry)
+        .filter(LLMCacheEntry.created_at < _expiry_cutoff())
+        .delete(synchronize_session=False)
+    )
+    overflow = db.query(LLMCacheEntry).count() - LLM_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        stale = (
+            db.query(LLMCacheEntry.key)
+            .order_by(LLMCacheEntry.last_used_at.asc())
+            .limit(overflow)
+            .subquery()
+        )
+        removed += (
+            db.query(LLMCacheEntry)
+            .filter(LLMCacheEntry.key.in_(stale.select()))
+            .delete(synchronize_session=False)
+        )
+    db.commit()
+    if removed:
+        metrics.inc("llm_cache_evictions_total", removed)
+    return removed
+
+
+def clear_memory() -> None:
+    _memory.clear()
@@ -0,0 +1,57 @@
+import threading
+from typing import Dict, Tuple
+
+# Process-local counters and summaries rendered in Prometheus text format by GET /metrics
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_summaries: Dict[str, Tuple[float, int]] = {}
+_gauges: Dict[str, float] = {}
+_help: Dict[str, str] = {}
+
+
+def describe(name: str, help_text: str) -> None:
+    _help[name] = help_text
+
+
+def inc(name: str, value: float = 1.0) -> None:
+    """Increment a monotonically increasing counter."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0.0) + value
+
+
+def observe(name: str, value: float) -> None:
+    """Record one observation (e.g. a latency in seconds) into a sum/count summary."""
+    with _lock:
+        total, count = _summaries.get(name, (0.0, 0))
+        _summaries[name] = (total + value, count + 1)
+
+
+def set_gauge(name: str, value: float) -> None:
+    with _lock:
+        _gauges[name] = value
+
+
+def get(name: str) -> float:
+    return _counters.get(name, 0.0)
+
+
+def render() -> str:
+    lines = []
+    with _lock:
+        for name, value in sorted(_counters.items()):
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value:g}")
+        for name, value in sorted(_gauges.items()):
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value:g}")
+        for name, (total, count) in sorted(_summaries.items()):
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} summary")
+            lines.append(f"{name}_sum {total:g}")
+            lines.append(f"{name}_count {count}")
+    return "\n".join(lines) + "\n"
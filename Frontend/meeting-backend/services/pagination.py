@@ -0,0 +1,75 @@
+import os
+import json
+import base64
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import String, and_, or_, type_coerce
+from sqlalchemy.orm import Query
+
+# Page size when a cursor is given without a limit / maximum page size for the list endpoints
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "200"))
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque, URL-safe cursor carrying the sort key of the last row on a page."""
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode()
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Raises ValueError on a malformed cursor."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def keyset_page(query: Query, created_col, id_col, cursor: Optional[str], limit: Optional[int]) -> Tuple[list, Optional[str]]:
+    """
+    One page of a query ordered newest first by (created_at, id)
+
+    Paging is opt-in: without a limit or cursor every row is returned, as
+    the list endpoints did before they were paginated.
+
+    created_at is compared as the text SQLite stored rather than as a bound
+    datetime, whose rendering ('... .000000') would not equal the server
+    default format, and so the (created_at) indexes stay usable.
+
+    Args:
+        query: Column query to page through (filters already applied)
+        created_col: The created_at column
+        id_col: The primary key column
+        cursor: next_cursor of the previous page, or None for the first page
+        limit: Page size; None means PAGE_SIZE with a cursor, else no limit
+
+    Returns:
+        (rows, next_cursor) where next_cursor is None on the last page
+    """
+    created = type_coerce(created_col, String)
+    if limit is None and not cursor:
+        return query.order_by(created_col.desc(), id_col.desc()).all(), None
+    if limit is None:
+        limit = PAGE_SIZE
+    if cursor:
+        after_created, after_id = decode_cursor(cursor, 2)
+        if not isinstance(after_created, str) or not isinstance(after_id, int):
+            raise ValueError("Invalid cursor")
+        query = query.filter(or_(
+            created < after_created,
+            and_(created == after_created, id_col < after_id),
+        ))
+
+    rows = (
+        query.add_columns(created.label("cursor_created_at"))
+        .order_by(created_col.desc(), id_col.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.cursor_created_at, getattr(last, id_col.key))
@@ -0,0 +1,177 @@
+import os
+import json
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from models import Note, Task
+from .whisper_service import transcribe_audio
+from .gpt_service import analyze_transcript, analyze_transcript_combined
+from .transcript_cache import get_cached_transcript, store_transcript
+from .translations import schedule_pretranslation
+
+# "fanout" = four concurrent GPT calls, "combined" = one structured call
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "fanout").lower()
+
+# Ordered pipeline stages reported to job status / progress listeners
+PIPELINE_STAGES = ["transcribe", "analyze", "store"]
+
+
+async def analyze_full_transcript(transcript: str) -> Dict[str, any]:
+    """Analyze a whole transcript in ANALYSIS_MODE (same shape as analyze_transcript)."""
+    if ANALYSIS_MODE == "combined":
+        return await analyze_transcript_combined(transcript)
+    return await analyze_transcript(transcript)
+
+
+async def process_recording(
+    db: Session,
+    file_path: Path,
+    filename: str,
+    on_stage: Optional[Callable[[str, str], None]] = None,
+    audio_hash: Optional[str] = None,
+    on_stored: Optional[Callable[[Note], None]] = None,
+) -> Dict[str, any]:
+    """
+    Run a stored recording through Whisper → GPT analysis → DB storage
+
+    Args:
+        db: Database session used to store the note and its tasks
+        file_path: Path of the saved audio file
+        filename: Original filename shown on the note
+        on_stage: Optional callback invoked as on_stage(stage, status) where
+            status is "running" or "done"
+        audio_hash: SHA-256 of the audio; when given, a cached transcript for
+            the same bytes is reused instead of calling Whisper
+        on_stored: Optional callback, as for analyze_and_store
+
+    Returns:
+        The /transcribe response payload for the created note
+    """
+    def report(stage: str, status: str) -> None:
+        if on_stage:
+            on_stage(stage, status)
+
+    # 1. Transcribe audio using Whisper API (skipped when the same audio was seen before)
+    report("transcribe", "running")
+    raw_transcript = get_cached_transcript(db, audio_hash) if audio_hash else None
+    transcript_cached = raw_transcript is not None
+    if not transcript_cached:
+        raw_transcript = await transcribe_audio(str(file_path))
+        if audio_hash:
+            store_transcript(db, audio_hash, raw_transcript, file_path.stat().st_size)
+
+    report("transcribe", "done")
+
+    return await analyze_and_store(db, raw_transcript, filename, on_stage, transcript_cached, on_stored=on_stored)
+
+
+async def analyze_and_store(
+    db: Session,
+    raw_transcript: str,
+    filename: str,
+    on_stage: Optional[Callable[[str, str], None]] = None,
+    transcript_cached: bool = False,
+    analyze: Optional[Callable[[str], Awaitable[Dict[str, any]]]] = None,
+    on_stored: Optional[Callable[[Note], None]] = None,
+) -> Dict[str, any]:
+    """
+    Run the analyze and store stages for a finished transcript
+
+    Shared by uploaded recordings and live sessions, whose transcript is
+    assembled while the meeting is still going.
+
+    Args:
+        db: Database session used to store the note and its tasks
+        raw_transcript: Whisper output for the whole meeting
+        filename: Filename shown on the note
+        on_stage: Optional callback, as for process_recording
+        transcript_cached: Reported back in the payload
+        analyze: Analysis to run instead of analyze_full_transcript (live
+            sessions pass their incremental analysis)
+        on_stored: Optional callback invoked with the flushed note just
+            before the note and its tasks are committed, so the caller can
+            record it in the same transaction (background jobs set note_id)
+
+    Returns:
+        The /transcribe response payload for the created note
+    """
+    def report(stage: str, status: str) -> None:
+        if on_stage:
+            on_stage(stage, status)
+
+    # 2. Clean transcript (for now, just use raw - can add cleaning later)
+    transcript = raw_transcript.strip()
+
+    # 3. Summary/key points, tasks, sentiment and language, either as one
+    # structured completion or as concurrent calls; a stage that fails or
+    # times out falls back to its default value
+    report("analyze", "running")
+    started = time.perf_counter()
+    analysis = await (analyze or analyze_full_transcript)(transcript)
+    mode = ANALYSIS_MODE if analyze is None else "incremental"
+    print(f"⏱️ Analysis ({mode}) took {time.perf_counter() - started:.2f}s")
+    summary_data = analysis["summary"]
+    summary = summary_data.get("summary", "")
+    key_points = json.dumps(summary_data.get("key_points", []))
+    tasks_data = analysis["tasks"]
+    report("analyze", "done")
+
+    # 4. Store note in database
+    report("store", "running")
+    note = Note(
+        filename=filename,
+        raw_transcript=raw_transcript,
+        transcript=transcript,
+        summary=summary,
+        key_points=key_points,
+        sentiment=analysis["sentiment"],
+        language=analysis["language"]
+    )
+    db.add(note)
+    db.flush()
+
+    # 5. Store tasks in database
+    created_tasks = []
+    for task_data in tasks_data:
+        task = Task(
+            note_id=note.id,
+            task=task_data.get("task", ""),
+            deadline=task_data.get("deadline"),
+            status="pending",
+            priority="medium",
+            board_column="todo",
+        )
+        db.add(task)
+        created_tasks.append({
+            "task": task.task,
+            "deadline": task.deadline
+        })
+
+    # The note and its tasks are committed together, so a crash or failure
+    # never leaves a note without its tasks
+    if on_stored:
+        on_stored(note)
+    db.commit()
+    db.refresh(note)
+    report("store", "done")
+
+    # 6. Optional: translate the new note into AUTO_TRANSLATE_LANGUAGES in the background
+    schedule_pretranslation(note.id)
+
+    return {
+        "success": True,
+        "note_id": note.id,
+        "filename": note.filename,
+        "transcript": note.transcript,
+        "summary": note.summary,
+        "key_points": json.loads(note.key_points),
+        "tasks": created_tasks,
+        "sentiment": note.sentiment,
+        "language": note.language,
+        "failed_stages": analysis["failed_stages"],
+        "transcript_cached": transcript_cached,
+        "created_at": note.created_at.isoformat()
+    }
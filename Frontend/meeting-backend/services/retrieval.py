@@ -0,0 +1,126 @@
+import os
+import re
+import math
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+from .chunking import chunk_transcript, estimate_tokens
+
+# Passages handed to the model for a voice command
+VOICE_CONTEXT_PASSAGES = int(os.getenv("VOICE_CONTEXT_PASSAGES", "6"))
+# Estimated tokens per indexed transcript passage
+VOICE_PASSAGE_TOKENS = int(os.getenv("VOICE_PASSAGE_TOKENS", "250"))
+# Transcripts up to this many estimated tokens are sent whole
+VOICE_FULL_TRANSCRIPT_TOKENS = int(os.getenv("VOICE_FULL_TRANSCRIPT_TOKENS", "2000"))
+# Per-note indexes kept in memory
+RETRIEVAL_INDEX_CACHE_SIZE = int(os.getenv("RETRIEVAL_INDEX_CACHE_SIZE", "64"))
+
+_TOKEN = re.compile(r"\w+")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "did", "do", "does", "for", "from",
+    "how", "i", "in", "is", "it", "me", "of", "on", "or", "so", "that", "the", "this",
+    "to", "was", "we", "were", "what", "when", "where", "which", "who", "why", "will",
+    "with", "you", "about", "tell", "can", "could", "please",
+}
+
+
+def _terms(text: str) -> List[str]:
+    return [t for t in _TOKEN.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of passages."""
+
+    def __init__(self, passages: List[str], k1: float = 1.5, b: float = 0.75):
+        self.passages = passages
+        self.k1 = k1
+        self.b = b
+        self._freqs = [Counter(_terms(p)) for p in passages]
+        self._lengths = [sum(f.values()) for f in self._freqs]
+        self._avg_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        df: Dict[str, int] = Counter()
+        for freqs in self._freqs:
+            df.update(freqs.keys())
+        n = len(passages)
+        self._idf = {term: math.log(1 + (n - count + 0.5) / (count + 0.5)) for term, count in df.items()}
+
+    def scores(self, query: str) -> List[float]:
+        terms = _terms(query)
+        result = []
+        for freqs, length in zip(self._freqs, self._lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self._avg_length or 1))
+            score = 0.0
+            for term in terms:
+                tf = freqs.get(term)
+                if tf:
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            result.append(score)
+        return result
+
+    def top_k(self, query: str, k: int) -> List[int]:
+        """Indices of the k best passages, returned in transcript order."""
+        scores = self.scores(query)
+        ranked = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+        best = [i for i in ranked[:k] if scores[i] > 0]
+        if not best:
+            # No lexical overlap at all: fall back to the opening passages
+            best = list(range(min(k, len(scores))))
+        return sorted(best)
+
+
+# note_id -> (transcript fingerprint, index); least recently used evicted first
+_indexes: "OrderedDict[int, tuple[str, BM25Index]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _fingerprint(transcript: str) -> str:
+    return hashlib.sha1(transcript.encode("utf-8")).hexdigest()
+
+
+def get_note_index(note_id: int, transcript: str) -> BM25Index:
+    """Return the cached passage index for a note, rebuilding it if the transcript changed."""
+    fingerprint = _fingerprint(transcript)
+    with _lock:
+        cached = _indexes.get(note_id)
+        if cached and cached[0] == fingerprint:
+            _indexes.move_to_end(note_id)
+            return cached[1]
+
+    index = BM25Index(chunk_transcript(transcript, VOICE_PASSAGE_TOKENS))
+    with _lock:
+        _indexes[note_id] = (fingerprint, index)
+        _indexes.move_to_end(note_id)
+        while len(_indexes) > RETRIEVAL_INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+    return index
+
+
+def invalidate_note_index(note_id: int) -> None:
+    with _lock:
+        _indexes.pop(note_id, None)
+
+
+def select_passages(note_id: int, transcript: str, query: str, k: int = None) -> List[str]:
+    """
+    Pick the transcript passages most relevant to a query
+
+    Args:
+        note_id: Note the transcript belongs to (index cache key)
+        transcript: The stored meeting transcript
+        query: The user's command or question
+        k: Passages to return (defaults to VOICE_CONTEXT_PASSAGES)
+
+    Returns:
+        Up to k passages, in the order they occur in the transcript
+    """
+    index = get_note_index(note_id, transcript)
+    return [index.passages[i] for i in index.top_k(query, k or VOICE_CONTEXT_PASSAGES)]
+
+
+def voice_command_excerpts(note_id: int, transcript: str, command: str) -> Optional[List[str]]:
+    """Passages to answer a command with, or None when the transcript is short enough to send whole."""
+    if estimate_tokens(transcript) <= VOICE_FULL_TRANSCRIPT_TOKENS:
+        return None
+    return select_passages(note_id, transcript, command)
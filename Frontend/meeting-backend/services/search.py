@@ -0,0 +1,176 @@
+import os
+import re
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database import MANUAL_NOTE_FILENAME
+from models import Note
+from .pagination import encode_cursor, decode_cursor
+
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "20"))
+SEARCH_MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", "100"))
+# Tokens of context around the best match in each snippet
+SEARCH_SNIPPET_TOKENS = int(os.getenv("SEARCH_SNIPPET_TOKENS", "16"))
+
+# bm25() column weights: transcript, summary, key_points. Hits in the
+# summary/key points say more about a meeting than one passing mention.
+_BM25_WEIGHTS = "1.0, 3.0, 2.0"
+
+_TERM = re.compile(r"\w+\*?")
+
+_fts_available: Optional[bool] = None
+
+
+def build_match_query(query: str) -> str:
+    """
+    Turn free text into an FTS5 MATCH expression
+
+    Every word is quoted (so user input can't inject FTS syntax) and must
+    match; a word typed with a trailing '*', and the last word (still being
+    typed), match as prefixes.
+    """
+    terms = _TERM.findall(query)
+    parts = []
+    for i, term in enumerate(terms):
+        word = term.rstrip("*")
+        prefix = term.endswith("*") or i == len(terms) - 1
+        parts.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(parts)
+
+
+def _decode_search_cursor(cursor: str) -> tuple[float, int]:
+    """(bm25 score, note id) of the last result on the previous page; ValueError if malformed."""
+    score, note_id = decode_cursor(cursor, 2)
+    if isinstance(score, bool) or not isinstance(score, (int, float)):
+        raise ValueError("Invalid cursor")
+    if isinstance(note_id, bool) or not isinstance(note_id, int):
+        raise ValueError("Invalid cursor")
+    return float(score), note_id
+
+
+def fts_available(db: Session) -> bool:
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'notes_fts'")
+        ).first() is not None
+    return _fts_available
+
+
+def full_text_search(db: Session, query: str, limit: int = None, cursor: Optional[str] = None) -> Dict[str, any]:
+    """
+    Full-text search over note transcripts, summaries and key points
+
+    Args:
+        db: Database session
+        query: Free-text query; the last word is matched as a prefix
+        limit: Page size; None means SEARCH_PAGE_SIZE with a cursor, else
+            every match in one response
+        cursor: next_cursor from the previous page
+
+    Returns:
+        Dictionary with 'results' (best match first, each with a highlighted
+        'snippet' and its bm25 'score'), 'count' (the number of results in
+        this response, so every match when unpaged) and 'next_cursor' (None
+        on the last page)
+    """
+    if limit is not None or cursor:
+        limit = max(1, min(limit or SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE))
+    if not fts_available(db):
+        return _like_search(db, query, limit, cursor)
+
+    match = build_match_query(query)
+    if not match:
+        return {"results": [], "count": 0, "next_cursor": None}
+
+    # SQLite reads a negative LIMIT as no limit
+    params = {"match": match, "limit": -1 if limit is None else limit + 1}
+    after = ""
+    if cursor:
+        params["score"], params["after_id"] = _decode_search_cursor(cursor)
+        after = (
+            f"AND (bm25(notes_fts, {_BM25_WEIGHTS}) > :score"
+            f" OR (bm25(notes_fts, {_BM25_WEIGHTS}) = :score AND notes_fts.rowid > :after_id))"
+        )
+
+    # Rank first and fetch one extra row to know whether another page exists;
+    # snippets are only built for the rows actually returned
+    rows = db.execute(text(f"""
+        SELECT notes_fts.rowid AS id, bm25(notes_fts, {_BM25_WEIGHTS}) AS score
+        FROM notes_fts
+        JOIN notes ON notes.id = notes_fts.rowid
+        WHERE notes_fts MATCH :match AND notes.filename != :manual {after}
+        ORDER BY score, notes_fts.rowid
+        LIMIT :limit
+    """), {**params, "manual": MANUAL_NOTE_FILENAME}).all()
+
+    has_more = limit is not None and len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return {"results": [], "count": 0, "next_cursor": None}
+
+    ids = [row.id for row in rows]
+    id_params = {f"id{i}": note_id for i, note_id in enumerate(ids)}
+    id_list = ", ".join(f":id{i}" for i in range(len(ids)))
+    snippets = dict(db.execute(text(f"""
+        SELECT rowid, snippet(notes_fts, -1, '<mark>', '</mark>', '…', {SEARCH_SNIPPET_TOKENS})
+        FROM notes_fts
+        WHERE notes_fts MATCH :match AND rowid IN ({id_list})
+    """), {"match": match, **id_params}).all())
+    notes = {
+        note.id: note
+        for note in db.query(Note.id, Note.filename, Note.summary, Note.created_at).filter(Note.id.in_(ids))
+    }
+
+    results = [
+        {
+            "id": row.id,
+            "filename": notes[row.id].filename,
+            "summary": notes[row.id].summary,
+            "snippet": snippets.get(row.id),
+            "score": row.score,
+            "created_at": notes[row.id].created_at.isoformat(),
+        }
+        for row in rows
+    ]
+    last = rows[-1]
+    return {
+        "results": results,
+        "count": len(results),
+        "next_cursor": encode_cursor(last.score, last.id) if has_more else None,
+    }
+
+
+def _like_search(db: Session, query: str, limit: Optional[int], cursor: Optional[str]) -> Dict[str, any]:
+    """Fallback for SQLite builds without FTS5: substring match, newest first."""
+    search_pattern = f"%{query}%"
+    q = db.query(Note.id, Note.filename, Note.summary, Note.created_at).filter(
+        (Note.transcript.like(search_pattern)) | (Note.summary.like(search_pattern)),
+        Note.filename != MANUAL_NOTE_FILENAME,
+    )
+    if cursor:
+        _, after_id = _decode_search_cursor(cursor)
+        q = q.filter(Note.id < after_id)
+    q = q.order_by(Note.id.desc())
+    notes = (q if limit is None else q.limit(limit + 1)).all()
+
+    has_more = limit is not None and len(notes) > limit
+    notes = notes[:limit]
+    results = [
+        {
+            "id": note.id,
+            "filename": note.filename,
+            "summary": note.summary,
+            "snippet": None,
+            "score": None,
+            "created_at": note.created_at.isoformat(),
+        }
+        for note in notes
+    ]
+    return {
+        "results": results,
+        "count": len(results),
+        "next_cursor": encode_cursor(0.0, notes[-1].id) if has_more else None,
+    }
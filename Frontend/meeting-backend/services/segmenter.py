@@ -0,0 +1,202 @@
+import os
+import re
+import sys
+import wave
+import array
+import shutil
+import asyncio
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Target chunk length; chunks are also capped so each stays under WHISPER_MAX_BYTES
+WHISPER_SEGMENT_SECONDS = float(os.getenv("WHISPER_SEGMENT_SECONDS", "600"))
+# Audio repeated at the start of each chunk so words on a cut are not lost
+WHISPER_SEGMENT_OVERLAP = float(os.getenv("WHISPER_SEGMENT_OVERLAP", "2"))
+# Whisper API upload limit (25 MB) minus headroom for the WAV header
+WHISPER_MAX_BYTES = int(os.getenv("WHISPER_MAX_BYTES", str(24 * 1024 * 1024)))
+# Non-WAV uploads above this size are converted with ffmpeg and segmented
+WHISPER_SEGMENT_MIN_BYTES = int(os.getenv("WHISPER_SEGMENT_MIN_BYTES", str(10 * 1024 * 1024)))
+
+# Resolution of the silence detector and how far back from a chunk's
+# nominal end it may look for a quieter cut point
+_WINDOW_SECONDS = 0.03
+_SILENCE_SEARCH_SECONDS = 10.0
+# Samples inspected per window; sub-sampling keeps long files cheap to scan
+_SAMPLES_PER_WINDOW = 64
+
+_ARRAY_TYPES = {1: "B", 2: "h", 4: "i"}
+
+
+def _window_levels(wav: wave.Wave_read, window_frames: int) -> Optional[List[float]]:
+    """Mean absolute amplitude per window, streamed; None for unsupported sample widths."""
+    typecode = _ARRAY_TYPES.get(wav.getsampwidth())
+    if typecode is None:
+        return None
+    channels = wav.getnchannels()
+    stride = max(1, (window_frames * channels) // _SAMPLES_PER_WINDOW)
+    levels = []
+    wav.rewind()
+    while True:
+        data = wav.readframes(window_frames)
+        if not data:
+            break
+        samples = array.array(typecode)
+        samples.frombytes(data[: len(data) - len(data) % samples.itemsize])
+        if sys.byteorder == "big":
+            samples.byteswap()
+        picked = samples[::stride]
+        if typecode == "B":
+            picked = [s - 128 for s in picked]
+        levels.append(sum(map(abs, picked)) / max(1, len(picked)))
+    return levels
+
+
+def plan_segments(
+    total_frames: int,
+    framerate: int,
+    max_chunk_frames: int,
+    overlap_frames: int,
+    levels: Optional[List[float]],
+    window_frames: int,
+) -> List[Tuple[int, int]]:
+    """
+    Choose (start_frame, end_frame) ranges that cover the recording
+
+    Each chunk ends at the quietest window within the last few seconds before
+    its maximum length, and the next chunk starts overlap_frames earlier.
+    """
+    search_frames = min(int(_SILENCE_SEARCH_SECONDS * framerate), max_chunk_frames // 4)
+    segments = []
+    start = 0
+    while start < total_frames:
+        hard_end = start + max_chunk_frames
+        if hard_end >= total_frames:
+            segments.append((start, total_frames))
+            break
+
+        end = hard_end
+        if levels:
+            first = (hard_end - search_frames) // window_frames
+            last = min(hard_end // window_frames, len(levels))
+            if first < last:
+                quietest = min(range(first, last), key=lambda i: (levels[i], -i))
+                end = (quietest + 1) * window_frames
+
+        segments.append((start, end))
+        start = max(end - overlap_frames, start + 1)
+    return segments
+
+
+def split_wav(
+    path: Path,
+    out_dir: Path,
+    segment_seconds: float = None,
+    overlap_seconds: float = None,
+) -> List[Path]:
+    """
+    Split a WAV file into overlapping chunks cut at silence boundaries
+
+    Args:
+        path: Source WAV file
+        out_dir: Directory the chunk files are written to
+        segment_seconds: Target chunk length (defaults to WHISPER_SEGMENT_SECONDS)
+        overlap_seconds: Overlap between chunks (defaults to WHISPER_SEGMENT_OVERLAP)
+
+    Returns:
+        Chunk file paths in playback order (just [path] if no split is needed)
+    """
+    segment_seconds = WHISPER_SEGMENT_SECONDS if segment_seconds is None else segment_seconds
+    overlap_seconds = WHISPER_SEGMENT_OVERLAP if overlap_seconds is None else overlap_seconds
+
+    with wave.open(str(path), "rb") as wav:
+        params = wav.getparams()
+        framerate = params.framerate
+        frame_bytes = params.sampwidth * params.nchannels
+        total_frames = params.nframes
+
+        max_chunk_frames = min(int(segment_seconds * framerate), WHISPER_MAX_BYTES // frame_bytes)
+        if total_frames <= max_chunk_frames:
+            return [path]
+
+        overlap_frames = min(int(overlap_seconds * framerate), max_chunk_frames // 2)
+        window_frames = max(1, int(_WINDOW_SECONDS * framerate))
+        levels = _window_levels(wav, window_frames)
+        segments = plan_segments(
+            total_frames, framerate, max_chunk_frames, overlap_frames, levels, window_frames
+        )
+
+        chunks = []
+        for index, (start, end) in enumerate(segments):
+            chunk_path = out_dir / f"{path.stem}.part{index:03d}.wav"
+            wav.setpos(start)
+            with wave.open(str(chunk_path), "wb") as out:
+                out.setparams(params)
+                out.writeframes(wav.readframes(end - start))
+            chunks.append(chunk_path)
+        return chunks
+
+
+async def convert_to_wav(path: Path, out_dir: Path) -> Optional[Path]:
+    """Decode any ffmpeg-readable file to 16 kHz mono WAV; None if ffmpeg is unavailable or fails."""
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return None
+    target = out_dir / f"{path.stem}.wav"
+    process = await asyncio.create_subprocess_exec(
+        ffmpeg, "-nostdin", "-y", "-loglevel", "error", "-i", str(path), "-ac", "1", "-ar", "16000", str(target),
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    if await process.wait() != 0:
+        return None
+    return target
+
+
+def is_wav(path: Path) -> bool:
+    try:
+        with open(path, "rb") as f:
+            header = f.read(12)
+        return header[:4] == b"RIFF" and header[8:12] == b"WAVE"
+    except OSError:
+        return False
+
+
+_WORD = re.compile(r"[\w']+")
+
+
+def _norm_words(text: str) -> List[str]:
+    return [w.lower() for w in _WORD.findall(text)]
+
+
+def stitch_transcripts(texts: List[str], max_overlap_words: int = 40, min_overlap_words: int = 2) -> str:
+    """
+    Join chunk transcripts in order, dropping words repeated across an overlap
+
+    The longest run of words that ends the previous chunk and also starts the
+    next one (compared case- and punctuation-insensitively) is removed from
+    the next chunk. Runs shorter than min_overlap_words are kept, since a
+    single matching word is as likely to be a genuine repeat.
+    """
+    stitched = ""
+    for text in texts:
+        text = text.strip()
+        if not text:
+            continue
+        if not stitched:
+            stitched = text
+            continue
+
+        tail = _norm_words(stitched)[-max_overlap_words:]
+        head_tokens = list(_WORD.finditer(text))[:max_overlap_words]
+        head = [m.group(0).lower() for m in head_tokens]
+        overlap = 0
+        for size in range(min(len(tail), len(head)), min_overlap_words - 1, -1):
+            if tail[-size:] == head[:size]:
+                overlap = size
+                break
+
+        if overlap:
+            text = text[head_tokens[overlap - 1].end():].lstrip(" ,.;:!?-")
+        if text:
+            stitched = f"{stitched} {text}"
+    return stitched
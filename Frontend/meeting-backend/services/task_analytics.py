@@ -0,0 +1,379 @@
+import os
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models.task_counters import TASK_DURATION_MS, TASK_HAS_DURATION, rebuild_task_counters
+from . import metrics
+from .llm_cache import LRUCache
+
+metrics.describe("task_analytics_window_recomputes_total", "Recomputations of overdue / last-7-days task figures")
+
+MS_PER_DAY = 86400000
+
+# (day_start, counters version) -> (overdue, created_last_7, completed_last_7)
+_window_cache: Dict[str, any] = {"key": None, "value": None}
+_window_lock = threading.Lock()
+
+
+def _sqlite_timestamp(value: datetime) -> str:
+    """UTC 'YYYY-MM-DD HH:MM:SS', ordered the same as stored timestamps when compared as text."""
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _parses_before(deadline: str, day_start: datetime) -> bool:
+    try:
+        d = datetime.strptime(deadline, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        return d < day_start
+    except ValueError:
+        return False
+
+
+def _day_start(now: Optional[datetime]) -> datetime:
+    now = now or datetime.now(timezone.utc)
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _group_counts(db: Session) -> List[Tuple[str, str, str, int]]:
+    """(assignee, priority, board_column, tasks) straight from the tasks table."""
+    return [tuple(row) for row in db.execute(text("""
+        SELECT COALESCE(assignee, ''), COALESCE(priority, ''), COALESCE(board_column, ''), COUNT(*)
+        FROM tasks
+        GROUP BY 1, 2, 3
+    """)).all()]
+
+
+def _summarize_groups(groups) -> Dict[str, any]:
+    """
+    Totals and breakdowns from per-(assignee, priority, column) counts; names
+    are normalized here, on a handful of groups, exactly as the per-task loop
+    used to
+    """
+    total = 0
+    completed_count = 0
+    by_assignee: dict[str, dict[str, int]] = {}
+    by_priority: dict[str, int] = {}
+    by_column: dict[str, int] = {}
+    for assignee, priority, board_column, count in groups:
+        c = board_column or "todo"
+        done = count if c == "done" else 0
+        total += count
+        completed_count += done
+        key = (assignee or "").strip() or "Unassigned"
+        bucket = by_assignee.setdefault(key, {"total": 0, "completed": 0})
+        bucket["total"] += count
+        bucket["completed"] += done
+        p = priority or "medium"
+        by_priority[p] = by_priority.get(p, 0) + count
+        by_column[c] = by_column.get(c, 0) + count
+
+    completion_rate = (completed_count / total * 100.0) if total else 0.0
+    return {
+        "total_tasks": total,
+        "completed_tasks": completed_count,
+        "completion_rate": round(completion_rate, 1),
+        "active_tasks": total - completed_count,
+        "by_assignee": by_assignee,
+        "by_priority": by_priority,
+        "by_column": by_column,
+    }
+
+
+def _window_stats(db: Session, day_start: datetime) -> Tuple[int, int, int]:
+    """(overdue, created_last_7, completed_last_7), each answered from an index."""
+    seven_ago = _sqlite_timestamp(day_start - timedelta(days=7))
+
+    deadlines = db.execute(text("""
+        SELECT deadline, COUNT(*) FROM tasks
+        WHERE deadline IS NOT NULL AND deadline != '' AND COALESCE(board_column, '') != 'done'
+        GROUP BY deadline
+    """)).all()
+    overdue = sum(count for deadline, count in deadlines if _parses_before(deadline, day_start))
+
+    created_last_7 = db.execute(
+        text("SELECT COUNT(*) FROM tasks WHERE created_at >= :since"), {"since": seven_ago}
+    ).scalar()
+    completed_last_7 = db.execute(
+        text("SELECT COUNT(*) FROM tasks WHERE board_column = 'done' AND completed_at >= :since"),
+        {"since": seven_ago},
+    ).scalar()
+    return overdue, created_last_7, completed_last_7
+
+
+def _duration_totals(db: Session) -> Tuple[int, int]:
+    """(sum of completion times in ms, done tasks counted) straight from the tasks table."""
+    row = db.execute(text(f"""
+        SELECT COALESCE(SUM({TASK_DURATION_MS.format(row="tasks")}), 0),
+               COALESCE(SUM({TASK_HAS_DURATION.format(row="tasks")}), 0)
+        FROM tasks
+        WHERE board_column = 'done'
+    """)).one()
+    return row[0], row[1]
+
+
+def _assemble(groups, window: Tuple[int, int, int], duration_ms: int, durations: int) -> Dict[str, any]:
+    overdue, created_last_7, completed_last_7 = window
+    avg_days = (duration_ms / durations / MS_PER_DAY) if durations else None
+    return {
+        **_summarize_groups(groups),
+        "overdue_count": overdue,
+        "completed_last_7_days": completed_last_7,
+        "created_last_7_days": created_last_7,
+        "avg_days_to_complete": round(avg_days, 2) if avg_days is not None else None,
+    }
+
+
+def compute_task_analytics(db: Session, now: Optional[datetime] = None) -> Dict[str, any]:
+    """
+    Board-wide task statistics computed from scratch with SQL aggregates
+
+    Every query is answered from an index (see Task.__table_args__) without
+    loading task rows.
+
+    Returns:
+        Keyword arguments for TaskAnalyticsSummary
+    """
+    return _assemble(_group_counts(db), _window_stats(db, _day_start(now)), *_duration_totals(db))
+
+
+def task_analytics_snapshot(db: Session, now: Optional[datetime] = None) -> Dict[str, any]:
+    """
+    Board-wide task statistics served from the trigger-maintained counters
+
+    Totals, breakdowns and the average completion time are read from
+    task_group_counts / task_counter_totals. The date-dependent figures
+    (overdue, last 7 days) are recomputed only when the day rolls over or a
+    task changed since they were last computed.
+
+    Returns:
+        Keyword arguments for TaskAnalyticsSummary
+    """
+    totals = db.execute(
+        text("SELECT duration_ms, durations, version FROM task_counter_totals WHERE id = 1")
+    ).first()
+    if totals is None:
+        return compute_task_analytics(db, now)
+
+    groups = db.execute(
+        text("SELECT assignee, priority, board_column, tasks FROM task_group_counts WHERE tasks > 0")
+    ).all()
+
+    day_start = _day_start(now)
+    key = (day_start, totals.version)
+    with _window_lock:
+        window = _window_cache["value"] if _window_cache["key"] == key else None
+    if window is None:
+        window = _window_stats(db, day_start)
+        metrics.inc("task_analytics_window_recomputes_total")
+        with _window_lock:
+            _window_cache.update(key=key, value=window)
+
+    return _assemble(groups, window, totals.duration_ms, totals.durations)
+
+
+def verify_task_counters(db: Session, repair: bool = False) -> Dict[str, any]:
+    """
+    Compare the maintained counters with a from-scratch recount
+
+    Args:
+        db: Database session
+        repair: Rebuild the counters when drift is found
+
+    Returns:
+        Dictionary with 'consistent', 'drift' (one entry per mismatching
+        group or total, stored vs actual) and 'repaired'
+    """
+    actual_groups = {row[:3]: row[3] for row in _group_counts(db)}
+    stored_groups = {
+        tuple(row[:3]): row[3]
+        for row in db.execute(text(
+            "SELECT assignee, priority, board_column, tasks FROM task_group_counts WHERE tasks != 0"
+        )).all()
+    }
+    drift = [
+        {
+            "counter": "group",
+            "key": {"assignee": key[0], "priority": key[1], "board_column": key[2]},
+            "stored": stored_groups.get(key, 0),
+            "actual": actual_groups.get(key, 0),
+        }
+        for key in sorted(set(actual_groups) | set(stored_groups))
+        if stored_groups.get(key, 0) != actual_groups.get(key, 0)
+    ]
+
+    duration_ms, durations = _duration_totals(db)
+    totals = db.execute(text("SELECT duration_ms, durations FROM task_counter_totals WHERE id = 1")).first()
+    stored_ms, stored_count = (totals.duration_ms, totals.durations) if totals else (None, None)
+    if stored_ms != duration_ms:
+        drift.append({"counter": "duration_ms", "stored": stored_ms, "actual": duration_ms})
+    if stored_count != durations:
+        drift.append({"counter": "durations", "stored": stored_count, "actual": durations})
+
+    repaired = False
+    if drift:
+        print(f"⚠️ Task analytics counters drifted ({len(drift)} mismatch(es))")
+        if repair:
+            rebuild_task_counters(db)
+            db.commit()
+            repaired = True
+
+    return {"consistent": not drift, "drift": drift, "repaired": repaired}
+
+
+# Longest series one request may ask for
+SERIES_MAX_BUCKETS = int(os.getenv("SERIES_MAX_BUCKETS", "750"))
+SERIES_CACHE_ENTRIES = int(os.getenv("SERIES_CACHE_ENTRIES", "20000"))
+
+# SQLite expression for the first day of the bucket containing a timestamp
+# (weeks start on Monday)
+_BUCKET_START_SQL = {
+    "day": "date({col})",
+    "week": "date({col}, 'weekday 0', '-6 days')",
+    "month": "date({col}, 'start of month')",
+}
+
+# Buckets that ended before today only change when history_version moves
+# (see migrations.TASK_HISTORY_TRIGGERS), which is part of every key
+_series_cache = LRUCache(SERIES_CACHE_ENTRIES, float("inf"))
+
+
+def _bucket_floor(day: date, bucket: str) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(start: date, bucket: str) -> date:
+    if bucket == "week":
+        return start + timedelta(days=7)
+    if bucket == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def _bucket_counts(db: Session, bucket: str, lo: date, hi: date, where: str, params: dict) -> Dict[date, list]:
+    """bucket start -> [created, completed, cycle_ms, cycles] for buckets in [lo, hi)."""
+    bounds = {**params, "lo": lo.isoformat(), "hi": hi.isoformat()}
+    counts: Dict[date, list] = {}
+
+    created = db.execute(text(f"""
+        SELECT {_BUCKET_START_SQL[bucket].format(col="created_at")} AS b, COUNT(*)
+        FROM tasks
+        WHERE created_at >= :lo AND created_at < :hi {where}
+        GROUP BY b
+    """), bounds).all()
+    for b, count in created:
+        counts.setdefault(date.fromisoformat(b), [0, 0, 0, 0])[0] = count
+
+    completed = db.execute(text(f"""
+        SELECT {_BUCKET_START_SQL[bucket].format(col="completed_at")} AS b, COUNT(*),
+               COALESCE(SUM({TASK_DURATION_MS.format(row="tasks")}), 0),
+               COALESCE(SUM({TASK_HAS_DURATION.format(row="tasks")}), 0)
+        FROM tasks
+        WHERE board_column = 'done' AND completed_at >= :lo AND completed_at < :hi {where}
+        GROUP BY b
+    """), bounds).all()
+    for b, count, cycle_ms, cycles in completed:
+        entry = counts.setdefault(date.fromisoformat(b), [0, 0, 0, 0])
+        entry[1:] = [count, cycle_ms, cycles]
+    return counts
+
+
+def task_series(
+    db: Session,
+    bucket: str,
+    start: date,
+    end: date,
+    assignee: Optional[str] = None,
+    priority: Optional[str] = None,
+    note_id: Optional[int] = None,
+    today: Optional[date] = None,
+) -> Dict[str, any]:
+    """
+    Created / completed counts, open backlog and cycle time per bucket
+
+    Args:
+        db: Database session
+        bucket: "day", "week" or "month"
+        start: First day of the range (widened to its bucket start)
+        end: Day after the range (exclusive)
+        assignee, priority, note_id: Optional exact-match filters
+        today: Override of the current UTC date (buckets ending by it are cached)
+
+    Returns:
+        Keyword arguments for TaskSeriesResponse
+
+    Raises:
+        ValueError: if the range is empty or spans more than SERIES_MAX_BUCKETS
+    """
+    if end <= start:
+        raise ValueError("end must be after start")
+    starts = []
+    current = _bucket_floor(start, bucket)
+    while current < end:
+        starts.append(current)
+        if len(starts) > SERIES_MAX_BUCKETS:
+            raise ValueError(f"Range spans more than {SERIES_MAX_BUCKETS} {bucket} buckets")
+        current = _next_bucket(current, bucket)
+
+    filters, params = [], {}
+    if assignee:
+        filters.append("AND assignee = :assignee")
+        params["assignee"] = assignee
+    if priority:
+        filters.append("AND priority = :priority")
+        params["priority"] = priority
+    if note_id is not None:
+        filters.append("AND note_id = :note_id")
+        params["note_id"] = note_id
+    where = " ".join(filters)
+
+    today = today or datetime.now(timezone.utc).date()
+    history = db.execute(text("SELECT history_version FROM task_counter_totals WHERE id = 1")).scalar()
+    cacheable = history is not None
+    key_prefix = f"{bucket}|{assignee}|{priority}|{note_id}|{history}"
+
+    values: Dict[date, list] = {}
+    if cacheable:
+        for s in starts:
+            if _next_bucket(s, bucket) <= today:
+                hit = _series_cache.get(f"{key_prefix}|{s}")
+                if hit is not None:
+                    values[s] = hit
+    missing = [s for s in starts if s not in values]
+    if missing:
+        fresh = _bucket_counts(db, bucket, missing[0], _next_bucket(starts[-1], bucket), where, params)
+        for s in missing:
+            values[s] = fresh.get(s, [0, 0, 0, 0])
+            if cacheable and _next_bucket(s, bucket) <= today:
+                _series_cache.put(f"{key_prefix}|{s}", values[s])
+
+    # Open tasks at the start of the range; later buckets follow by running sum
+    opening_key = f"{key_prefix}|open|{starts[0]}"
+    backlog = _series_cache.get(opening_key) if cacheable and starts[0] <= today else None
+    if backlog is None:
+        backlog = db.execute(text(f"""
+            SELECT COUNT(*) FROM tasks
+            WHERE created_at < :t AND NOT (board_column = 'done' AND completed_at < :t) {where}
+        """), {**params, "t": starts[0].isoformat()}).scalar()
+        if cacheable and starts[0] <= today:
+            _series_cache.put(opening_key, backlog)
+
+    points = []
+    for s in starts:
+        created, completed, cycle_ms, cycles = values[s]
+        backlog += created - completed
+        points.append({
+            "bucket_start": s,
+            "created": created,
+            "completed": completed,
+            "backlog": backlog,
+            "avg_cycle_days": round(cycle_ms / cycles / MS_PER_DAY, 2) if cycles else None,
+        })
+
+    return {"bucket": bucket, "start": starts[0], "end": _next_bucket(starts[-1], bucket), "points": points}
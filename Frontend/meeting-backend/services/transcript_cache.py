@@ -0,0 +1,101 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from models import TranscriptCacheEntry
+from . import metrics
+
+# Entries kept before least-recently-used ones are evicted
+TRANSCRIPT_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "500"))
+# Entries not used for this many days are evicted
+TRANSCRIPT_CACHE_MAX_AGE_DAYS = float(os.getenv("TRANSCRIPT_CACHE_MAX_AGE_DAYS", "90"))
+
+metrics.describe("transcript_cache_hits_total", "Uploads whose audio hash matched a cached transcript")
+metrics.describe("transcript_cache_misses_total", "Uploads that had to be sent to Whisper")
+metrics.describe("transcript_cache_evictions_total", "Cached transcripts removed by size or age limits")
+metrics.describe("transcript_cache_entries", "Transcripts currently cached")
+
+
+def _cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(days=TRANSCRIPT_CACHE_MAX_AGE_DAYS)
+
+
+def _aware(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def get_cached_transcript(db: Session, audio_hash: str) -> Optional[str]:
+    """
+    Look up the raw transcript for an audio hash
+
+    Args:
+        db: Database session
+        audio_hash: Hex SHA-256 of the audio bytes
+
+    Returns:
+        The cached raw transcript, or None on a miss
+    """
+    entry = db.query(TranscriptCacheEntry).filter(TranscriptCacheEntry.audio_hash == audio_hash).first()
+    if entry is None or (entry.last_used_at and _aware(entry.last_used_at) < _cutoff()):
+        metrics.inc("transcript_cache_misses_total")
+        return None
+
+    entry.hit_count = (entry.hit_count or 0) + 1
+    entry.last_used_at = datetime.now(timezone.utc)
+    db.commit()
+    metrics.inc("transcript_cache_hits_total")
+    return entry.raw_transcript
+
+
+def store_transcript(db: Session, audio_hash: str, raw_transcript: str, byte_size: Optional[int] = None) -> None:
+    """Cache a raw transcript under its audio hash, then apply the eviction limits."""
+    entry = db.query(TranscriptCacheEntry).filter(TranscriptCacheEntry.audio_hash == audio_hash).first()
+    now = datetime.now(timezone.utc)
+    if entry is None:
+        db.add(TranscriptCacheEntry(
+            audio_hash=audio_hash,
+            raw_transcript=raw_transcript,
+            byte_size=byte_size,
+            hit_count=0,
+            created_at=now,
+            last_used_at=now,
+        ))
+    else:
+        entry.raw_transcript = raw_transcript
+        entry.last_used_at = now
+    db.commit()
+    evict_transcripts(db)
+
+
+def evict_transcripts(db: Session) -> int:
+    """Drop entries past the age limit, then the least recently used beyond the size limit."""
+    removed = (
+        db.query(TranscriptCacheEntry)
+        .filter(TranscriptCacheEntry.last_used_at < _cutoff())
+        .delete(synchronize_session=False)
+    )
+    overflow = db.query(TranscriptCacheEntry).count() - TRANSCRIPT_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        stale = (
+            db.query(TranscriptCacheEntry.audio_hash)
+            .order_by(TranscriptCacheEntry.last_used_at.asc())
+            .limit(overflow)
+            .subquery()
+        )
+        removed += (
+            db.query(TranscriptCacheEntry)
+            .filter(TranscriptCacheEntry.audio_hash.in_(stale.select()))
+            .delete(synchronize_session=False)
+        )
+    db.commit()
+    if removed:
+        metrics.inc("transcript_cache_evictions_total", removed)
+    return removed
+
+
+def transcript_cache_size(db: Session) -> int:
+    return db.query(TranscriptCacheEntry).count()
@@ -0,0 +1,154 @@
+import os
+import json
+import asyncio
+import hashlib
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import Note, Translation
+from .gpt_service import translate_text, translate_note_batch
+
+# Languages every new note is translated into in the background once /transcribe
+# finishes, e.g. "Hindi,Marathi"; empty disables pre-translation
+AUTO_TRANSLATE_LANGUAGES = [
+    lang.strip() for lang in os.getenv("AUTO_TRANSLATE_LANGUAGES", "").split(",") if lang.strip()
+]
+
+# Keeps references to fire-and-forget pre-translation tasks until they finish
+_background_tasks: Set[asyncio.Task] = set()
+
+
+def _source_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _language_key(language: str) -> str:
+    return language.strip().lower()
+
+
+def get_stored_translation(db: Session, note_id: int, field: str, target_language: str, source: str) -> Optional[str]:
+    """Stored translation of a note field for this exact source text, or None."""
+    row = (
+        db.query(Translation.content)
+        .filter(
+            Translation.note_id == note_id,
+            Translation.field == field,
+            Translation.target_language == _language_key(target_language),
+            Translation.source_hash == _source_hash(source),
+        )
+        .first()
+    )
+    return row[0] if row else None
+
+
+def save_translation(db: Session, note_id: int, field: str, target_language: str, source: str, content: str) -> None:
+    if get_stored_translation(db, note_id, field, target_language, source) is not None:
+        return
+    db.add(Translation(
+        note_id=note_id,
+        field=field,
+        target_language=_language_key(target_language),
+        source_hash=_source_hash(source),
+        content=content,
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Stored concurrently (e.g. by background pre-translation)
+        db.rollback()
+
+
+async def translate_summary(db: Session, note: Note, target_language: str, bypass_cache: bool = False) -> Dict[str, any]:
+    """
+    Translate a note summary, serving a stored translation when one exists
+
+    Returns:
+        Dictionary with 'translated_summary' and 'cached'
+    """
+    if not bypass_cache:
+        stored = get_stored_translation(db, note.id, "summary", target_language, note.summary)
+        if stored is not None:
+            return {"translated_summary": stored, "cached": True}
+
+    translated = await translate_text(note.summary, target_language, bypass_cache=bypass_cache)
+    save_translation(db, note.id, "summary", target_language, note.summary, translated)
+    return {"translated_summary": translated, "cached": False}
+
+
+async def translate_note(db: Session, note: Note, target_languages: List[str]) -> Dict[str, any]:
+    """
+    Translate a note's summary and key points into several languages
+
+    Stored translations are reused; every missing language is requested in a
+    single model call. Languages the batch reply gets wrong fall back to
+    per-text translate_text calls.
+
+    Returns:
+        Dictionary with 'translations' ({language: {'summary', 'key_points'}}),
+        'cached_languages' and 'translated_languages'
+    """
+    summary = note.summary or ""
+    key_points_source = note.key_points or "[]"
+    key_points = json.loads(key_points_source)
+
+    languages = list(dict.fromkeys(lang.strip() for lang in target_languages if lang.strip()))
+    translations = {}
+    missing = []
+    for language in languages:
+        stored_summary = get_stored_translation(db, note.id, "summary", language, summary)
+        stored_points = get_stored_translation(db, note.id, "key_points", language, key_points_source)
+        if stored_summary is not None and stored_points is not None:
+            translations[language] = {"summary": stored_summary, "key_points": json.loads(stored_points)}
+        else:
+            missing.append(language)
+
+    if missing:
+        try:
+            fresh = await translate_note_batch(summary, key_points, missing)
+        except Exception as e:
+            print(f"⚠️ Batch translation failed, translating per text: {e}")
+            fresh = {}
+        for language in missing:
+            if language not in fresh:
+                texts = await asyncio.gather(
+                    *(translate_text(text, language) for text in [summary, *key_points])
+                )
+                fresh[language] = {"summary": texts[0], "key_points": list(texts[1:])}
+            save_translation(db, note.id, "summary", language, summary, fresh[language]["summary"])
+            save_translation(
+                db, note.id, "key_points", language, key_points_source,
+                json.dumps(fresh[language]["key_points"], ensure_ascii=False),
+            )
+            translations[language] = fresh[language]
+
+    return {
+        "translations": {language: translations[language] for language in languages},
+        "cached_languages": [lang for lang in languages if lang not in missing],
+        "translated_languages": missing,
+    }
+
+
+async def _pretranslate(note_id: int, languages: List[str]) -> None:
+    db = SessionLocal()
+    try:
+        note = db.query(Note).filter(Note.id == note_id).first()
+        if note is None or not note.summary:
+            return
+        await translate_note(db, note, languages)
+        print(f"🌍 Pre-translated note {note_id} into {', '.join(languages)}")
+    except Exception as e:
+        print(f"⚠️ Pre-translation of note {note_id} failed: {e}")
+    finally:
+        db.close()
+
+
+def schedule_pretranslation(note_id: int) -> None:
+    """Translate a new note into AUTO_TRANSLATE_LANGUAGES without blocking the caller."""
+    if not AUTO_TRANSLATE_LANGUAGES:
+        return
+    task = asyncio.create_task(_pretranslate(note_id, AUTO_TRANSLATE_LANGUAGES))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
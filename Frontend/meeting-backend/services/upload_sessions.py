@@ -0,0 +1,422 @@
+import os
+import re
+import time
+import uuid
+import hashlib
+import asyncio
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiofiles.os
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.orm import Session
+
+from models import UploadSession, UploadChunk
+from . import metrics
+from .uploads import UPLOAD_DIR, UPLOAD_MAX_BYTES, UploadRejected, StoredUpload, write_range, commit_upload
+
+# Sessions (and their partial files) are dropped this long after their last chunk
+UPLOAD_SESSION_TTL_HOURS = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))
+# Largest byte range accepted in one PUT
+UPLOAD_MAX_CHUNK_BYTES = int(os.getenv("UPLOAD_MAX_CHUNK_BYTES", str(64 * 1024 * 1024)))
+# Chunk size suggested to clients when a session is created
+UPLOAD_CHUNK_BYTES = int(os.getenv("UPLOAD_CHUNK_BYTES", str(8 * 1024 * 1024)))
+
+metrics.describe("upload_sessions_created_total", "Resumable upload sessions created")
+metrics.describe("upload_sessions_finalized_total", "Resumable upload sessions finalized into a recording")
+metrics.describe("upload_sessions_expired_total", "Resumable upload sessions dropped after UPLOAD_SESSION_TTL_HOURS")
+metrics.describe("upload_session_chunks_total", "Chunks written into resumable upload sessions")
+metrics.describe("upload_session_chunk_failures_total", "Chunks refused as malformed, short or not matching their digest")
+metrics.describe("upload_session_finalize_seconds", "Time to verify and store a finalized upload session")
+
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+# Chunk writes in flight per session; finalize waits for none. Checked and
+# updated without awaiting in between, so it is race-free on the event loop.
+_writing: Dict[str, int] = {}
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _expiry() -> datetime:
+    return _now() + timedelta(hours=UPLOAD_SESSION_TTL_HOURS)
+
+
+def _part_path(session_id: str) -> Path:
+    return UPLOAD_DIR / ".incoming" / f"session-{session_id}.part"
+
+
+def _preallocate(path: Path, size: int) -> None:
+    # Sized up front so chunks can be written at their offsets in any order
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.truncate(size)
+
+
+async def _remove(path: Path) -> None:
+    try:
+        await aiofiles.os.remove(path)
+    except OSError:
+        pass
+
+
+def parse_content_range(header: Optional[str]) -> Tuple[int, int, int]:
+    """
+    Parse a chunk's Content-Range header
+
+    Returns:
+        Tuple of (start, end, total) with end exclusive
+
+    Raises:
+        UploadRejected: 400 if the header is missing or malformed
+    """
+    match = _CONTENT_RANGE.match((header or "").strip())
+    if not match:
+        raise UploadRejected(400, 'Expected a "Content-Range: bytes <first>-<last>/<total>" header')
+    first, last, total = (int(group) for group in match.groups())
+    if last < first:
+        raise UploadRejected(400, "Content-Range ends before it starts")
+    return first, last + 1, total
+
+
+def create_session(db: Session, filename: str, size: int, sha256: Optional[str] = None) -> UploadSession:
+    """
+    Start a resumable upload of a recording of known size
+
+    Args:
+        db: Database session
+        filename: Original filename of the recording
+        size: Total bytes that will be uploaded
+        sha256: Optional SHA-256 of the whole recording, checked on finalize
+
+    Returns:
+        The new session
+
+    Raises:
+        UploadRejected: 413 if size is over UPLOAD_MAX_BYTES, 400 if size
+            or sha256 is invalid
+    """
+    if size <= 0:
+        raise UploadRejected(400, "Upload size must be positive")
+    if size > UPLOAD_MAX_BYTES:
+        metrics.inc("uploads_rejected_total")
+        raise UploadRejected(413, f"Recording exceeds the {UPLOAD_MAX_BYTES} byte upload limit")
+    if sha256 is not None:
+        sha256 = sha256.lower()
+        if not _SHA256.match(sha256):
+            raise UploadRejected(400, "sha256 must be 64 hex characters")
+
+    # Creating a session is a good moment to drop abandoned ones
+    expire_sessions(db)
+
+    session = UploadSession(
+        id=uuid.uuid4().hex,
+        filename=Path(filename).name or "recording",
+        size=size,
+        sha256=sha256,
+        status="open",
+        expires_at=_expiry(),
+    )
+    _preallocate(_part_path(session.id), size)
+    db.add(session)
+    db.commit()
+    db.refresh(session)
+    metrics.inc("upload_sessions_created_total")
+    return session
+
+
+def get_session(db: Session, session_id: str) -> UploadSession:
+    """
+    Raises:
+        UploadRejected: 404 if the session doesn't exist or has expired
+    """
+    session = db.get(UploadSession, session_id)
+    if session is None or _aware(session.expires_at) <= _now():
+        raise UploadRejected(404, "Upload session not found or expired")
+    return session
+
+
+def _chunks(db: Session, session_id: str) -> List[UploadChunk]:
+    return (
+        db.query(UploadChunk)
+        .filter(UploadChunk.session_id == session_id)
+        .order_by(UploadChunk.start)
+        .all()
+    )
+
+
+def _covered(chunks: List[UploadChunk]) -> List[Tuple[int, int]]:
+    """Merge chunk ranges (sorted by start) into disjoint [start, end) runs."""
+    runs: List[Tuple[int, int]] = []
+    for chunk in chunks:
+        if runs and chunk.start <= runs[-1][1]:
+            runs[-1] = (runs[-1][0], max(runs[-1][1], chunk.end))
+        else:
+            runs.append((chunk.start, chunk.end))
+    return runs
+
+
+def _missing(runs: List[Tuple[int, int]], size: int) -> List[Tuple[int, int]]:
+    gaps = []
+    position = 0
+    for start, end in runs:
+        if start > position:
+            gaps.append((position, start))
+        position = max(position, end)
+    if position < size:
+        gaps.append((position, size))
+    return gaps
+
+
+def session_status(db: Session, session: UploadSession) -> Dict[str, any]:
+    """
+    Progress of an upload session
+
+    offset is the length of the unbroken prefix received so far, where a
+    client uploading sequentially resumes; missing lists every [start, end)
+    range still needed, for clients uploading chunks in parallel.
+    """
+    runs = _covered(_chunks(db, session.id))
+    offset = runs[0][1] if runs and runs[0][0] == 0 else 0
+    return {
+        "id": session.id,
+        "filename": session.filename,
+        "size": session.size,
+        "offset": offset,
+        "received": sum(end - start for start, end in runs),
+        "missing": [list(gap) for gap in _missing(runs, session.size)],
+        "status": session.status,
+        "chunk_size": UPLOAD_CHUNK_BYTES,
+        "expires_at": session.expires_at,
+    }
+
+
+async def write_chunk(
+    db: Session,
+    session: UploadSession,
+    content_range: Optional[str],
+    chunks: AsyncIterator[bytes],
+    chunk_sha256: Optional[str] = None,
+) -> Dict[str, any]:
+    """
+    Write one byte range of an upload in place
+
+    Ranges may arrive in any order and concurrently; a range sent again
+    (a retry) simply overwrites the same bytes.
+
+    Args:
+        db: Database session
+        session: An open upload session
+        content_range: The request's Content-Range header
+        chunks: The range's bytes as they arrive
+        chunk_sha256: Optional SHA-256 of the range, checked before it is recorded
+
+    Returns:
+        session_status after the write
+
+    Raises:
+        UploadRejected: 400 for a bad range, a body of the wrong length or
+            a digest mismatch (resend the chunk), 409 once the session is
+            being finalized, 413 for a range over UPLOAD_MAX_CHUNK_BYTES
+    """
+    if session.status != "open":
+        raise UploadRejected(409, "Upload session is being finalized")
+    _writing[session.id] = _writing.get(session.id, 0) + 1
+    try:
+        start, end, total = parse_content_range(content_range)
+        if total != session.size:
+            raise UploadRejected(400, f"Content-Range total {total} doesn't match the session size {session.size}")
+        if end > session.size:
+            raise UploadRejected(400, "Content-Range goes past the end of the upload")
+        if end - start > UPLOAD_MAX_CHUNK_BYTES:
+            raise UploadRejected(413, f"Chunks are limited to {UPLOAD_MAX_CHUNK_BYTES} bytes")
+
+        digest = await write_range(_part_path(session.id), start, chunks, end - start)
+        if chunk_sha256 and chunk_sha256.lower() != digest:
+            raise UploadRejected(400, "Chunk doesn't match its X-Chunk-SHA256")
+    except UploadRejected:
+        metrics.inc("upload_session_chunk_failures_total")
+        raise
+    finally:
+        _writing[session.id] -= 1
+        if not _writing[session.id]:
+            del _writing[session.id]
+
+    try:
+        db.merge(UploadChunk(session_id=session.id, start=start, end=end, sha256=digest))
+        session.expires_at = _expiry()
+        db.commit()
+    except (IntegrityError, StaleDataError):
+        # Deleted while the chunk was being written
+        db.rollback()
+        raise UploadRejected(404, "Upload session not found or expired")
+    metrics.inc("upload_session_chunks_total")
+    return session_status(db, session)
+
+
+def _verify_file(path: Path, chunks: List[Tuple[int, int, str]], size: int) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    Hash the assembled file in one sequential read, checking every chunk's
+    digest on the way
+
+    Returns:
+        Tuple of (SHA-256 of the file, [start, end) of chunks that no
+        longer match what was received)
+    """
+    whole = hashlib.sha256()
+    bad = []
+    with open(path, "rb") as f:
+        position = 0
+        while position < size:
+            block = f.read(min(1024 * 1024, size - position))
+            if not block:
+                break
+            whole.update(block)
+            position += len(block)
+        for start, end, expected in chunks:
+            f.seek(start)
+            digest = hashlib.sha256()
+            remaining = end - start
+            while remaining:
+                block = f.read(min(1024 * 1024, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                remaining -= len(block)
+            if digest.hexdigest() != expected:
+                bad.append((start, end))
+    return whole.hexdigest(), bad
+
+
+async def finalize_session(db: Session, session: UploadSession) -> StoredUpload:
+    """
+    Verify a complete upload and move it into content-addressed storage
+
+    The assembled file is renamed, not copied, so it becomes the stored
+    recording exactly as POST /transcribe would have stored it.
+
+    Returns:
+        The stored recording, ready for process_recording or the job queue
+
+    Raises:
+        UploadRejected: 409 if ranges are still missing or the session is
+            already being finalized; 422 if chunks were overwritten with
+            different bytes (they are dropped, resend them and finalize
+            again) or the file doesn't match the declared sha256 (the
+            session is discarded)
+        Exception: if the file can't be read or stored; the session is
+            reopened first, so finalize can be retried
+    """
+    started = time.perf_counter()
+    # Claim the session so concurrent finalize calls and late chunks are refused
+    claimed = db.execute(
+        update(UploadSession)
+        .where(UploadSession.id == session.id, UploadSession.status == "open")
+        .values(status="finalizing")
+    ).rowcount
+    db.commit()
+    if not claimed:
+        raise UploadRejected(409, "Upload session is already being finalized")
+    db.refresh(session)
+
+    def reopen() -> None:
+        session.status = "open"
+        session.expires_at = _expiry()
+        db.commit()
+
+    if session.id in _writing:
+        reopen()
+        raise UploadRejected(409, "Chunks are still being uploaded")
+
+    chunks = _chunks(db, session.id)
+    missing = _missing(_covered(chunks), session.size)
+    if missing:
+        reopen()
+        raise UploadRejected(409, f"Upload is incomplete, missing byte ranges {missing}")
+
+    path = _part_path(session.id)
+    try:
+        audio_hash, bad = await asyncio.to_thread(
+            _verify_file, path, [(c.start, c.end, c.sha256) for c in chunks], session.size
+        )
+    except Exception:
+        # e.g. an I/O error; reopened so the upload can be finalized again
+        db.rollback()
+        reopen()
+        raise
+    if bad:
+        for chunk in chunks:
+            if (chunk.start, chunk.end) in bad:
+                db.delete(chunk)
+        reopen()
+        raise UploadRejected(422, f"Byte ranges {bad} changed after they were received; upload them again")
+    if session.sha256 and session.sha256 != audio_hash:
+        await discard_session(db, session)
+        raise UploadRejected(422, "Upload doesn't match its declared sha256")
+
+    try:
+        stored = await commit_upload(path, audio_hash, session.size, session.filename)
+    except Exception:
+        db.rollback()
+        reopen()
+        raise
+    db.delete(session)
+    db.commit()
+    metrics.inc("upload_sessions_finalized_total")
+    metrics.observe("upload_session_finalize_seconds", time.perf_counter() - started)
+    print(f"📦 Upload session {session.id} finalized: {session.size} bytes, {len(chunks)} chunks")
+    return stored
+
+
+async def discard_session(db: Session, session: UploadSession) -> None:
+    """Drop a session, its chunk records and its partial file."""
+    await _remove(_part_path(session.id))
+    db.query(UploadChunk).filter(UploadChunk.session_id == session.id).delete()
+    db.delete(session)
+    db.commit()
+
+
+def expire_sessions(db: Session) -> int:
+    """
+    Drop sessions idle for UPLOAD_SESSION_TTL_HOURS, plus partial files
+    that no session owns (e.g. POST /transcribe uploads cut off by a crash)
+
+    Returns:
+        Number of sessions dropped
+    """
+    now = _now()
+    expired = db.query(UploadSession).filter(UploadSession.expires_at <= now).all()
+    for session in expired:
+        _part_path(session.id).unlink(missing_ok=True)
+        db.query(UploadChunk).filter(UploadChunk.session_id == session.id).delete()
+        db.delete(session)
+    db.commit()
+
+    incoming = UPLOAD_DIR / ".incoming"
+    if incoming.is_dir():
+        cutoff = time.time() - UPLOAD_SESSION_TTL_HOURS * 3600
+        for path in incoming.glob("*.part"):
+            try:
+                if path.stat().st_mtime < cutoff and not (
+                    path.name.startswith("session-") and db.get(UploadSession, path.name[8:-5])
+                ):
+                    path.unlink()
+            except OSError:
+                pass
+
+    if expired:
+        metrics.inc("upload_sessions_expired_total", len(expired))
+        print(f"🧹 Expired {len(expired)} upload session(s)")
+    return len(expired)
@@ -0,0 +1,263 @@
+import os
+import uuid
+import hashlib
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+from fastapi import Request
+from starlette.requests import ClientDisconnect
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+    from python_multipart.exceptions import MultipartParseError
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+    from multipart.exceptions import MultipartParseError
+
+from . import metrics
+
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "uploads"))
+UPLOAD_DIR.mkdir(exist_ok=True)
+
+# Largest recording accepted; bigger uploads are cut off with 413 as soon as they pass it
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(500 * 1024 * 1024)))
+# Received bytes are buffered up to this size per disk write
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+# Allowance for multipart boundaries and part headers in Content-Length
+_MULTIPART_OVERHEAD = 64 * 1024
+
+metrics.describe("uploads_total", "Recordings stored from uploads")
+metrics.describe("upload_bytes_total", "Bytes of recordings stored from uploads")
+metrics.describe("uploads_rejected_total", "Uploads refused as too large or malformed")
+metrics.describe("uploads_deduplicated_total", "Uploads whose bytes were already stored")
+
+
+class UploadRejected(Exception):
+    """An upload that can't be stored; status_code is the HTTP status to answer with."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class StoredUpload:
+    def __init__(self, path: Path, filename: str, audio_hash: str, size: int):
+        self.path = path
+        self.filename = filename
+        self.audio_hash = audio_hash
+        self.size = size
+
+
+def content_path(audio_hash: str, filename: str) -> Path:
+    """Where a recording with these bytes lives: UPLOAD_DIR/audio/<2 hex>/<sha256><ext>."""
+    suffix = Path(filename).suffix.lower()
+    if not (1 < len(suffix) <= 10 and suffix[1:].isalnum()):
+        suffix = ""
+    return UPLOAD_DIR / "audio" / audio_hash[:2] / f"{audio_hash}{suffix}"
+
+
+async def write_stream(chunks: AsyncIterator[bytes], max_bytes: int = UPLOAD_MAX_BYTES) -> Tuple[Path, str, int]:
+    """
+    Write a byte stream to a private temporary file without blocking the event loop
+
+    Args:
+        chunks: The bytes, in order, as they arrive
+        max_bytes: Size limit, enforced as bytes arrive
+
+    Returns:
+        Tuple of (temporary path, SHA-256 hex digest, size)
+
+    Raises:
+        UploadRejected: 413 once the stream passes max_bytes (the partial
+            file is removed, as on any other error)
+    """
+    incoming = UPLOAD_DIR / ".incoming"
+    await aiofiles.os.makedirs(incoming, exist_ok=True)
+    temp_path = incoming / f"{uuid.uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    buffer = bytearray()
+    try:
+        async with aiofiles.open(temp_path, "wb") as out:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadRejected(413, f"Recording exceeds the {max_bytes} byte upload limit")
+                digest.update(chunk)
+                buffer += chunk
+                if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                    await out.write(bytes(buffer))
+                    buffer.clear()
+            if buffer:
+                await out.write(bytes(buffer))
+    except BaseException:
+        try:
+            await aiofiles.os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return temp_path, digest.hexdigest(), size
+
+
+async def write_range(path: Path, offset: int, chunks: AsyncIterator[bytes], length: int) -> str:
+    """
+    Write a byte range into an existing file in place (concurrent calls may
+    write disjoint ranges of the same file)
+
+    Args:
+        path: Preallocated file to write into
+        offset: Position of the first byte
+        chunks: The range's bytes as they arrive
+        length: Exact number of bytes expected
+
+    Returns:
+        SHA-256 hex digest of the range
+
+    Raises:
+        UploadRejected: 400 if the stream is longer or shorter than length
+    """
+    digest = hashlib.sha256()
+    received = 0
+    buffer = bytearray()
+    async with aiofiles.open(path, "r+b") as out:
+        await out.seek(offset)
+        async for chunk in chunks:
+            received += len(chunk)
+            if received > length:
+                raise UploadRejected(400, f"Chunk body is longer than its {length} byte range")
+            digest.update(chunk)
+            buffer += chunk
+            if len(buffer) >= UPLOAD_CHUNK_SIZE:
+                await out.write(bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await out.write(bytes(buffer))
+    if received != length:
+        raise UploadRejected(400, f"Chunk body has {received} bytes, its range {length}")
+    return digest.hexdigest()
+
+
+async def commit_upload(temp_path: Path, audio_hash: str, size: int, filename: str) -> StoredUpload:
+    """
+    Move a written temporary file to its content-addressed path
+
+    Identical bytes always land on the same path, so concurrent uploads never
+    overwrite each other's recording, only replace it with the same content.
+    """
+    path = content_path(audio_hash, filename)
+    if await aiofiles.os.path.exists(path):
+        metrics.inc("uploads_deduplicated_total")
+    await aiofiles.os.makedirs(path.parent, exist_ok=True)
+    await aiofiles.os.replace(temp_path, path)
+    metrics.inc("uploads_total")
+    metrics.inc("upload_bytes_total", size)
+    return StoredUpload(path, filename, audio_hash, size)
+
+
+class _MultipartFile:
+    """Yields the bytes of one file field of a multipart/form-data request as they arrive."""
+
+    def __init__(self, request: Request, field: str):
+        self.request = request
+        self.field = field
+        self.filename: Optional[str] = None
+        self._pieces: List[bytes] = []
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._in_file = False
+        self._done = False
+
+    def _on_part_begin(self) -> None:
+        self._disposition = b""
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        self._in_file = not self._done and name == self.field and b"filename" in options
+        if self._in_file:
+            self.filename = Path(options[b"filename"].decode("utf-8", "replace")).name or "recording"
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._pieces.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._in_file:
+            self._in_file = False
+            self._done = True
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        _, params = parse_options_header(self.request.headers.get("content-type", ""))
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise UploadRejected(400, "Expected a multipart/form-data upload")
+        parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+        })
+        try:
+            async for data in self.request.stream():
+                parser.write(data)
+                pieces, self._pieces = self._pieces, []
+                for piece in pieces:
+                    yield piece
+            parser.finalize()
+        except MultipartParseError as e:
+            raise UploadRejected(400, f"Malformed multipart upload: {e}")
+        if not self._done:
+            raise UploadRejected(400, f'Missing "{self.field}" file field')
+
+
+async def receive_upload(request: Request, field: str = "file", max_bytes: int = UPLOAD_MAX_BYTES) -> StoredUpload:
+    """
+    Stream a multipart file upload straight to content-addressed storage
+
+    The body is parsed as it arrives rather than spooled first, so each
+    byte is written once, in UPLOAD_CHUNK_SIZE writes off the event loop,
+    and hashed on the way.
+
+    Args:
+        request: The multipart/form-data request
+        field: Form field holding the file
+        max_bytes: Size limit for the file
+
+    Returns:
+        The stored recording (path, original filename, SHA-256, size)
+
+    Raises:
+        UploadRejected: 413 when too large (checked against Content-Length
+            up front and again as bytes arrive), 400 when malformed or the
+            field is missing
+    """
+    length = request.headers.get("content-length", "")
+    try:
+        if length.isdigit() and int(length) > max_bytes + _MULTIPART_OVERHEAD:
+            raise UploadRejected(413, f"Recording exceeds the {max_bytes} byte upload limit")
+        upload = _MultipartFile(request, field)
+        temp_path, audio_hash, size = await write_stream(upload.chunks(), max_bytes)
+    except UploadRejected:
+        metrics.inc("uploads_rejected_total")
+        raise
+    except ClientDisconnect:
+        raise UploadRejected(400, "Upload interrupted")
+    return await commit_upload(temp_path, audio_hash, size, upload.filename)
@@ -1,26 +1,29 @@
 import os
-from openai import OpenAI
+import asyncio
+import tempfile
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional
+from openai import AsyncOpenAI
 from dotenv import load_dotenv
 
+from .segmenter import split_wav, convert_to_wav, is_wav, stitch_transcripts, WHISPER_SEGMENT_MIN_BYTES
+
 load_dotenv()
 
 # Initialize OpenAI client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Maximum chunk transcriptions in flight for one recording
+WHISPER_CONCURRENCY = int(os.getenv("WHISPER_CONCURRENCY", "4"))
 
-async def transcribe_audio(audio_file_path: str) -> str:
-    """
-    Transcribe audio file using OpenAI Whisper API
-    
-    Args:
-        audio_file_path: Path to the audio file
-        
-    Returns:
-        Transcribed text from the audio
-    """
+Transcriber = Callable[[str], Awaitable[str]]
+
+
+async def _transcribe_file(audio_file_path: str) -> str:
+    """Send a single file to the Whisper API."""
     try:
         with open(audio_file_path, "rb") as audio_file:
-            transcript = client.audio.transcriptions.create(
+            transcript = await client.audio.transcriptions.create(
                 model="whisper-1",
                 file=audio_file,
                 response_format="text"
@@ -30,3 +33,51 @@ async def transcribe_audio(audio_file_path: str) -> str:
     
     except Exception as e:
         raise Exception(f"Whisper transcription failed: {str(e)}")
+
+
+async def _segment(path: Path, work_dir: Path) -> List[Path]:
+    """Split a recording into chunk files, or return [path] when it is short enough."""
+    if is_wav(path):
+        return await asyncio.to_thread(split_wav, path, work_dir)
+    if path.stat().st_size > WHISPER_SEGMENT_MIN_BYTES:
+        wav_path = await convert_to_wav(path, work_dir)
+        if wav_path:
+            chunks = await asyncio.to_thread(split_wav, wav_path, work_dir)
+            if chunks != [wav_path]:
+                return chunks
+    return [path]
+
+
+async def transcribe_audio(
+    audio_file_path: str,
+    transcriber: Optional[Transcriber] = None,
+    concurrency: Optional[int] = None,
+) -> str:
+    """
+    Transcribe audio file using OpenAI Whisper API
+    
+    Long recordings are split into overlapping chunks at silence boundaries,
+    transcribed concurrently and stitched back together in order.
+    
+    Args:
+        audio_file_path: Path to the audio file
+        transcriber: Async callable used per chunk (defaults to the Whisper API)
+        concurrency: Chunks transcribed at once (defaults to WHISPER_CONCURRENCY)
+        
+    Returns:
+        Transcribed text from the audio
+    """
+    transcriber = transcriber or _transcribe_file
+    semaphore = asyncio.Semaphore(max(1, concurrency or WHISPER_CONCURRENCY))
+
+    async def run(chunk: Path) -> str:
+        async with semaphore:
+            return await transcriber(str(chunk))
+
+    with tempfile.TemporaryDirectory(prefix="echonotes-segments-") as work_dir:
+        chunks = await _segment(Path(audio_file_path), Path(work_dir))
+        if len(chunks) == 1:
+            return await run(chunks[0])
+        print(f"✂️ Transcribing {len(chunks)} segments of {Path(audio_file_path).name}")
+        texts = await asyncio.gather(*(run(chunk) for chunk in chunks))
+    return stitch_transcripts(texts)
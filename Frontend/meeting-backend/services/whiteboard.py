@@ -0,0 +1,221 @@
+import os
+import json
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from models import WhiteboardState, WhiteboardRevision
+from models.whiteboard import compress_xml, decompress_xml
+
+WHITEBOARD_ROW_ID = 1
+# A full snapshot at least every this many revisions, edit lists in between
+WHITEBOARD_SNAPSHOT_EVERY = int(os.getenv("WHITEBOARD_SNAPSHOT_EVERY", "20"))
+# Most recent revisions kept restorable
+WHITEBOARD_HISTORY_REVISIONS = int(os.getenv("WHITEBOARD_HISTORY_REVISIONS", "100"))
+
+
+class RevisionConflict(Exception):
+    """A save was based on a revision other than the current one."""
+
+    def __init__(self, current: int):
+        super().__init__(f"Whiteboard is at revision {current}")
+        self.current = current
+
+
+def _common_prefix(a: memoryview, b: memoryview) -> int:
+    # Binary search over slice comparisons keeps the byte scanning in C
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[:mid] == b[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix(a: memoryview, b: memoryview, limit: int) -> int:
+    lo, hi = 0, min(len(a), len(b), limit)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:] == b[len(b) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def diff_edits(old: str, new: str) -> List[Dict]:
+    """The single splice (common prefix / suffix kept) turning old into new, in UTF-16 offsets."""
+    a, b = memoryview(old.encode("utf-16-le")), memoryview(new.encode("utf-16-le"))
+    prefix = _common_prefix(a, b) // 2 * 2
+    suffix = _common_suffix(a, b, min(len(a), len(b)) - prefix) // 2 * 2
+    if prefix == len(a) == len(b):
+        return []
+    return [{
+        "at": prefix // 2,
+        "delete": (len(a) - prefix - suffix) // 2,
+        "insert": bytes(b[prefix:len(b) - suffix]).decode("utf-16-le", "surrogatepass"),
+    }]
+
+
+def apply_edits(xml: str, edits: List[Dict]) -> str:
+    """
+    Apply splice edits in order
+
+    Raises:
+        ValueError: if an edit falls outside the document or splits a
+            surrogate pair
+    """
+    data = bytearray(xml.encode("utf-16-le"))
+    for edit in edits:
+        at, delete = edit["at"], edit.get("delete", 0)
+        if at < 0 or delete < 0:
+            raise ValueError("Edit offsets must not be negative")
+        start, end = 2 * at, 2 * (at + delete)
+        if end > len(data):
+            raise ValueError(f"Edit at {edit['at']} is past the end of the diagram")
+        data[start:end] = edit.get("insert", "").encode("utf-16-le", "surrogatepass")
+    try:
+        return data.decode("utf-16-le")
+    except UnicodeDecodeError:
+        raise ValueError("Edits split a character")
+
+
+def load_whiteboard(db: Session) -> Optional[WhiteboardState]:
+    return db.get(WhiteboardState, WHITEBOARD_ROW_ID)
+
+
+def save_whiteboard_xml(
+    db: Session,
+    xml: Optional[str] = None,
+    base_revision: Optional[int] = None,
+    edits: Optional[List[Dict]] = None,
+    revision: Optional[int] = None,
+) -> Dict[str, any]:
+    """
+    Store a new whiteboard revision
+
+    Args:
+        db: Database session
+        xml: Full diagram XML (a PUT); diffed against the current revision for history
+        base_revision: Revision the client edited (If-Match), None to save unconditionally
+        edits: Splice edits to apply to the current XML instead of xml (a PATCH);
+            when xml is given too, they are only recorded as its history
+        revision: Number for the new revision (default: current + 1)
+
+    Returns:
+        Dictionary with the new 'revision', XML 'size' and 'updated_at'
+
+    Raises:
+        RevisionConflict: if base_revision is not the current revision,
+            including when another save lands first
+        ValueError: if the edits don't fit the current XML
+    """
+    row = load_whiteboard(db)
+    current = row.revision if row else 0
+    if base_revision is not None and base_revision != current:
+        raise RevisionConflict(current)
+
+    if edits is None:
+        edits = diff_edits(decompress_xml(row.diagram_gz) if row else "", xml)
+    elif xml is None:
+        xml = apply_edits(decompress_xml(row.diagram_gz) if row else "", edits)
+
+    if row is None:
+        row = WhiteboardState(id=WHITEBOARD_ROW_ID, diagram_xml="")
+        db.add(row)
+    row.diagram_gz = compress_xml(xml)
+    row.revision = revision or current + 1
+    try:
+        db.flush()
+    except StaleDataError:
+        db.rollback()
+        raise RevisionConflict(load_whiteboard(db).revision)
+
+    revision = row.revision
+    last_snapshot = db.query(func.max(WhiteboardRevision.revision)).filter(
+        WhiteboardRevision.board_id == WHITEBOARD_ROW_ID,
+        WhiteboardRevision.kind == "snapshot",
+    ).scalar()
+    snapshot = last_snapshot is None or revision - last_snapshot >= WHITEBOARD_SNAPSHOT_EVERY
+    db.add(WhiteboardRevision(
+        board_id=WHITEBOARD_ROW_ID,
+        revision=revision,
+        kind="snapshot" if snapshot else "delta",
+        data=row.diagram_gz if snapshot else compress_xml(json.dumps(edits)),
+        size=len(xml),
+    ))
+
+    # Drop revisions older than the window, keeping the snapshot the oldest
+    # retained delta is rebuilt from
+    cutoff = revision - WHITEBOARD_HISTORY_REVISIONS + 1
+    if cutoff > 1:
+        keep_from = db.query(func.max(WhiteboardRevision.revision)).filter(
+            WhiteboardRevision.board_id == WHITEBOARD_ROW_ID,
+            WhiteboardRevision.kind == "snapshot",
+            WhiteboardRevision.revision <= cutoff,
+        ).scalar()
+        if keep_from:
+            db.query(WhiteboardRevision).filter(
+                WhiteboardRevision.board_id == WHITEBOARD_ROW_ID,
+                WhiteboardRevision.revision < keep_from,
+            ).delete(synchronize_session=False)
+
+    db.commit()
+    db.refresh(row)
+    return {"revision": row.revision, "size": len(xml), "updated_at": row.updated_at}
+
+
+def whiteboard_revisions(db: Session) -> List[WhiteboardRevision]:
+    """Retained revisions, newest first (without their data)."""
+    return (
+        db.query(WhiteboardRevision.revision, WhiteboardRevision.kind, WhiteboardRevision.size, WhiteboardRevision.created_at)
+        .filter(WhiteboardRevision.board_id == WHITEBOARD_ROW_ID)
+        .order_by(WhiteboardRevision.revision.desc())
+        .all()
+    )
+
+
+def whiteboard_at_revision(db: Session, revision: int) -> Optional[str]:
+    """
+    Rebuild the diagram XML of a past revision from the nearest snapshot
+
+    Returns:
+        The XML, or None when the revision is not in the retained history
+    """
+    stored = db.query(WhiteboardRevision.revision).filter(
+        WhiteboardRevision.board_id == WHITEBOARD_ROW_ID,
+        WhiteboardRevision.revision == revision,
+    ).first()
+    if stored is None:
+        return None
+    base = (
+        db.query(WhiteboardRevision)
+        .filter(
+            WhiteboardRevision.board_id == WHITEBOARD_ROW_ID,
+            WhiteboardRevision.kind == "snapshot",
+            WhiteboardRevision.revision <= revision,
+        )
+        .order_by(WhiteboardRevision.revision.desc())
+        .first()
+    )
+    if base is None:
+        return None
+    deltas = (
+        db.query(WhiteboardRevision.data)
+        .filter(
+            WhiteboardRevision.board_id == WHITEBOARD_ROW_ID,
+            WhiteboardRevision.revision > base.revision,
+            WhiteboardRevision.revision <= revision,
+        )
+        .order_by(WhiteboardRevision.revision)
+        .all()
+    )
+
+    xml = decompress_xml(base.data)
+    for (data,) in deltas:
+        xml = apply_edits(xml, json.loads(decompress_xml(data)))
+    return xml
@@ -0,0 +1,329 @@
+import os
+import json
+import time
+import asyncio
+import itertools
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from fastapi import WebSocket
+
+from database import SessionLocal
+from models.whiteboard import decompress_xml
+from . import metrics
+from .whiteboard import RevisionConflict, apply_edits, load_whiteboard, save_whiteboard_xml
+
+# Quiet period after the last edit before the board is written to the database
+WHITEBOARD_PERSIST_DEBOUNCE_SECONDS = float(os.getenv("WHITEBOARD_PERSIST_DEBOUNCE_SECONDS", "2"))
+# Upper bound on how long edits stay unsaved while a board is edited continuously
+WHITEBOARD_PERSIST_MAX_DELAY_SECONDS = float(os.getenv("WHITEBOARD_PERSIST_MAX_DELAY_SECONDS", "10"))
+# Longest wait between retries of a failed save (the wait doubles from the debounce)
+WHITEBOARD_PERSIST_RETRY_MAX_SECONDS = float(os.getenv("WHITEBOARD_PERSIST_RETRY_MAX_SECONDS", "60"))
+# Outgoing messages buffered per client before a slow client is disconnected
+WHITEBOARD_CLIENT_QUEUE = int(os.getenv("WHITEBOARD_CLIENT_QUEUE", "256"))
+
+metrics.describe("whiteboard_ws_clients", "Connected whiteboard WebSocket clients")
+metrics.describe("whiteboard_edits_total", "Whiteboard edits accepted over WebSocket")
+metrics.describe("whiteboard_edits_rejected_total", "WebSocket edits refused for a stale base revision")
+metrics.describe("whiteboard_fanout_seconds", "Time from accepting an edit to it being sent to one client")
+metrics.describe("whiteboard_persist_total", "Whiteboard database writes from WebSocket sessions")
+metrics.describe("whiteboard_slow_clients_total", "WebSocket clients dropped for a full send buffer")
+
+_client_ids = itertools.count(1)
+
+T = TypeVar("T")
+
+
+class _Client:
+    def __init__(self, websocket: WebSocket):
+        self.id = next(_client_ids)
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=WHITEBOARD_CLIENT_QUEUE)
+        self.writer: Optional[asyncio.Task] = None
+
+
+class BoardSession:
+    """
+    Live state of one board while clients are connected
+
+    base_xml / base_revision are what the database holds; pending are the
+    edits accepted since, which turn base_xml into xml at revision. A session
+    outlives its last client until its pending edits are saved.
+    """
+
+    def __init__(self, board_id: int, xml: str, revision: int):
+        self.board_id = board_id
+        self.base_xml = xml
+        self.base_revision = revision
+        self.xml = xml
+        self.revision = revision
+        self.pending: List[Dict] = []
+        self.clients: Dict[int, _Client] = {}
+        self.lock = asyncio.Lock()
+        self.first_pending_at = 0.0
+        self.last_edit_at = 0.0
+        self.timer: Optional[asyncio.Task] = None
+        self.failures = 0
+        self.retry_at = 0.0
+
+
+def _load(board_id: int) -> BoardSession:
+    db = SessionLocal()
+    try:
+        row = load_whiteboard(db)
+        if row is None:
+            return BoardSession(board_id, "", 0)
+        return BoardSession(board_id, decompress_xml(row.diagram_gz), row.revision)
+    finally:
+        db.close()
+
+
+def _store(session: BoardSession, edits: List[Dict]) -> None:
+    db = SessionLocal()
+    try:
+        save_whiteboard_xml(
+            db, xml=session.xml, edits=edits, base_revision=session.base_revision, revision=session.revision,
+        )
+    finally:
+        db.close()
+
+
+class WhiteboardHub:
+    """
+    In-memory collaboration hub for whiteboard WebSocket clients
+
+    Edits are applied to the board in memory, numbered, and fanned out to
+    every client (the sender's copy doubles as its ack) through per-client
+    queues, so one slow socket never delays the others. The database row is
+    written once edits go quiet for WHITEBOARD_PERSIST_DEBOUNCE_SECONDS (or
+    after WHITEBOARD_PERSIST_MAX_DELAY_SECONDS of continuous editing), when
+    the last client leaves, and before any HTTP read or write of the board.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[int, BoardSession] = {}
+        self._lock = asyncio.Lock()
+
+    def _client_count(self) -> int:
+        return sum(len(s.clients) for s in self._sessions.values())
+
+    async def join(self, board_id: int, websocket: WebSocket) -> _Client:
+        """Register a connected socket and send it the saved board plus the edits made since."""
+        client = _Client(websocket)
+        async with self._lock:
+            session = self._sessions.get(board_id)
+            if session is None:
+                session = await asyncio.to_thread(_load, board_id)
+                self._sessions[board_id] = session
+            async with session.lock:
+                session.clients[client.id] = client
+                client.writer = asyncio.create_task(self._writer(session, client))
+                self._send(session, client, {
+                    "type": "snapshot",
+                    "client": client.id,
+                    "revision": session.base_revision,
+                    "xml": session.base_xml,
+                    "deltas": session.pending,
+                })
+        metrics.set_gauge("whiteboard_ws_clients", self._client_count())
+        return client
+
+    async def leave(self, board_id: int, client: _Client) -> None:
+        """Drop a client; the last one out saves the board and, once that succeeds, ends the session."""
+        async with self._lock:
+            session = self._sessions.get(board_id)
+            if session is None:
+                return
+            session.clients.pop(client.id, None)
+            if client.queue.full():
+                client.writer.cancel()
+            else:
+                client.queue.put_nowait(None)
+            if not session.clients:
+                if session.timer:
+                    session.timer.cancel()
+                    session.timer = None
+                await self._persist(session)
+                # A failed save has re-armed the timer, which ends the session once it succeeds
+                if not session.pending:
+                    del self._sessions[board_id]
+        metrics.set_gauge("whiteboard_ws_clients", self._client_count())
+
+    async def edit(self, board_id: int, client: _Client, message: Dict) -> None:
+        """
+        Apply a client's {"type": "edit", "base", "edits", "id"} message
+
+        An edit computed against an older revision is refused with a
+        "reject" naming the current one; the client rebases on the edits
+        it has been sent since and retries.
+        """
+        session = self._sessions.get(board_id)
+        if session is None:
+            return
+        async with session.lock:
+            if message.get("base") != session.revision:
+                metrics.inc("whiteboard_edits_rejected_total")
+                self._send(session, client, {"type": "reject", "id": message.get("id"), "revision": session.revision})
+                return
+            edits = message.get("edits") or []
+            try:
+                session.xml = apply_edits(session.xml, edits)
+            except (ValueError, KeyError, TypeError) as e:
+                self._send(session, client, {"type": "error", "id": message.get("id"), "detail": str(e)})
+                return
+
+            session.revision += 1
+            now = time.monotonic()
+            if not session.pending:
+                session.first_pending_at = now
+            session.last_edit_at = now
+            session.pending.append({"revision": session.revision, "edits": edits})
+            metrics.inc("whiteboard_edits_total")
+
+            update = json.dumps({
+                "type": "edit",
+                "revision": session.revision,
+                "edits": edits,
+                "client": client.id,
+                "id": message.get("id"),
+            })
+            for other in list(session.clients.values()):
+                self._send(session, other, update)
+            if session.timer is None:
+                session.timer = asyncio.create_task(self._persist_later(session))
+
+    async def flush(self, board_id: int) -> None:
+        """Write a live board's pending edits now (before the board is read or written over HTTP)."""
+        session = self._sessions.get(board_id)
+        if session is not None:
+            await self._persist(session)
+
+    async def save_over(self, board_id: int, save: Callable[[], T]) -> T:
+        """
+        Run an HTTP save of a board while its live edits are held off
+
+        Pending edits are written first (so If-Match sees the latest
+        revision), then save() runs and every client is resent the saved
+        board. The session lock is held throughout, so no edit can be
+        accepted on the pre-save board and then lost.
+
+        Returns:
+            Whatever save() returns; its exceptions propagate
+        """
+        session = self._sessions.get(board_id)
+        if session is None:
+            return save()
+        async with session.lock:
+            await self._write_pending(session)
+            result = save()
+            self._reset(session, await asyncio.to_thread(_load, board_id))
+            return result
+
+    async def stop(self) -> None:
+        for session in list(self._sessions.values()):
+            if session.timer:
+                session.timer.cancel()
+            await self._persist(session)
+            if session.timer:
+                session.timer.cancel()
+
+    def _reset(self, session: BoardSession, fresh: BoardSession) -> None:
+        """Replace live state with what the database holds and resend it to every client (lock held)."""
+        session.base_xml = session.xml = fresh.xml
+        session.base_revision = session.revision = fresh.revision
+        session.pending = []
+        session.failures = 0
+        for client in list(session.clients.values()):
+            self._send(session, client, {
+                "type": "snapshot", "client": client.id, "revision": session.revision, "xml": session.xml, "deltas": [],
+            })
+
+    def _send(self, session: BoardSession, client: _Client, message) -> None:
+        """Queue a message (dict, or JSON text already encoded for a broadcast) for one client."""
+        text = message if isinstance(message, str) else json.dumps(message)
+        try:
+            client.queue.put_nowait((text, time.perf_counter()))
+        except asyncio.QueueFull:
+            # Too far behind to catch up from deltas; it reconnects for a snapshot
+            metrics.inc("whiteboard_slow_clients_total")
+            session.clients.pop(client.id, None)
+            client.writer.cancel()
+
+    async def _writer(self, session: BoardSession, client: _Client) -> None:
+        try:
+            while True:
+                item = await client.queue.get()
+                if item is None:
+                    break
+                text, queued_at = item
+                await client.websocket.send_text(text)
+                metrics.observe("whiteboard_fanout_seconds", time.perf_counter() - queued_at)
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            session.clients.pop(client.id, None)
+        finally:
+            try:
+                await client.websocket.close()
+            except Exception:
+                pass
+
+    async def _persist_later(self, session: BoardSession) -> None:
+        try:
+            while True:
+                due = min(
+                    session.last_edit_at + WHITEBOARD_PERSIST_DEBOUNCE_SECONDS,
+                    session.first_pending_at + WHITEBOARD_PERSIST_MAX_DELAY_SECONDS,
+                )
+                delay = max(due, session.retry_at) - time.monotonic()
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+            session.timer = None
+            await self._persist(session)
+            if not session.pending:
+                await self._end_if_idle(session)
+        except asyncio.CancelledError:
+            pass
+
+    async def _end_if_idle(self, session: BoardSession) -> None:
+        """Drop a session left open by a failed save once every client is gone and it is saved."""
+        async with self._lock:
+            if not session.clients and not session.pending and self._sessions.get(session.board_id) is session:
+                del self._sessions[session.board_id]
+
+    async def _persist(self, session: BoardSession) -> None:
+        async with session.lock:
+            await self._write_pending(session)
+
+    async def _write_pending(self, session: BoardSession) -> None:
+        """Save the accepted edits to the database (lock held)."""
+        if not session.pending:
+            return
+        edits = [edit for delta in session.pending for edit in delta["edits"]]
+        try:
+            await asyncio.to_thread(_store, session, edits)
+        except RevisionConflict:
+            # Saved by something outside this hub; its version wins
+            print(f"⚠️ Whiteboard {session.board_id} changed outside the live session; reloading")
+            self._reset(session, await asyncio.to_thread(_load, session.board_id))
+            return
+        except Exception as e:
+            # Keep the edits and try again, backing off while the database stays unavailable
+            session.failures += 1
+            delay = min(
+                WHITEBOARD_PERSIST_DEBOUNCE_SECONDS * 2 ** min(session.failures - 1, 16),
+                WHITEBOARD_PERSIST_RETRY_MAX_SECONDS,
+            )
+            session.retry_at = time.monotonic() + delay
+            print(f"❌ Whiteboard {session.board_id} save failed, retrying in {delay:g}s: {e}")
+            if session.timer is None:
+                session.timer = asyncio.create_task(self._persist_later(session))
+            return
+        metrics.inc("whiteboard_persist_total")
+        session.failures = 0
+        session.base_xml = session.xml
+        session.base_revision = session.revision
+        session.pending = []
+
+
+whiteboard_hub = WhiteboardHub()
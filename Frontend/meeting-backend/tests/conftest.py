@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# database.py and services read their configuration at import time, so
+# point them at a throwaway database and upload dir before anything imports them
+_work_dir = tempfile.mkdtemp(prefix="echonotes-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_work_dir}/test.db"
+os.environ["UPLOAD_DIR"] = os.path.join(_work_dir, "uploads")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
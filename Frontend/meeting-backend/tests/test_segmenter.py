@@ -0,0 +1,124 @@
+import array
+import asyncio
+import math
+import wave
+from pathlib import Path
+
+import pytest
+
+from services import segmenter
+from services.segmenter import split_wav, stitch_transcripts
+from services.whisper_service import transcribe_audio
+
+RATE = 16000
+SECONDS = 60
+SEGMENT_SECONDS = 20
+OVERLAP_SECONDS = 1
+# Half-second pauses, one inside the silence search window of each cut
+GAPS = [(17.0, 17.5), (34.0, 34.5), (50.0, 50.5)]
+# A "word" every quarter second, so every overlap repeats several of them
+WORD_SECONDS = 0.25
+
+
+def _write_wav(path: Path) -> None:
+    samples = array.array("h")
+    for frame in range(SECONDS * RATE):
+        t = frame / RATE
+        silent = any(start <= t < end for start, end in GAPS)
+        samples.append(0 if silent else int(8000 * math.sin(2 * math.pi * 440 * t)))
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(RATE)
+        wav.writeframes(samples.tobytes())
+
+
+def _words_between(start: float, end: float) -> str:
+    """The stub transcript of [start, end): every word whose midpoint falls inside."""
+    count = int(SECONDS / WORD_SECONDS)
+    return " ".join(
+        f"w{i:03d}" for i in range(count) if start <= (i + 0.5) * WORD_SECONDS < end
+    )
+
+
+@pytest.fixture
+def recording(tmp_path, monkeypatch):
+    monkeypatch.setattr(segmenter, "WHISPER_SEGMENT_SECONDS", SEGMENT_SECONDS)
+    monkeypatch.setattr(segmenter, "WHISPER_SEGMENT_OVERLAP", OVERLAP_SECONDS)
+    path = tmp_path / "meeting.wav"
+    _write_wav(path)
+    return path
+
+
+def _frames(path: Path) -> int:
+    with wave.open(str(path), "rb") as wav:
+        return wav.getnframes()
+
+
+def _chunk_spans(chunks):
+    """(start, end) in seconds of each chunk, from chunk lengths and the fixed overlap."""
+    spans = []
+    start = 0
+    for chunk in chunks:
+        end = start + _frames(chunk)
+        spans.append((start / RATE, end / RATE))
+        start = end - OVERLAP_SECONDS * RATE
+    return spans
+
+
+def test_split_cuts_inside_silent_gaps(recording, tmp_path):
+    out_dir = tmp_path / "chunks"
+    out_dir.mkdir()
+    chunks = split_wav(recording, out_dir)
+
+    spans = _chunk_spans(chunks)
+    assert len(spans) == len(GAPS) + 1
+    for (_, end), (gap_start, gap_end) in zip(spans, GAPS):
+        assert gap_start <= end <= gap_end
+    assert spans[-1][1] == SECONDS
+    for (_, end), (start, _) in zip(spans, spans[1:]):
+        assert end - start == pytest.approx(OVERLAP_SECONDS)
+    assert all((end - start) <= SEGMENT_SECONDS for start, end in spans)
+
+
+@pytest.mark.parametrize("concurrency", [1, 2, 4])
+def test_transcribe_keeps_order_and_drops_overlap(recording, concurrency):
+    started = []
+    finished = []
+    in_flight = 0
+    peak = 0
+
+    async def transcriber(chunk_path: str) -> str:
+        nonlocal in_flight, peak
+        chunk = Path(chunk_path)
+        siblings = sorted(chunk.parent.glob(f"{recording.stem}.part*.wav"))
+        index = siblings.index(chunk)
+        start, end = _chunk_spans(siblings)[index]
+        started.append(index)
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Earlier chunks take longest, so chunks finish in reverse order
+        await asyncio.sleep(0.02 * (len(siblings) - index))
+        in_flight -= 1
+        finished.append(index)
+        return _words_between(start, end)
+
+    transcript = asyncio.run(transcribe_audio(str(recording), transcriber=transcriber, concurrency=concurrency))
+
+    assert transcript == _words_between(0, SECONDS)
+    assert len(transcript.split()) == len(set(transcript.split()))
+    assert sorted(finished) == list(range(len(GAPS) + 1))
+    assert peak == min(concurrency, len(GAPS) + 1)
+    if concurrency > 1:
+        assert finished != sorted(finished)
+
+
+def test_stitch_ignores_case_and_punctuation_in_overlap():
+    assert stitch_transcripts(["We will send the report.", "send the Report, then close."]) == (
+        "We will send the report. then close."
+    )
+
+
+def test_stitch_keeps_single_word_repeats():
+    assert stitch_transcripts(["Yes", "yes we agree"]) == "Yes yes we agree"
+    assert stitch_transcripts(["", "only text", "  "]) == "only text"
@@ -0,0 +1,210 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from database import SessionLocal, init_db
+from models import Note, Task
+from services.task_analytics import compute_task_analytics, task_analytics_snapshot, verify_task_counters
+
+NOW = datetime(2026, 3, 15, 14, 30, tzinfo=timezone.utc)
+
+ASSIGNEES = [None, "", "   ", "Alice", " Alice ", "alice", "Bob", "Carol Danvers"]
+PRIORITIES = [None, "", "low", "medium", "high", "urgent"]
+COLUMNS = [None, "", "todo", "in_progress", "review", "done"]
+
+
+def reference_analytics(db, now: datetime):
+    """The per-task Python loop /tasks/analytics/summary used before the SQL aggregates."""
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    seven_ago = day_start - timedelta(days=7)
+
+    def aware(dt: datetime) -> datetime:
+        if dt.tzinfo is None:
+            return dt.replace(tzinfo=timezone.utc)
+        return dt
+
+    def is_overdue(t: Task) -> bool:
+        if (t.board_column or "") == "done" or not t.deadline:
+            return False
+        try:
+            d = datetime.strptime(t.deadline, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            return d < day_start
+        except ValueError:
+            return False
+
+    tasks = db.query(Task).all()
+    total = len(tasks)
+    done = [t for t in tasks if (t.board_column or "todo") == "done"]
+
+    by_assignee: dict[str, dict[str, int]] = {}
+    by_priority: dict[str, int] = {}
+    by_column: dict[str, int] = {}
+    for t in tasks:
+        key = (t.assignee or "").strip() or "Unassigned"
+        bucket = by_assignee.setdefault(key, {"total": 0, "completed": 0})
+        bucket["total"] += 1
+        if (t.board_column or "todo") == "done":
+            bucket["completed"] += 1
+        p = t.priority or "medium"
+        by_priority[p] = by_priority.get(p, 0) + 1
+        c = t.board_column or "todo"
+        by_column[c] = by_column.get(c, 0) + 1
+
+    durations = []
+    for t in done:
+        if t.completed_at and t.created_at:
+            delta = (aware(t.completed_at) - aware(t.created_at)).total_seconds() / 86400.0
+            if delta >= 0:
+                durations.append(delta)
+    avg_days = sum(durations) / len(durations) if durations else None
+
+    return {
+        "total_tasks": total,
+        "completed_tasks": len(done),
+        "completion_rate": round((len(done) / total * 100.0) if total else 0.0, 1),
+        "active_tasks": total - len(done),
+        "overdue_count": sum(1 for t in tasks if is_overdue(t)),
+        "by_assignee": by_assignee,
+        "by_priority": by_priority,
+        "by_column": by_column,
+        "completed_last_7_days": sum(
+            1 for t in tasks
+            if (t.board_column or "") == "done" and t.completed_at and aware(t.completed_at) >= seven_ago
+        ),
+        "created_last_7_days": sum(1 for t in tasks if t.created_at and aware(t.created_at) >= seven_ago),
+        "avg_days_to_complete": round(avg_days, 2) if avg_days is not None else None,
+    }
+
+
+@pytest.fixture(scope="module", autouse=True)
+def schema():
+    init_db()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    session.query(Task).delete()
+    session.query(Note).delete()
+    session.commit()
+    yield session
+    session.close()
+
+
+def _moment(rng: random.Random) -> datetime:
+    # Whole seconds, so the old float-seconds and new integer-millisecond averages agree exactly
+    return (NOW - timedelta(seconds=rng.randint(-3 * 86400, 40 * 86400))).replace(microsecond=0)
+
+
+def _deadline(rng: random.Random):
+    roll = rng.random()
+    if roll < 0.15:
+        return None
+    if roll < 0.2:
+        return ""
+    if roll < 0.25:
+        return rng.choice(["soon", "2026-13-40", "15/03/2026"])
+    return (NOW + timedelta(days=rng.randint(-20, 20))).strftime("%Y-%m-%d")
+
+
+def _completed_at(rng: random.Random, created_at: datetime):
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    roll = rng.random()
+    if roll < 0.3:
+        return None
+    if roll < 0.4:
+        # Completed "before" it was created: excluded from the average
+        return created_at - timedelta(seconds=rng.randint(1, 86400))
+    return min(created_at + timedelta(seconds=rng.randint(0, 20 * 86400)), NOW)
+
+
+def _random_task(rng: random.Random, note_id: int) -> Task:
+    created_at = _moment(rng)
+    return Task(
+        note_id=note_id,
+        task=f"task {rng.random()}",
+        deadline=_deadline(rng),
+        status="pending",
+        priority=rng.choice(PRIORITIES),
+        assignee=rng.choice(ASSIGNEES),
+        board_column=rng.choice(COLUMNS),
+        completed_at=_completed_at(rng, created_at),
+        created_at=created_at,
+    )
+
+
+def _seed(db, rng: random.Random, notes: int = 8, tasks: int = 400) -> None:
+    note_ids = []
+    for i in range(notes):
+        note = Note(filename=f"meeting-{i}.webm", raw_transcript="t", transcript="t", summary="s", key_points="[]")
+        db.add(note)
+        db.flush()
+        note_ids.append(note.id)
+    for _ in range(tasks):
+        db.add(_random_task(rng, rng.choice(note_ids)))
+    # A few rows keep the server-default created_at format
+    for _ in range(10):
+        db.add(Task(note_id=rng.choice(note_ids), task="default timestamps", board_column=rng.choice(COLUMNS)))
+    db.commit()
+
+
+def _mutate(db, rng: random.Random, rounds: int = 300) -> None:
+    for _ in range(rounds):
+        ids = [row[0] for row in db.execute(text("SELECT id FROM tasks")).all()]
+        if not ids:
+            return
+        task = db.get(Task, rng.choice(ids))
+        roll = rng.random()
+        if roll < 0.1:
+            db.delete(task)
+        elif roll < 0.35:
+            task.board_column = rng.choice(COLUMNS)
+            task.completed_at = _completed_at(rng, task.created_at) if task.board_column == "done" else task.completed_at
+        elif roll < 0.5:
+            task.assignee = rng.choice(ASSIGNEES)
+        elif roll < 0.65:
+            task.priority = rng.choice(PRIORITIES)
+        elif roll < 0.8:
+            task.deadline = _deadline(rng)
+        elif roll < 0.9:
+            task.completed_at = _completed_at(rng, task.created_at)
+        else:
+            db.add(_random_task(rng, task.note_id))
+        db.commit()
+    # Deleting a note cascades to its tasks through the foreign key
+    note_ids = [row[0] for row in db.execute(text("SELECT id FROM notes")).all()]
+    db.delete(db.get(Note, rng.choice(note_ids)))
+    db.commit()
+
+
+def _assert_equivalent(db) -> None:
+    expected = reference_analytics(db, NOW)
+    assert compute_task_analytics(db, NOW) == expected
+    assert task_analytics_snapshot(db, NOW) == expected
+    report = verify_task_counters(db)
+    assert report["consistent"], report["drift"]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_aggregates_match_reference_on_random_tasks(db, seed):
+    rng = random.Random(seed)
+    _seed(db, rng)
+    _assert_equivalent(db)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_counters_stay_consistent_through_updates_and_deletes(db, seed):
+    rng = random.Random(1000 + seed)
+    _seed(db, rng)
+    _assert_equivalent(db)
+    _mutate(db, rng)
+    db.expire_all()
+    _assert_equivalent(db)
+
+
+def test_empty_board(db):
+    _assert_equivalent(db)
+    assert compute_task_analytics(db, NOW)["avg_days_to_complete"] is None
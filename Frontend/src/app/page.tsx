@@ -36,6 +36,9 @@ interface ProcessingResult {
   language?: string;
 }
 
+// Recordings above this are uploaded in resumable chunks instead of one request
+const RESUMABLE_UPLOAD_BYTES = 8 * 1024 * 1024;
+
 const MOCK_RESULT: ProcessingResult = {
   note_id: 99999,
   filename: "Weekly_Sync_Demo.webm",
@@ -61,7 +64,7 @@ export default function HomePage() {
   const [activeTab, setActiveTab] = useState<"record" | "upload" | null>(null);
   const [scrollTrigger, setScrollTrigger] = useState(0);
   const [mode, setMode] = useState<RecorderMode>("mic");
-  const { recording, start, stop } = useBrowserRecorder("audio/webm");
+  const { recording, start, stop, liveTranscript, liveStage, liveAnalysis, finishLive } = useBrowserRecorder("audio/webm", { live: true });
   const [audioUrl, setAudioUrl] = useState<string | null>(null);
   const [uploadedFile, setUploadedFile] = useState<File | null>(null);
   const [status, setStatus] = useState<string>("Idle");
@@ -77,7 +80,7 @@ export default function HomePage() {
     if (result) {
       setStatus("Complete");
     } else if (processing) {
-      setStatus("Processing...");
+      setStatus(liveStage === "analyze" ? "Analyzing with GPT..." : "Processing...");
     } else if (audioUrl) {
       setStatus("Ready to process");
     } else if (recording) {
@@ -85,7 +88,7 @@ export default function HomePage() {
     } else {
       setStatus("Idle");
     }
-  }, [audioUrl, recording, processing, result]);
+  }, [audioUrl, recording, processing, result, liveStage]);
 
   // Listen for sidebar record button
   useEffect(() => {
@@ -129,7 +132,15 @@ export default function HomePage() {
     const url = URL.createObjectURL(blob);
     setAudioUrl(url);
     setUploadedFile(null);
-    setStatus("Ready to process");
+    // Transcribed while recording; only the analysis is left. Without a live
+    // note the recording stays ready for a regular upload.
+    setProcessing(true);
+    try {
+      const note = await finishLive();
+      if (note) setResult(note);
+    } finally {
+      setProcessing(false);
+    }
   };
 
   const onUploadClick = () => {
@@ -169,8 +180,15 @@ export default function HomePage() {
           { type: "audio/webm" }
         );
       }
-      setStatus("Transcribing with Whisper...");
-      const response = await apiClient.transcribeAudio(fileToUpload);
+      let response;
+      if (fileToUpload.size > RESUMABLE_UPLOAD_BYTES) {
+        response = await apiClient.transcribeAudioResumable(fileToUpload, (fraction) =>
+          setStatus(fraction < 1 ? `Uploading audio... ${Math.round(fraction * 100)}%` : "Transcribing with Whisper...")
+        );
+      } else {
+        setStatus("Transcribing with Whisper...");
+        response = await apiClient.transcribeAudio(fileToUpload);
+      }
       setStatus("Analyzing with GPT...");
       setResult(response.data);
       setStatus("Complete");
@@ -290,6 +308,22 @@ export default function HomePage() {
                       </button>
                     )}
                   </div>
+                  {recording && liveTranscript && (
+                    <p className="max-w-2xl mx-auto max-h-40 overflow-y-auto text-sm leading-relaxed text-neutral-400 bg-black/30 border border-white/5 rounded-2xl p-4">
+                      {liveTranscript}
+                    </p>
+                  )}
+                  {recording && liveAnalysis?.summary && (
+                    <div className="max-w-2xl mx-auto space-y-2 text-sm text-neutral-300 bg-indigo-500/5 border border-indigo-500/20 rounded-2xl p-4">
+                      <p className="text-xs font-semibold uppercase tracking-wider text-indigo-300">Summary so far</p>
+                      <p className="leading-relaxed">{liveAnalysis.summary}</p>
+                      {liveAnalysis.tasks.length > 0 && (
+                        <ul className="list-disc pl-5 text-neutral-400">
+                          {liveAnalysis.tasks.map((t, i) => <li key={i}>{t.task}{t.deadline ? ` (${t.deadline})` : ""}</li>)}
+                        </ul>
+                      )}
+                    </div>
+                  )}
                 </div>
               )}
               {audioUrl && (
@@ -62,12 +62,15 @@ export default function VoiceCommandPanel({ noteId }: VoiceCommandPanelProps) {
             const commandText = transcribeResponse.data.transcript;
             setCommand(commandText);
 
-            // Now send the command to the voice-command endpoint
-            const commandResponse = await apiClient.processVoiceCommand(commandText, noteId);
-            setResponse(commandResponse.data.response);
+            // Now stream the answer from the voice-command endpoint as it is generated
+            setResponse("");
+            const answer = await apiClient.streamVoiceCommand(commandText, noteId, (delta) =>
+                setResponse((prev) => prev + delta)
+            );
+            setResponse(answer);
 
             // Optionally speak the response
-            speakResponse(commandResponse.data.response);
+            speakResponse(answer);
         } catch (error: any) {
             console.error("Failed to process command:", error);
             setResponse("Sorry, I couldn't process that command.");
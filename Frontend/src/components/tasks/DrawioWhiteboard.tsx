@@ -12,6 +12,37 @@ const EMPTY_DIAGRAM = `<mxfile host="app.diagrams.net"><diagram name="Page-1" id
 
 type JsonMsg = { event?: string; xml?: string; error?: string; format?: string };
 
+type Edit = { at: number; delete: number; insert: string };
+
+type SocketMsg =
+  | { type: "snapshot"; client: number; revision: number; xml: string; deltas: { revision: number; edits: Edit[] }[] }
+  | { type: "edit"; client: number; revision: number; edits: Edit[]; id?: string }
+  | { type: "reject"; revision: number; id?: string }
+  | { type: "error"; detail: string; id?: string };
+
+function applyEdits(xml: string, edits: Edit[]) {
+  for (const e of edits) xml = xml.slice(0, e.at) + e.insert + xml.slice(e.at + e.delete);
+  return xml;
+}
+
+/** The single splice turning `prev` into `next` (common prefix and suffix kept). */
+function spliceEdit(prev: string, next: string) {
+  let start = 0;
+  const max = Math.min(prev.length, next.length);
+  while (start < max && prev.charCodeAt(start) === next.charCodeAt(start)) start++;
+  let end = 0;
+  while (
+    end < max - start &&
+    prev.charCodeAt(prev.length - 1 - end) === next.charCodeAt(next.length - 1 - end)
+  )
+    end++;
+  return {
+    at: start,
+    delete: prev.length - start - end,
+    insert: next.slice(start, next.length - end),
+  };
+}
+
 export default function DrawioWhiteboard() {
   const iframeRef = useRef<HTMLIFrameElement>(null);
   const [diagramXml, setDiagramXml] = useState<string>("");
@@ -19,12 +50,28 @@ export default function DrawioWhiteboard() {
   const [saving, setSaving] = useState(false);
   const [status, setStatus] = useState<string>("");
   const saveTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+  // Last XML the server confirmed, and its revision: saves send only the
+  // difference from it and are refused if another tab saved in between
+  const savedXml = useRef<string>("");
+  const revision = useRef<number>(0);
+  // Live session: edits go over the socket, one in flight at a time, and
+  // other clients' edits arrive in revision order
+  const socket = useRef<WebSocket | null>(null);
+  const clientId = useRef<number>(0);
+  const localXml = useRef<string>("");
+  const inFlight = useRef(false);
+  const editSeq = useRef(0);
 
   const loadFromServer = useCallback(async () => {
     setLoading(true);
     try {
       const res = await apiClient.getWhiteboard();
-      const xml = (res.data as { diagram_xml?: string }).diagram_xml || "";
+      const data = res.data as { diagram_xml?: string; revision?: number };
+      // The live snapshot, if it already arrived, is at least as new
+      if (clientId.current) return;
+      const xml = data.diagram_xml || "";
+      savedXml.current = localXml.current = xml;
+      revision.current = data.revision ?? 0;
       setDiagramXml(xml);
     } catch {
       setDiagramXml("");
@@ -33,10 +80,6 @@ export default function DrawioWhiteboard() {
     }
   }, []);
 
-  useEffect(() => {
-    loadFromServer();
-  }, [loadFromServer]);
-
   const postToIframe = useCallback((payload: object) => {
     iframeRef.current?.contentWindow?.postMessage(
       JSON.stringify(payload),
@@ -44,6 +87,105 @@ export default function DrawioWhiteboard() {
     );
   }, []);
 
+  const pushLocal = useCallback(() => {
+    const ws = socket.current;
+    if (!ws || inFlight.current || localXml.current === savedXml.current) return;
+    inFlight.current = true;
+    setSaving(true);
+    ws.send(
+      JSON.stringify({
+        type: "edit",
+        base: revision.current,
+        edits: [spliceEdit(savedXml.current, localXml.current)],
+        id: String(++editSeq.current),
+      })
+    );
+  }, []);
+
+  useEffect(() => {
+    const ws = new WebSocket(apiClient.whiteboardSocketUrl());
+    ws.onopen = () => {
+      socket.current = ws;
+    };
+    ws.onmessage = (e) => {
+      const msg = JSON.parse(e.data) as SocketMsg;
+      if (msg.type === "snapshot") {
+        const xml = msg.deltas.reduce((x, d) => applyEdits(x, d.edits), msg.xml);
+        clientId.current = msg.client;
+        revision.current = msg.deltas.length
+          ? msg.deltas[msg.deltas.length - 1].revision
+          : msg.revision;
+        inFlight.current = false;
+        if (xml !== savedXml.current) {
+          savedXml.current = localXml.current = xml;
+          setDiagramXml(xml);
+          postToIframe({ action: "merge", xml });
+        }
+        setSaving(false);
+      } else if (msg.type === "edit") {
+        savedXml.current = applyEdits(savedXml.current, msg.edits);
+        revision.current = msg.revision;
+        if (msg.client === clientId.current) {
+          inFlight.current = false;
+          setSaving(false);
+          setStatus("Saved");
+          pushLocal();
+        } else {
+          postToIframe({ action: "merge", xml: savedXml.current });
+        }
+      } else {
+        // Rejected (someone else's edit landed first) or invalid: re-diff
+        // against the state the earlier messages brought us to
+        inFlight.current = false;
+        setSaving(false);
+        if (msg.type === "error") setStatus("Save failed");
+        else pushLocal();
+      }
+    };
+    ws.onclose = () => {
+      if (socket.current === ws) socket.current = null;
+      inFlight.current = false;
+    };
+    return () => ws.close();
+  }, [postToIframe, pushLocal]);
+
+  const persist = useCallback(
+    async (xml: string) => {
+      localXml.current = xml;
+      if (socket.current) {
+        pushLocal();
+        return;
+      }
+      if (xml === savedXml.current) return;
+      setSaving(true);
+      try {
+        const res = savedXml.current
+          ? await apiClient.patchWhiteboard(
+              [spliceEdit(savedXml.current, xml)],
+              revision.current
+            )
+          : await apiClient.saveWhiteboard(xml, revision.current);
+        savedXml.current = xml;
+        revision.current = (res.data as { revision: number }).revision;
+        setStatus("Saved");
+      } catch (err) {
+        if ((err as { response?: { status?: number } }).response?.status === 412) {
+          setStatus("Changed in another tab — reloaded the latest version");
+          await loadFromServer();
+        } else {
+          setStatus("Save failed");
+        }
+      } finally {
+        setSaving(false);
+      }
+    },
+    [loadFromServer, pushLocal]
+  );
+
+  useEffect(() => {
+    loadFromServer();
+  }, [loadFromServer]);
+
   const sendLoad = useCallback(() => {
     const xml = diagramXml.trim() ? diagramXml : EMPTY_DIAGRAM;
     postToIframe({
@@ -73,44 +215,16 @@ export default function DrawioWhiteboard() {
         setStatus("");
       }
       if (msg.event === "export" && msg.xml) {
-        (async () => {
-          setSaving(true);
-          try {
-            await apiClient.saveWhiteboard(msg.xml!);
-            setStatus("Saved");
-          } catch {
-            setStatus("Save failed");
-          } finally {
-            setSaving(false);
-          }
-        })();
+        persist(msg.xml);
       }
       if (msg.event === "autosave" && msg.xml) {
         if (saveTimer.current) clearTimeout(saveTimer.current);
-        saveTimer.current = setTimeout(async () => {
-          setSaving(true);
-          try {
-            await apiClient.saveWhiteboard(msg.xml!);
-            setStatus("Saved");
-          } catch {
-            setStatus("Save failed");
-          } finally {
-            setSaving(false);
-          }
-        }, 1200);
+        const xml = msg.xml;
+        // Live sessions share edits quickly; plain HTTP saves are batched
+        saveTimer.current = setTimeout(() => persist(xml), socket.current ? 300 : 1200);
       }
       if (msg.event === "save" && msg.xml) {
-        (async () => {
-          setSaving(true);
-          try {
-            await apiClient.saveWhiteboard(msg.xml!);
-            setStatus("Saved");
-          } catch {
-            setStatus("Save failed");
-          } finally {
-            setSaving(false);
-          }
-        })();
+        persist(msg.xml);
       }
     };
     window.addEventListener("message", onMessage);
@@ -118,7 +232,7 @@ export default function DrawioWhiteboard() {
       window.removeEventListener("message", onMessage);
       if (saveTimer.current) clearTimeout(saveTimer.current);
     };
-  }, [sendLoad]);
+  }, [sendLoad, persist]);
 
   const requestExportSave = () => {
     postToIframe({ action: "export", format: "xmlsvg" });
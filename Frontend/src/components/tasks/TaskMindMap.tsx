@@ -89,11 +89,16 @@ export default function TaskMindMap({
   }, [activeTasks, setNodes]);
 
   const onNodeDragStop = useCallback(
-    async (_: unknown, node: Node) => {
+    async (_: unknown, node: Node, dragged: Node[]) => {
+      // Dragging a selection moves every selected node; save them together
+      const moved = dragged?.length ? dragged : [node];
       try {
-        await apiClient.updateTask(Number(node.id), {
-          position_x: node.position.x,
-          position_y: node.position.y,
+        await apiClient.bulkUpdateTasks({
+          update: moved.map((n) => ({
+            id: Number(n.id),
+            position_x: n.position.x,
+            position_y: n.position.y,
+          })),
         });
         onUpdate();
       } catch (e) {
@@ -1,13 +1,116 @@
 // src/hooks/useBrowserRecorder.ts
 import { useRef, useState } from "react";
 import { getSystemAudioStream } from "@/utils/system-audio";
+import { apiClient, NoteResponse } from "@/lib/api";
 
 export type RecorderMode = "mic" | "system";
 
-export function useBrowserRecorder(defaultMime: string = "audio/webm") {
+// Live mode: a new self-contained segment every LIVE_SEGMENT_MS, streamed in LIVE_TIMESLICE_MS chunks
+const LIVE_SEGMENT_MS = 30_000;
+const LIVE_TIMESLICE_MS = 5_000;
+// Consecutive segments both record this long so words on the cut aren't lost (the server drops the repeat)
+const LIVE_OVERLAP_MS = 1_500;
+
+interface LiveSegment {
+  rec: MediaRecorder;
+  pending: Blob[];
+  streaming: boolean;
+}
+
+export interface LiveAnalysis {
+  segments: number;
+  summary: string;
+  key_points: string[];
+  tasks: Array<{ task: string; deadline: string | null }>;
+}
+
+interface SegmentHandoff {
+  rec: MediaRecorder;
+  timer: ReturnType<typeof setTimeout>;
+  done: Promise<void>;
+}
+
+export function useBrowserRecorder(defaultMime: string = "audio/webm", options: { live?: boolean } = {}) {
   const mediaRef = useRef<MediaRecorder | null>(null);
   const chunksRef = useRef<Blob[]>([]);
   const [recording, setRecording] = useState(false);
+  const [liveTranscript, setLiveTranscript] = useState("");
+  const [liveStage, setLiveStage] = useState<string | null>(null);
+  // Running summary and tasks, updated as each transcribed segment is analyzed
+  const [liveAnalysis, setLiveAnalysis] = useState<LiveAnalysis | null>(null);
+  const socketRef = useRef<WebSocket | null>(null);
+  const segmentRef = useRef<LiveSegment | null>(null);
+  const rotateRef = useRef<ReturnType<typeof setInterval> | null>(null);
+  const handoffRef = useRef<SegmentHandoff | null>(null);
+  const noteRef = useRef<Promise<NoteResponse | null> | null>(null);
+
+  const openSocket = () =>
+    new Promise<WebSocket | null>((resolve) => {
+      const ws = new WebSocket(apiClient.liveTranscribeUrl());
+      ws.onopen = () => resolve(ws);
+      ws.onerror = () => resolve(null);
+    });
+
+  // Each segment is its own MediaRecorder so every segment file the server gets is playable on its own
+  const startSegment = (stream: MediaStream, ws: WebSocket) => {
+    const segment: LiveSegment = {
+      rec: new MediaRecorder(stream, { mimeType: defaultMime }),
+      pending: [],
+      streaming: segmentRef.current === null,
+    };
+    segment.rec.ondataavailable = (e) => {
+      if (!e.data.size || ws.readyState !== WebSocket.OPEN) return;
+      if (segment.streaming) ws.send(e.data);
+      else segment.pending.push(e.data);
+    };
+    const previous = segmentRef.current;
+    segment.rec.start(LIVE_TIMESLICE_MS);
+    segmentRef.current = segment;
+    if (!previous) return;
+
+    // Chunks of the new segment wait until the previous one has been sent and closed
+    const done = new Promise<void>((resolve) => {
+      previous.rec.onstop = () => {
+        if (ws.readyState === WebSocket.OPEN) {
+          ws.send(JSON.stringify({ type: "segment" }));
+          segment.pending.forEach((chunk) => ws.send(chunk));
+        }
+        segment.pending = [];
+        segment.streaming = true;
+        resolve();
+      };
+    });
+    const timer = setTimeout(() => previous.rec.stop(), LIVE_OVERLAP_MS);
+    handoffRef.current = { rec: previous.rec, timer, done };
+  };
+
+  const startLive = async (stream: MediaStream) => {
+    const ws = await openSocket();
+    // Without the socket the recording is still kept for a regular upload
+    if (!ws) return;
+    socketRef.current = ws;
+    segmentRef.current = null;
+    setLiveTranscript("");
+    setLiveStage(null);
+    setLiveAnalysis(null);
+    noteRef.current = new Promise((resolve) => {
+      ws.onmessage = (event) => {
+        const message = JSON.parse(event.data);
+        if (message.type === "partial") setLiveTranscript(message.transcript);
+        else if (message.type === "analysis") setLiveAnalysis(message as LiveAnalysis);
+        else if (message.type === "stage") setLiveStage(message.status === "running" ? message.stage : null);
+        else if (message.type === "note") resolve(message as NoteResponse);
+        else if (message.type === "error") {
+          console.error("Live transcription:", message.detail);
+          resolve(null);
+        }
+      };
+      ws.onclose = () => resolve(null);
+    });
+    ws.send(JSON.stringify({ type: "start", filename: "live_recording.webm", mime: defaultMime }));
+    startSegment(stream, ws);
+    rotateRef.current = setInterval(() => startSegment(stream, ws), LIVE_SEGMENT_MS);
+  };
 
   const start = async (mode: RecorderMode = "mic") => {
     let stream: MediaStream;
@@ -32,19 +135,48 @@ export function useBrowserRecorder(defaultMime: string = "audio/webm") {
     };
     rec.start();
     mediaRef.current = rec;
+    noteRef.current = null;
+    if (options.live) await startLive(stream);
     setRecording(true);
   };
 
+  const stopLive = async () => {
+    if (rotateRef.current) clearInterval(rotateRef.current);
+    rotateRef.current = null;
+    const ws = socketRef.current;
+    const segment = segmentRef.current;
+    socketRef.current = null;
+    segmentRef.current = null;
+    if (!ws || !segment) return;
+    const handoff = handoffRef.current;
+    handoffRef.current = null;
+    if (handoff) {
+      clearTimeout(handoff.timer);
+      if (handoff.rec.state !== "inactive") handoff.rec.stop();
+      await handoff.done;
+    }
+    await new Promise<void>((resolve) => {
+      segment.rec.onstop = () => resolve();
+      segment.rec.stop();
+    });
+    if (ws.readyState === WebSocket.OPEN) ws.send(JSON.stringify({ type: "stop" }));
+  };
+
   const stop = async () => {
     const rec = mediaRef.current;
     if (!rec) return null;
+    await stopLive();
     await new Promise<void>((resolve) => {
       rec.onstop = () => resolve();
       rec.stop();
     });
+    rec.stream.getTracks().forEach((t) => t.stop());
     setRecording(false);
     return new Blob(chunksRef.current, { type: rec.mimeType });
   };
 
-  return { recording, start, stop };
+  // Resolves with the note assembled from the live stream, or null when there was none
+  const finishLive = async () => (noteRef.current ? noteRef.current : null);
+
+  return { recording, start, stop, liveTranscript, liveStage, liveAnalysis, finishLive };
 }
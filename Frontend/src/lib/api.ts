@@ -18,6 +18,92 @@ export interface NoteResponse {
     created_at: string;
 }
 
+// Walks a keyset-paginated list endpoint (next page cursor in X-Next-Cursor)
+async function fetchAllPages<T = any>(path: string, params: Record<string, unknown> = {}) {
+    const items: T[] = [];
+    let cursor: string | undefined;
+    do {
+        const res = await api.get<T[]>(path, { params: { ...params, limit: 200, cursor } });
+        items.push(...res.data);
+        cursor = res.headers["x-next-cursor"] || undefined;
+    } while (cursor);
+    return { data: items };
+}
+
+export interface UploadSession {
+    id: string;
+    size: number;
+    offset: number;
+    received: number;
+    missing: Array<[number, number]>;
+    chunk_size: number;
+}
+
+// Chunks of a resumable upload sent at once
+const UPLOAD_PARALLEL_CHUNKS = 4;
+const UPLOAD_CHUNK_ATTEMPTS = 3;
+
+async function sha256Hex(data: ArrayBuffer) {
+    if (!globalThis.crypto?.subtle) return undefined;
+    const digest = await crypto.subtle.digest("SHA-256", data);
+    return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, "0")).join("");
+}
+
+// Session ids survive a reload, so picking the same file again resumes where it stopped
+const uploadKey = (file: File) => `echonotes-upload:${file.name}:${file.size}:${file.lastModified}`;
+
+async function openUploadSession(file: File) {
+    const saved = localStorage.getItem(uploadKey(file));
+    if (saved) {
+        try {
+            return (await api.get<UploadSession>(`/uploads/${saved}`)).data;
+        } catch {
+            localStorage.removeItem(uploadKey(file));
+        }
+    }
+    const res = await api.post<UploadSession>("/uploads", { filename: file.name, size: file.size });
+    localStorage.setItem(uploadKey(file), res.data.id);
+    return res.data;
+}
+
+async function putChunk(session: UploadSession, file: File, start: number, end: number) {
+    const body = await file.slice(start, end).arrayBuffer();
+    const checksum = await sha256Hex(body);
+    for (let attempt = 1; ; attempt++) {
+        try {
+            return await api.put(`/uploads/${session.id}`, body, {
+                headers: {
+                    "Content-Type": "application/octet-stream",
+                    "Content-Range": `bytes ${start}-${end - 1}/${file.size}`,
+                    ...(checksum ? { "X-Chunk-SHA256": checksum } : {}),
+                },
+            });
+        } catch (e: any) {
+            const status = e.response?.status;
+            if (attempt >= UPLOAD_CHUNK_ATTEMPTS || status === 404 || status === 409 || status === 413) throw e;
+        }
+    }
+}
+
+// Sends the missing ranges of a session, UPLOAD_PARALLEL_CHUNKS at a time
+async function uploadMissing(session: UploadSession, file: File, onProgress?: (fraction: number) => void) {
+    const chunks: Array<[number, number]> = [];
+    for (const [start, end] of session.missing) {
+        for (let at = start; at < end; at += session.chunk_size) chunks.push([at, Math.min(at + session.chunk_size, end)]);
+    }
+    let sent = session.received;
+    let next = 0;
+    const worker = async () => {
+        while (next < chunks.length) {
+            const [start, end] = chunks[next++];
+            await putChunk(session, file, start, end);
+            sent += end - start;
+            onProgress?.(sent / file.size);
+        }
+    };
+    await Promise.all(Array.from({ length: Math.min(UPLOAD_PARALLEL_CHUNKS, chunks.length) }, worker));
+}
+
 // Typed API methods
 export const apiClient = {
     // Transcription
@@ -28,16 +114,55 @@ export const apiClient = {
             headers: { "Content-Type": "multipart/form-data" },
         });
     },
+    transcribeAudioInBackground: async (file: File) => {
+        const formData = new FormData();
+        formData.append("file", file);
+        return api.post<{ job_id: string; status: string }>("/transcribe?background=true", formData, {
+            headers: { "Content-Type": "multipart/form-data" },
+        });
+    },
+    // Chunked upload that resumes after a dropped connection or reload, then runs /transcribe
+    transcribeAudioResumable: async (file: File, onProgress?: (fraction: number) => void) => {
+        let session = await openUploadSession(file);
+        for (let round = 0; ; round++) {
+            await uploadMissing(session, file, onProgress);
+            onProgress?.(1);
+            try {
+                const res = await api.post<NoteResponse>(`/uploads/${session.id}/finalize`);
+                localStorage.removeItem(uploadKey(file));
+                return res;
+            } catch (e: any) {
+                // 409: ranges still missing, 422: ranges to send again (or a corrupt upload); retry once more
+                const status = e.response?.status;
+                if (round >= 1 || (status !== 409 && status !== 422)) {
+                    if (status === 404 || status === 422) localStorage.removeItem(uploadKey(file));
+                    throw e;
+                }
+                try {
+                    session = (await api.get<UploadSession>(`/uploads/${session.id}`)).data;
+                } catch {
+                    throw e;
+                }
+            }
+        }
+    },
+    // Live transcription while recording (see useBrowserRecorder)
+    liveTranscribeUrl: () => `${API_BASE.replace(/^http/, "ws")}/transcribe/live`,
+    getJob: async (jobId: string) => api.get(`/jobs/${jobId}`),
+    jobEventsUrl: (jobId: string) => `${API_BASE}/jobs/${jobId}/events`,
 
     // Notes
-    getNotes: async () => api.get("/notes"),
+    getNotes: async (filters: Record<string, unknown> = {}) => fetchAllPages("/notes", filters),
     getNote: async (id: number) => api.get(`/notes/${id}`),
     deleteNote: async (id: number) => api.delete(`/notes/${id}`),
-    searchNotes: async (query: string) => api.get(`/search?q=${query}`),
+    searchNotes: async (query: string, cursor?: string) =>
+        api.get("/search", { params: { q: query, cursor } }),
     translateNote: async (id: number, targetLanguage: string) => api.post(`/notes/${id}/translate`, { target_language: targetLanguage }),
+    translateNoteBatch: async (id: number, targetLanguages: string[]) =>
+        api.post(`/notes/${id}/translations`, { target_languages: targetLanguages }),
 
     // Tasks
-    getTasks: async () => api.get("/tasks"),
+    getTasks: async (filters: Record<string, unknown> = {}) => fetchAllPages("/tasks", filters),
     getTasksByNote: async (noteId: number) => api.get(`/tasks/note/${noteId}`),
     createTask: async (body: {
         task: string;
@@ -52,15 +177,85 @@ export const apiClient = {
     updateTaskStatus: async (taskId: number, status: string) =>
         api.patch(`/tasks/${taskId}`, { status }),
     deleteTask: async (taskId: number) => api.delete(`/tasks/${taskId}`),
+    bulkUpdateTasks: async (body: {
+        update?: Array<{ id: number } & Record<string, unknown>>;
+        create?: Array<Record<string, unknown>>;
+        delete?: number[];
+    }) => api.patch("/tasks/bulk", body),
     getTaskAnalytics: async () => api.get("/tasks/analytics/summary"),
+    getTaskSeries: async (params: {
+        bucket?: "day" | "week" | "month";
+        start?: string;
+        end?: string;
+        assignee?: string;
+        priority?: string;
+        note_id?: number;
+    } = {}) => api.get("/tasks/analytics/series", { params }),
 
     // Whiteboard (diagrams.net / draw.io XML)
     getWhiteboard: async () => api.get("/whiteboard"),
-    saveWhiteboard: async (diagram_xml: string) =>
-        api.put("/whiteboard", { diagram_xml }),
+    saveWhiteboard: async (diagram_xml: string, revision?: number) =>
+        api.put(
+            "/whiteboard",
+            { diagram_xml },
+            revision === undefined ? undefined : { headers: { "If-Match": `"${revision}"` } }
+        ),
+    // Splice edits against `revision`; offsets are JS string (UTF-16) indices
+    patchWhiteboard: async (
+        edits: Array<{ at: number; delete: number; insert: string }>,
+        revision: number
+    ) =>
+        api.patch("/whiteboard", { edits }, { headers: { "If-Match": `"${revision}"` } }),
+    getWhiteboardRevisions: async () => api.get("/whiteboard/revisions"),
+    whiteboardSocketUrl: () => `${API_BASE.replace(/^http/, "ws")}/whiteboard/ws`,
+    restoreWhiteboardRevision: async (revision: number) =>
+        api.post(`/whiteboard/revisions/${revision}/restore`),
 
     // Voice Commands
     processVoiceCommand: async (command: string, noteId: number) =>
         api.post("/voice-command", { command, note_id: noteId }),
+    // Streams the answer over SSE, calling onDelta per chunk; resolves with the full text
+    streamVoiceCommand: async (
+        command: string,
+        noteId: number,
+        onDelta: (delta: string) => void,
+        signal?: AbortSignal
+    ): Promise<string> => {
+        const res = await fetch(`${API_BASE}/voice-command/stream`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ command, note_id: noteId }),
+            signal,
+        });
+        if (!res.ok || !res.body) throw new Error(`Voice command failed (${res.status})`);
+
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        let full = "";
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            let boundary;
+            while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+                const raw = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                const event = raw.match(/^event: (.*)$/m)?.[1];
+                const data = raw.match(/^data: (.*)$/m)?.[1];
+                if (!event || !data) continue;
+                const payload = JSON.parse(data);
+                if (event === "delta") {
+                    full += payload.delta;
+                    onDelta(payload.delta);
+                } else if (event === "done") {
+                    return payload.response;
+                } else if (event === "error") {
+                    throw new Error(payload.detail);
+                }
+            }
+        }
+        return full;
+    },
 };
 